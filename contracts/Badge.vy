@@ -20,6 +20,9 @@ from vyper.interfaces import ERC165
 # maximum items in a batch call. Set to 128, to be determined what the practical limits are.
 BATCH_SIZE: constant(uint256) = 128
 
+# maximum receivers of an airdrop, each of them getting the same batch
+MAX_AIRDROP_RECEIVERS: constant(uint256) = 256
+
 # callback number of bytes
 CALLBACK_NUMBYTES: constant(uint256) = 4096
 
@@ -58,8 +61,21 @@ ERC1155_INTERFACE_ID_METADATA: constant(bytes4) = 0x0e89341c
 
 # mappings
 
-# Mapping from token ID to account balances
-balanceOf: public(HashMap[address, HashMap[uint256, uint256]])
+# Balances are packed 16 IDs per slot, as 16 bit lanes: ID `id` is lane `id % PACKED_IDS` of slot
+# `id / PACKED_IDS`. A lane set to LARGE_BALANCE holds a balance that does not fit, which is kept
+# in largeBalances instead.
+PACKED_IDS: constant(uint256) = 16
+LANE_BITS: constant(uint256) = 16
+LANE_MASK: constant(uint256) = 65535
+LARGE_BALANCE: constant(uint256) = 65535
+# slot key that no ID maps to, marking that no slot is loaded yet in a batch
+NO_SLOT: constant(uint256) = max_value(uint256)
+
+# Mapping from account to packed balances, by ID / PACKED_IDS
+packedBalances: HashMap[address, HashMap[uint256, uint256]]
+
+# Mapping from account to the balances of the LARGE_BALANCE lanes, by ID
+largeBalances: HashMap[address, HashMap[uint256, uint256]]
 
 # Mapping from account to operator approvals
 isApprovedForAll: public(HashMap[address, HashMap[address, bool]])
@@ -221,6 +237,141 @@ def renounceOwnership():
     log OwnershipTransferred(oldOwner, empty(address))
 
 
+## balances ##
+@internal
+@pure
+def _lane(word: uint256, id: uint256) -> uint256:
+    """
+    @dev read the lane of an ID in its packed balances slot
+    """
+    return (
+        shift(word, -convert((id % PACKED_IDS) * LANE_BITS, int128)) & LANE_MASK
+    )
+
+
+@internal
+@pure
+def _setLane(
+    word: uint256, id: uint256, lane: uint256, newLane: uint256
+) -> uint256:
+    """
+    @dev replace the current lane of an ID in its packed balances slot, newLane must fit in LANE_BITS
+    """
+    offset: int128 = convert((id % PACKED_IDS) * LANE_BITS, int128)
+    return word ^ shift(lane ^ newLane, offset)
+
+
+@internal
+def _credit(
+    word: uint256, account: address, id: uint256, amount: uint256
+) -> uint256:
+    """
+    @dev add amount to the balance of an ID and return the updated packed balances slot
+    @dev the caller stores the slot, so that a batch writes each slot once
+    """
+    lane: uint256 = self._lane(word, id)
+    if lane == LARGE_BALANCE:
+        self.largeBalances[account][id] += amount
+        return word
+    newBalance: uint256 = lane + amount
+    if newBalance >= LARGE_BALANCE:
+        self.largeBalances[account][id] = newBalance
+        newBalance = LARGE_BALANCE
+    return self._setLane(word, id, lane, newBalance)
+
+
+@internal
+def _debit(
+    word: uint256, account: address, id: uint256, amount: uint256
+) -> uint256:
+    """
+    @dev subtract amount from the balance of an ID and return the updated packed balances slot
+    @dev reverts when the balance is lower than amount
+    """
+    lane: uint256 = self._lane(word, id)
+    if lane != LARGE_BALANCE:
+        return self._setLane(word, id, lane, lane - amount)
+    newBalance: uint256 = self.largeBalances[account][id] - amount
+    if newBalance >= LARGE_BALANCE:
+        self.largeBalances[account][id] = newBalance
+        return word
+    self.largeBalances[account][id] = 0
+    return self._setLane(word, id, lane, newBalance)
+
+
+@internal
+def _creditBatch(
+    account: address,
+    ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+):
+    """
+    @dev add amounts to the balances of ids, storing a slot only when the next ID is in another one
+    @dev so consecutive IDs share one SLOAD and one SSTORE per PACKED_IDS IDs
+    """
+    key: uint256 = NO_SLOT
+    word: uint256 = 0
+    for i in range(BATCH_SIZE):
+        if i >= len(ids):
+            break
+        id: uint256 = ids[i]
+        if id / PACKED_IDS != key:
+            if key != NO_SLOT:
+                self.packedBalances[account][key] = word
+            key = id / PACKED_IDS
+            word = self.packedBalances[account][key]
+        word = self._credit(word, account, id, amounts[i])
+    if key != NO_SLOT:
+        self.packedBalances[account][key] = word
+
+
+@internal
+def _debitBatch(
+    account: address,
+    ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+):
+    """
+    @dev subtract amounts from the balances of ids, storing each slot as in _creditBatch
+    """
+    key: uint256 = NO_SLOT
+    word: uint256 = 0
+    for i in range(BATCH_SIZE):
+        if i >= len(ids):
+            break
+        id: uint256 = ids[i]
+        if id / PACKED_IDS != key:
+            if key != NO_SLOT:
+                self.packedBalances[account][key] = word
+            key = id / PACKED_IDS
+            word = self.packedBalances[account][key]
+        word = self._debit(word, account, id, amounts[i])
+    if key != NO_SLOT:
+        self.packedBalances[account][key] = word
+
+
+@internal
+@view
+def _balanceOf(account: address, id: uint256) -> uint256:
+    lane: uint256 = self._lane(
+        self.packedBalances[account][id / PACKED_IDS], id
+    )
+    if lane == LARGE_BALANCE:
+        return self.largeBalances[account][id]
+    return lane
+
+
+@external
+@view
+def balanceOf(account: address, id: uint256) -> uint256:
+    """
+    @dev check the balance of an account for a token ID
+    @param account the address to check the balance for
+    @param id the token ID to check the balance of
+    """
+    return self._balanceOf(account, id)
+
+
 @external
 @view
 def balanceOfBatch(
@@ -239,7 +390,7 @@ def balanceOfBatch(
     batchBalances: DynArray[uint256, BATCH_SIZE] = []
     j: uint256 = 0
     for i in ids:
-        batchBalances.append(self.balanceOf[accounts[j]][i])
+        batchBalances.append(self._balanceOf(accounts[j], i))
         j += 1
     return batchBalances
 
@@ -259,7 +410,10 @@ def mint(receiver: address, id: uint256, amount: uint256, data: bytes32):
     assert self.owner == msg.sender, "Only the contract owner can mint"
     assert receiver != empty(address), "Can not mint to ZERO ADDRESS"
     operator: address = msg.sender
-    self.balanceOf[receiver][id] += amount
+    key: uint256 = id / PACKED_IDS
+    self.packedBalances[receiver][key] = self._credit(
+        self.packedBalances[receiver][key], receiver, id, amount
+    )
     log TransferSingle(operator, empty(address), receiver, id, amount)
 
 
@@ -283,14 +437,47 @@ def mintBatch(
     assert receiver != empty(address), "Can not mint to ZERO ADDRESS"
     assert len(ids) == len(amounts), "ERC1155: ids and amounts length mismatch"
     operator: address = msg.sender
-    for i in range(BATCH_SIZE):
-        if i >= len(ids):
-            break
-        self.balanceOf[receiver][ids[i]] += amounts[i]
+    self._creditBatch(receiver, ids, amounts)
 
     log TransferBatch(operator, empty(address), receiver, ids, amounts)
 
 
+@external
+def airdrop(
+    receivers: DynArray[address, MAX_AIRDROP_RECEIVERS],
+    ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+    data: bytes32,
+):
+    """
+    @dev mint the same batch of tokens to each of the receivers in one transaction
+    @dev the pause, owner and length checks are done once, and an airdrop of a single ID is logged with the
+    @dev cheaper TransferSingle event
+    @param receivers the accounts that will each receive the tokens
+    @param ids array of ids for the tokens
+    @param amounts amounts of tokens for each ID in the ids array
+    @param data the data associated with this mint. Usually stays empty
+    """
+    assert not self.paused, "The contract has been paused"
+    assert self.owner == msg.sender, "Only the contract owner can mint"
+    assert len(ids) == len(amounts), "ERC1155: ids and amounts length mismatch"
+    operator: address = msg.sender
+    single: bool = len(ids) == 1
+    for receiver in receivers:
+        assert receiver != empty(address), "Can not mint to ZERO ADDRESS"
+        if single:
+            key: uint256 = ids[0] / PACKED_IDS
+            self.packedBalances[receiver][key] = self._credit(
+                self.packedBalances[receiver][key], receiver, ids[0], amounts[0]
+            )
+            log TransferSingle(
+                operator, empty(address), receiver, ids[0], amounts[0]
+            )
+        else:
+            self._creditBatch(receiver, ids, amounts)
+            log TransferBatch(operator, empty(address), receiver, ids, amounts)
+
+
 ## burn ##
 @external
 def burn(id: uint256, amount: uint256):
@@ -301,8 +488,12 @@ def burn(id: uint256, amount: uint256):
     @param amount of tokens to burnfor this ID
     """
     assert not self.paused, "The contract has been paused"
-    assert self.balanceOf[msg.sender][id] > 0, "caller does not own this ID"
-    self.balanceOf[msg.sender][id] -= amount
+    key: uint256 = id / PACKED_IDS
+    word: uint256 = self.packedBalances[msg.sender][key]
+    assert self._lane(word, id) > 0, "caller does not own this ID"
+    self.packedBalances[msg.sender][key] = self._debit(
+        word, msg.sender, id, amount
+    )
     log TransferSingle(msg.sender, msg.sender, empty(address), id, amount)
 
 
@@ -320,10 +511,7 @@ def burnBatch(
     assert not self.paused, "The contract has been paused"
     assert len(ids) == len(amounts), "ERC1155: ids and amounts length mismatch"
     operator: address = msg.sender
-    for i in range(BATCH_SIZE):
-        if i >= len(ids):
-            break
-        self.balanceOf[msg.sender][ids[i]] -= amounts[i]
+    self._debitBatch(msg.sender, ids, amounts)
 
     log TransferBatch(msg.sender, msg.sender, empty(address), ids, amounts)
 
@@ -367,12 +555,16 @@ def safeTransferFrom(
     assert (
         sender == msg.sender or self.isApprovedForAll[sender][msg.sender]
     ), "Caller is neither owner nor approved operator for this ID"
+    key: uint256 = id / PACKED_IDS
+    word: uint256 = self.packedBalances[sender][key]
     assert (
-        self.balanceOf[sender][id] > 0
+        self._lane(word, id) > 0
     ), "caller does not own this ID or ZERO balance"
     operator: address = msg.sender
-    self.balanceOf[sender][id] -= amount
-    self.balanceOf[receiver][id] += amount
+    self.packedBalances[sender][key] = self._debit(word, sender, id, amount)
+    self.packedBalances[receiver][key] = self._credit(
+        self.packedBalances[receiver][key], receiver, id, amount
+    )
     log TransferSingle(operator, sender, receiver, id, amount)
 
 
@@ -399,13 +591,8 @@ def safeBatchTransferFrom(
     ), "Caller is neither owner nor approved operator for this ID"
     assert len(ids) == len(amounts), "ERC1155: ids and amounts length mismatch"
     operator: address = msg.sender
-    for i in range(BATCH_SIZE):
-        if i >= len(ids):
-            break
-        id: uint256 = ids[i]
-        amount: uint256 = amounts[i]
-        self.balanceOf[sender][id] -= amount
-        self.balanceOf[receiver][id] += amount
+    self._debitBatch(sender, ids, amounts)
+    self._creditBatch(receiver, ids, amounts)
 
     log TransferBatch(operator, sender, receiver, ids, amounts)
 
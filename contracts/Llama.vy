@@ -66,6 +66,21 @@ event ApprovalForAll:
     _approved: bool
 
 
+# @dev EIP-2309: Emits when the consecutive NFTs from `_fromTokenId` to `_toTokenId`
+#      (inclusive) change ownership, in place of a Transfer event for each of them.
+#      Only emitted by the premint during contract creation.
+# @param _fromTokenId First NFT of the batch.
+# @param _toTokenId Last NFT of the batch.
+# @param _fromAddress Sender of the NFTs, the zero address as they are created.
+# @param _toAddress Receiver of the NFTs.
+
+event ConsecutiveTransfer:
+    _fromTokenId: indexed(uint256)
+    _toTokenId: uint256
+    _fromAddress: indexed(address)
+    _toAddress: indexed(address)
+
+
 IDENTITY_PRECOMPILE: constant(
     address
 ) = 0x0000000000000000000000000000000000000004
@@ -82,13 +97,24 @@ base_uri: public(String[128])
 contract_uri: String[128]
 
 # NFT Data
-ids_by_owner: HashMap[address, DynArray[uint256, MAX_SUPPLY]]
-id_to_index: HashMap[uint256, uint256]
 token_count: uint256
 
-owned_tokens: HashMap[
-    uint256, address
-]  # @dev NFT ID to the address that owns it
+# @dev NFT ID to its owner in the low 160 bits and its position in the
+#      owner's enumeration above them. Zero for preminted NFTs that never
+#      moved, which are resolved from their run in `premint_runs`, and for
+#      NFTs of an allowlist mint that never moved, resolved from `mint_batches`.
+token_ownership: HashMap[uint256, uint256]
+# @dev First NFT of an allowlist mint to its ownership as in `token_ownership`
+mint_batches: HashMap[uint256, uint256]
+# @dev Run index to the first NFT of a run of consecutive NFTs preminted to
+#      the same owner, above that NFT's ownership as in `token_ownership`
+premint_runs: HashMap[uint256, uint256]
+PREMINT_COUNT: immutable(uint256)
+PREMINT_RUN_COUNT: immutable(uint256)
+# @dev Owner address to its enumeration as 16 bit lanes, 16 to a slot.
+#      Lane 0 holds the balance and lane `i + 1` the ID of the `i`th NFT.
+owner_lanes: HashMap[address, HashMap[uint256, uint256]]
+
 token_approvals: HashMap[uint256, address]  # @dev NFT ID to approved address
 operator_approvals: HashMap[
     address, HashMap[address, bool]
@@ -108,18 +134,30 @@ revealed: public(bool)
 default_uri: public(String[150])
 
 MAX_SUPPLY: constant(uint256) = 1111
-MAX_PREMINT: constant(uint256) = 20
-MAX_MINT_PER_TX: constant(uint256) = 3
+# Also bounds the lookup of NFTs in `mint_batches`
+MAX_MINT_PER_TX: constant(uint256) = 10
 COST: constant(uint256) = as_wei_value(0.1, "ether")
+MAX_PROOF_LENGTH: constant(uint256) = 20
+
+OWNER_MASK: constant(uint256) = 2**160 - 1
+POSITION_SHIFT: constant(int128) = 160
+LANE_MASK: constant(uint256) = 2**16 - 1
+LANE_BITS: constant(uint256) = 16
+LANES_PER_SLOT: constant(uint256) = 16
+RUN_START_SHIFT: constant(int128) = 240
+RUN_OWNERSHIP_MASK: constant(uint256) = 2**240 - 1
+# Binary search steps over the premint runs, 2**11 > MAX_SUPPLY
+RUN_SEARCH_STEPS: constant(uint256) = 11
 
 al_mint_started: public(bool)
 al_signer: public(address)
+al_merkle_root: public(bytes32)
 minter: public(address)
 al_mint_amount: public(HashMap[address, uint256])
 
 
 @external
-def __init__(preminters: address[MAX_PREMINT]):
+def __init__(preminters: DynArray[address, MAX_SUPPLY]):
     self.symbol = "LLAMA"
     self.name = "The Llamas"
     self.owner = msg.sender
@@ -129,12 +167,31 @@ def __init__(preminters: address[MAX_PREMINT]):
     self.al_signer = msg.sender
     self.minter = msg.sender
 
-    for i in range(MAX_PREMINT):
-        token_id: uint256 = self.token_count
-        self._add_token_to(preminters[i], token_id)
-        self.token_count += 1
+    # Each run of consecutive NFTs preminted to the same owner is recorded
+    # once, `_ownership` resolves its NFTs until they are first transferred
+    num_preminted: uint256 = len(preminters)
+    num_runs: uint256 = 0
+    run_start: uint256 = 0
+    for token_id in range(MAX_SUPPLY):
+        if token_id == num_preminted:
+            break
 
-        log Transfer(empty(address), preminters[i], token_id)
+        owner: address = preminters[token_id]
+        position: uint256 = self._append_token(owner, token_id)
+        if token_id == run_start:
+            self.premint_runs[num_runs] = (
+                shift(token_id, RUN_START_SHIFT)
+                | shift(position, POSITION_SHIFT)
+                | convert(owner, uint256)
+            )
+            num_runs += 1
+
+        if token_id + 1 == num_preminted or preminters[token_id + 1] != owner:
+            log ConsecutiveTransfer(run_start, token_id, empty(address), owner)
+            run_start = token_id + 1
+    self.token_count = num_preminted
+    PREMINT_COUNT = num_preminted
+    PREMINT_RUN_COUNT = num_runs
 
 
 @pure
@@ -168,7 +225,7 @@ def balanceOf(owner: address) -> uint256:
     assert owner != empty(
         address
     )  # dev: "ERC721: balance query for the zero address"
-    return len(self.ids_by_owner[owner])
+    return self._lane(owner, 0)
 
 
 @view
@@ -182,7 +239,7 @@ def ownerOf(token_id: uint256) -> address:
     @return The address of the owner of the NFT
     """
 
-    owner: address = self.owned_tokens[token_id]
+    owner: address = self._owner_of(token_id)
     assert owner != empty(
         address
     )  # dev: "ERC721: owner query for nonexistent token"
@@ -200,7 +257,7 @@ def getApproved(token_id: uint256) -> address:
     @return The approved address for this NFT, or the zero address if there is none
     """
 
-    assert self.owned_tokens[token_id] != empty(
+    assert self._owner_of(token_id) != empty(
         address
     )  # dev: "ERC721: approved query for nonexistent token"
     return self.token_approvals[token_id]
@@ -234,7 +291,7 @@ def _is_approved_or_owner(spender: address, token_id: uint256) -> bool:
         is an operator of the owner, or is the owner of the token
     """
 
-    owner: address = self.owned_tokens[token_id]
+    owner: address = self._owner_of(token_id)
     spender_is_owner: bool = owner == spender
     spender_is_approved: bool = spender == self.token_approvals[token_id]
     spender_is_approved_for_all: bool = self.operator_approvals[owner][spender]
@@ -244,6 +301,59 @@ def _is_approved_or_owner(spender: address, token_id: uint256) -> bool:
     ) or spender_is_approved_for_all
 
 
+@internal
+@view
+def _ownership(token_id: uint256) -> uint256:
+    # NFTs preminted or allowlist minted and never transferred have no
+    # ownership of their own. They resolve to the premint run or the mint
+    # they are part of, whose NFTs follow each other in the enumeration.
+    ownership: uint256 = self.token_ownership[token_id]
+    if ownership != 0:
+        return ownership
+
+    if token_id >= PREMINT_COUNT:
+        if token_id >= self.token_count:
+            return 0
+        for i in range(MAX_MINT_PER_TX):
+            batch: uint256 = self.mint_batches[token_id - i]
+            if batch != 0:
+                return batch + shift(i, POSITION_SHIFT)
+        return 0
+
+    low: uint256 = 0
+    high: uint256 = PREMINT_RUN_COUNT - 1
+    for i in range(RUN_SEARCH_STEPS):
+        if low == high:
+            break
+        mid: uint256 = (low + high + 1) / 2
+        if shift(self.premint_runs[mid], -RUN_START_SHIFT) <= token_id:
+            low = mid
+        else:
+            high = mid - 1
+    run: uint256 = self.premint_runs[low]
+    return (run & RUN_OWNERSHIP_MASK) + shift(
+        token_id - shift(run, -RUN_START_SHIFT), POSITION_SHIFT
+    )
+
+
+@internal
+@view
+def _owner_of(token_id: uint256) -> address:
+    return convert(
+        convert(self._ownership(token_id) & OWNER_MASK, uint160), address
+    )
+
+
+@internal
+@view
+def _lane(owner: address, lane: uint256) -> uint256:
+    offset: int128 = convert((lane % LANES_PER_SLOT) * LANE_BITS, int128)
+    return (
+        shift(self.owner_lanes[owner][lane / LANES_PER_SLOT], -offset)
+        & LANE_MASK
+    )
+
+
 @internal
 def _add_token_to(_to: address, _token_id: uint256):
     """
@@ -252,15 +362,37 @@ def _add_token_to(_to: address, _token_id: uint256):
     """
 
     # Throws if `_token_id` is owned by someone
-    assert self.owned_tokens[_token_id] == empty(address)
+    assert self.token_ownership[_token_id] == 0
 
     # Change the owner
-    self.owned_tokens[_token_id] = _to
+    position: uint256 = self._append_token(_to, _token_id)
+    self.token_ownership[_token_id] = convert(_to, uint256) | shift(
+        position, POSITION_SHIFT
+    )
+
 
-    # Change count tracking
-    num_ids: uint256 = len(self.ids_by_owner[_to])
-    self.id_to_index[_token_id] = num_ids
-    self.ids_by_owner[_to].append(_token_id)
+@internal
+def _append_token(_to: address, _token_id: uint256) -> uint256:
+    """
+    @dev Append a NFT to the enumeration of a given address and bump its
+         balance in lane 0. Returns the position of the NFT.
+    """
+
+    # The lane helpers are inlined, as vyper drops internal functions that are
+    # only called from internal functions used by the constructor.
+    balance_slot: uint256 = self.owner_lanes[_to][0]
+    num_ids: uint256 = balance_slot & LANE_MASK
+    lane: uint256 = num_ids + 1
+    slot: uint256 = lane / LANES_PER_SLOT
+    offset: int128 = convert((lane % LANES_PER_SLOT) * LANE_BITS, int128)
+    packed: uint256 = balance_slot + 1
+    if slot != 0:
+        self.owner_lanes[_to][0] = packed
+        packed = self.owner_lanes[_to][slot]
+    # Lanes past the balance may hold a stale ID
+    stale_id: uint256 = shift(packed, -offset) & LANE_MASK
+    self.owner_lanes[_to][slot] = packed ^ shift(stale_id ^ _token_id, offset)
+    return num_ids
 
 
 @internal
@@ -270,28 +402,36 @@ def _remove_token_from(_from: address, _token_id: uint256):
          Throws if `_from` is not the current owner.
     """
 
+    ownership: uint256 = self._ownership(_token_id)
+
     # Throws if `_from` is not the current owner
-    assert self.owned_tokens[_token_id] == _from
+    assert ownership & OWNER_MASK == convert(_from, uint256)
 
     # Change the owner
-    self.owned_tokens[_token_id] = empty(address)
-
-    # Update ids list for user
-    end_index: uint256 = len(self.ids_by_owner[_from]) - 1
-    id_index: uint256 = self.id_to_index[_token_id]
-    if end_index == id_index:
-        # Remove is simple since token is at end of ids list
-        self.ids_by_owner[_from].pop()
-        self.id_to_index[_token_id] = 0
-    else:
-        # Token is not at end;
-        # replace it with the end token and then..
-        end_id: uint256 = self.ids_by_owner[_from][end_index]
-        self.ids_by_owner[_from][id_index] = end_id
-        # ... pop!
-        self.ids_by_owner[_from].pop()
-        self.id_to_index[_token_id] = 0
-        self.id_to_index[end_id] = id_index
+    self.token_ownership[_token_id] = 0
+
+    # Update the enumeration of the owner, lowering the balance in lane 0.
+    # The freed lane is left as it is, overwriting a dirty slot later is
+    # cheaper than clearing it now.
+    balance_slot: uint256 = self.owner_lanes[_from][0]
+    end_position: uint256 = (balance_slot & LANE_MASK) - 1
+    self.owner_lanes[_from][0] = balance_slot - 1
+
+    position: uint256 = shift(ownership, -POSITION_SHIFT)
+    if position != end_position:
+        # Token is not at the end, replace it with the end token
+        end_id: uint256 = self._lane(_from, end_position + 1)
+
+        lane: uint256 = position + 1
+        slot: uint256 = lane / LANES_PER_SLOT
+        offset: int128 = convert((lane % LANES_PER_SLOT) * LANE_BITS, int128)
+        packed: uint256 = self.owner_lanes[_from][slot]
+        self.owner_lanes[_from][slot] = packed ^ shift(
+            (shift(packed, -offset) & LANE_MASK) ^ end_id, offset
+        )
+        self.token_ownership[end_id] = convert(_from, uint256) | shift(
+            position, POSITION_SHIFT
+        )
 
 
 @internal
@@ -302,7 +442,7 @@ def _clear_approval(_owner: address, _token_id: uint256):
     """
 
     # Throws if `_owner` is not the current owner
-    assert self.owned_tokens[_token_id] == _owner
+    assert self._owner_of(_token_id) == _owner
     if self.token_approvals[_token_id] != empty(address):
         # Reset approvals
         self.token_approvals[_token_id] = empty(address)
@@ -408,7 +548,7 @@ def approve(approved: address, token_id: uint256):
     @param token_id ID of the token to be approved.
     """
 
-    owner: address = self.owned_tokens[token_id]
+    owner: address = self._owner_of(token_id)
 
     # Throws if `token_id` is not a valid NFT
     assert owner != empty(
@@ -419,7 +559,7 @@ def approve(approved: address, token_id: uint256):
     assert approved != owner  # dev: "ERC721: approval to current owner"
 
     # Check requirements
-    is_owner: bool = self.owned_tokens[token_id] == msg.sender
+    is_owner: bool = owner == msg.sender
     is_approved_all: bool = (self.operator_approvals[owner])[msg.sender]
     assert (
         is_owner or is_approved_all
@@ -467,22 +607,67 @@ def allowlistMint(
     assert (
         self.checkAlSignature(sig, msg.sender, approved_amount) == True
     ), "Signature is not valid"
+
+    self._allowlist_mint(mint_amount, approved_amount)
+
+
+@external
+@payable
+def allowlistMintWithProof(
+    mint_amount: uint256,
+    approved_amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+):
+    """
+    @notice Function to mint a token for allowlisted users, proving
+            membership in the allowlist Merkle tree instead of a signature
+    """
+
+    # Checks
+    assert self.al_mint_started == True, "AL Mint not active"
+    assert mint_amount <= MAX_MINT_PER_TX, "Transaction exceeds max mint amount"
+    assert self._verify_proof(
+        proof,
+        self.al_merkle_root,
+        keccak256(_abi_encode("allowlist:", msg.sender, approved_amount)),
+    ), "Proof is not valid"
+
+    self._allowlist_mint(mint_amount, approved_amount)
+
+
+@internal
+@payable
+def _allowlist_mint(mint_amount: uint256, approved_amount: uint256):
     assert (
         (self.al_mint_amount[msg.sender] + mint_amount) <= approved_amount
     ), "Cannot mint over approved amount"
     assert msg.value >= COST * mint_amount, "Not enough ether provided"
 
+    if mint_amount == 0:
+        return
+
+    first_id: uint256 = self.token_count
+    assert first_id + mint_amount <= MAX_SUPPLY
+
+    # Only the first NFT of the mint gets a record, `_ownership` resolves the
+    # rest from it until they are transferred
+    position: uint256 = 0
     for i in range(MAX_MINT_PER_TX):
         if i >= mint_amount:
             break
 
-        token_id: uint256 = self.token_count
-        assert token_id < MAX_SUPPLY
-        self._add_token_to(msg.sender, token_id)
-        self.token_count += 1
+        token_id: uint256 = first_id + i
+        if i == 0:
+            position = self._append_token(msg.sender, token_id)
+        else:
+            self._append_token(msg.sender, token_id)
 
         log Transfer(empty(address), msg.sender, token_id)
 
+    self.mint_batches[first_id] = convert(msg.sender, uint256) | shift(
+        position, POSITION_SHIFT
+    )
+    self.token_count = first_id + mint_amount
     self.al_mint_amount[msg.sender] += mint_amount
 
 
@@ -515,7 +700,7 @@ def tokenURI(token_id: uint256) -> String[256]:
     @notice A distinct Uniform Resource Identifier (URI) for a given asset.
     @dev Throws if `_token_id` is not a valid NFT. URIs are defined in RFC 6686. The URI may point to a JSON file that conforms to the "ERC721 Metadata JSON Schema".
     """
-    if self.owned_tokens[token_id] == empty(address):
+    if self._owner_of(token_id) == empty(address):
         raise  # dev: "ERC721URIStorage: URI query for nonexistent token"
 
     if self.revealed:
@@ -549,6 +734,12 @@ def set_al_signer(al_signer: address):
     self.al_signer = al_signer
 
 
+@external
+def set_al_merkle_root(al_merkle_root: bytes32):
+    assert msg.sender == self.owner, "Caller is not the owner"
+    self.al_merkle_root = al_merkle_root
+
+
 @external
 def set_base_uri(base_uri: String[128]):
     """
@@ -678,14 +869,21 @@ def tokenOfOwnerByIndex(owner: address, index: uint256) -> uint256:
     @return The token identifier for the `index`th NFT assigned to `owner`, (sort order not specified)
     """
     assert owner != empty(address)
-    assert index < len(self.ids_by_owner[owner])
-    return self.ids_by_owner[owner][index]
+    assert index < self._lane(owner, 0)
+    return self._lane(owner, index + 1)
 
 
 @external
 @view
 def tokensForOwner(owner: address) -> DynArray[uint256, MAX_SUPPLY]:
-    return self.ids_by_owner[owner]
+    token_ids: DynArray[uint256, MAX_SUPPLY] = []
+    num_ids: uint256 = self._lane(owner, 0)
+    for i in range(MAX_SUPPLY):
+        if i == num_ids:
+            break
+        token_id: uint256 = self._lane(owner, i + 1)
+        token_ids.append(token_id)
+    return token_ids
 
 
 ## SIGNATURE HELPER
@@ -707,3 +905,21 @@ def checkAlSignature(
     )
 
     return self.al_signer == ecrecover(ethSignedHash, v, r, s)
+
+
+## MERKLE PROOF HELPER
+
+
+@internal
+@pure
+def _verify_proof(
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH], root: bytes32, leaf: bytes32
+) -> bool:
+    # Pairs are hashed in sorted order, so the proof needs no left/right flags
+    computed_hash: bytes32 = leaf
+    for node in proof:
+        if convert(computed_hash, uint256) < convert(node, uint256):
+            computed_hash = keccak256(concat(computed_hash, node))
+        else:
+            computed_hash = keccak256(concat(node, computed_hash))
+    return computed_hash == root
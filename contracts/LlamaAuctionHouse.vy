@@ -69,11 +69,20 @@ event AuctionSettled:
     _amount: uint256
 
 
+event AuctionSkipped:
+    _llama_id: indexed(uint256)
+
+
 event Withdraw:
     _withdrawer: indexed(address)
     _amount: uint256
 
 
+event ProceedsClaimed:
+    _recipient: indexed(address)
+    _amount: uint256
+
+
 # Technically vyper doesn't need this as it is automatic
 # in all recent vyper versions, but Etherscan verification
 # will bork without it.
@@ -82,6 +91,9 @@ IDENTITY_PRECOMPILE: constant(
 ) = 0x0000000000000000000000000000000000000004
 
 ADMIN_MAX_WITHDRAWALS: constant(uint256) = 100
+MAX_MISSED_AUCTIONS: constant(uint256) = 24
+MAX_PROCEEDS_CLAIMS: constant(uint256) = 10
+MAX_PROOF_LENGTH: constant(uint256) = 20
 
 # Auction
 llamas: public(Llama)
@@ -95,6 +107,8 @@ pending_returns: public(HashMap[address, uint256])
 # WL Auction
 wl_enabled: public(bool)
 wl_signer: public(address)
+wl_merkle_root: public(bytes32)
+friend_merkle_root: public(bytes32)
 wl_auctions_won: public(HashMap[address, uint256])
 
 # Permissions
@@ -106,6 +120,7 @@ paused: public(bool)
 # Proceeds
 proceeds_receiver: public(address)
 proceeds_receiver_split_percentage: public(uint256)
+pending_proceeds: public(HashMap[address, uint256])
 
 
 @external
@@ -148,6 +163,38 @@ def settle_current_and_create_new_auction():
     self._create_auction()
 
 
+@external
+@nonreentrant("lock")
+def settle_missed_and_create_new_auction(max_missed: uint256):
+    """
+    @dev Settle the current auction, skip an auction for every full
+      `duration` that passed since it ended, up to `max_missed` of them, and
+      start a new one. Nobody could bid on the skipped auctions, their llamas
+      go to the owner with an AuctionSkipped event.
+      Throws if the caller is not the owner.
+      Throws if the auction house is paused.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+    assert self.paused == False, "Auction house is paused"
+
+    self._settle_auction()
+
+    missed: uint256 = min(
+        (block.timestamp - self.auction.end_time) / self.duration, max_missed
+    )
+    owner: address = self.owner
+
+    for i in range(MAX_MISSED_AUCTIONS):
+        if i == missed:
+            break
+        llama_id: uint256 = self.llamas.mint()
+        self.llamas.transferFrom(self, owner, llama_id)
+        log AuctionSkipped(llama_id)
+
+    self._create_auction()
+
+
 @external
 @nonreentrant("lock")
 def settle_auction():
@@ -200,6 +247,58 @@ def create_wl_bid(llama_id: uint256, bid_amount: uint256, sig: Bytes[65]):
     self._create_bid(llama_id, bid_amount)
 
 
+@external
+@payable
+@nonreentrant("lock")
+def create_friend_bid_with_proof(
+    llama_id: uint256,
+    bid_amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+):
+    """
+    @dev Create a bid, proving membership in the friend Merkle tree.
+      Throws if the whitelist is not enabled.
+      Throws if the `proof` is invalid.
+      Throws if the `msg.sender` has already won one whitelist auctions.
+    """
+
+    assert self.wl_enabled == True, "WL auction is not enabled"
+    assert self._verify_proof(
+        proof,
+        self.friend_merkle_root,
+        keccak256(_abi_encode("friend:", msg.sender)),
+    ), "Proof is invalid"
+    assert self.wl_auctions_won[msg.sender] < 1, "Already won 1 WL auction"
+
+    self._create_bid(llama_id, bid_amount)
+
+
+@external
+@payable
+@nonreentrant("lock")
+def create_wl_bid_with_proof(
+    llama_id: uint256,
+    bid_amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+):
+    """
+    @dev Create a bid, proving membership in the whitelist Merkle tree.
+      Throws if the whitelist is not enabled.
+      Throws if the `proof` is invalid.
+      Throws if the `msg.sender` has already won two whitelist auctions.
+    """
+
+    assert self.wl_enabled == True, "WL auction is not enabled"
+    assert self._verify_proof(
+        proof,
+        self.wl_merkle_root,
+        keccak256(_abi_encode("whitelist:", msg.sender)),
+    ), "Proof is invalid"
+    assert self.wl_auctions_won[msg.sender] < 2, "Already won 2 WL auctions"
+
+    self._create_bid(llama_id, bid_amount)
+
+
 @external
 @payable
 @nonreentrant("lock")
@@ -231,6 +330,23 @@ def withdraw():
     log Withdraw(msg.sender, pending_amount)
 
 
+@external
+@nonreentrant("lock")
+def claim_proceeds(addresses: DynArray[address, MAX_PROCEEDS_CLAIMS]):
+    """
+    @dev Pay out the auction proceeds credited to each of `addresses`.
+    """
+
+    for _address in addresses:
+        proceeds: uint256 = self.pending_proceeds[_address]
+        if proceeds == 0:
+            continue
+        self.pending_proceeds[_address] = 0
+        raw_call(_address, b"", value=proceeds)
+
+        log ProceedsClaimed(_address, proceeds)
+
+
 ### ADMIN FUNCTIONS
 
 
@@ -383,6 +499,28 @@ def set_wl_signer(_wl_signer: address):
     self.wl_signer = _wl_signer
 
 
+@external
+def set_wl_merkle_root(_wl_merkle_root: bytes32):
+    """
+    @notice Admin function to set the whitelist Merkle root.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+
+    self.wl_merkle_root = _wl_merkle_root
+
+
+@external
+def set_friend_merkle_root(_friend_merkle_root: bytes32):
+    """
+    @notice Admin function to set the friend list Merkle root.
+    """
+
+    assert msg.sender == self.owner, "Caller is not the owner"
+
+    self.friend_merkle_root = _friend_merkle_root
+
+
 @internal
 def _create_auction():
     _llama_id: uint256 = self.llamas.mint()
@@ -424,8 +562,10 @@ def _settle_auction():
             self.auction.amount * self.proceeds_receiver_split_percentage
         ) / 100
         owner_amount: uint256 = self.auction.amount - fee
-        raw_call(self.owner, b"", value=owner_amount)
-        raw_call(self.proceeds_receiver, b"", value=fee)
+        # Credited here and paid out by `claim_proceeds`, so a reverting
+        # recipient cannot block the auction rotation
+        self.pending_proceeds[self.owner] += owner_amount
+        self.pending_proceeds[self.proceeds_receiver] += fee
 
     log AuctionSettled(
         self.auction.llama_id, self.auction.bidder, self.auction.amount
@@ -508,3 +648,18 @@ def _check_friend_signature(sig: Bytes[65], sender: address) -> bool:
     )
 
     return self.wl_signer == ecrecover(ethSignedHash, v, r, s)
+
+
+@internal
+@pure
+def _verify_proof(
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH], root: bytes32, leaf: bytes32
+) -> bool:
+    # Pairs are hashed in sorted order, so the proof needs no left/right flags
+    computed_hash: bytes32 = leaf
+    for node in proof:
+        if convert(computed_hash, uint256) < convert(node, uint256):
+            computed_hash = keccak256(concat(computed_hash, node))
+        else:
+            computed_hash = keccak256(concat(node, computed_hash))
+    return computed_hash == root
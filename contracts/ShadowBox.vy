@@ -1,7 +1,7 @@
 # @version 0.3.7
 
 # @notice An ERC1155TokenReceiver contract that is equivalent to Blueberry Club's Closet.sol This would be where users can choose to "attach" their badges to a specific llama.
-# @dev Still not sure if we should make badges soul bound once they are attached or allow them to be unattached and moved to a different llama at will.
+# @dev Attached badges are held by this contract and follow the llama: whoever owns the llama, or operates it, can attach more badges and detach them at will. Badge does not call the ERC1155 receiver hooks, so badges are pulled in with safeTransferFrom / safeBatchTransferFrom by attach and attach_batch, after the owner approved this contract with Badge.setApprovalForAll.
 # @author The Llamas
 # @license MIT
 #
@@ -13,6 +13,318 @@
 #                 \/      \/             \/           \/       \/      \/      \/
 
 
+# Badge.BATCH_SIZE and Badge.CALLBACK_NUMBYTES
+BATCH_SIZE: constant(uint256) = 128
+CALLBACK_NUMBYTES: constant(uint256) = 4096
+# Distinct badge IDs attached to one llama, which bounds badges_of
+MAX_BADGES_PER_LLAMA: constant(uint256) = 128
+
+
+interface Llama:
+    def ownerOf(token_id: uint256) -> address: view
+    def isApprovedForAll(owner: address, operator: address) -> bool: view
+
+
+interface Badge:
+    def safeTransferFrom(
+        sender: address,
+        receiver: address,
+        id: uint256,
+        amount: uint256,
+        data: bytes32,
+    ): nonpayable
+    def safeBatchTransferFrom(
+        sender: address,
+        receiver: address,
+        ids: DynArray[uint256, BATCH_SIZE],
+        amounts: DynArray[uint256, BATCH_SIZE],
+        data: bytes32,
+    ): nonpayable
+
+
+struct Attachment:
+        badge_id: uint256
+        amount: uint256
+
+
+event BadgesAttached:
+    _llama_id: indexed(uint256)
+    _sender: indexed(address)
+    _badge_ids: DynArray[uint256, BATCH_SIZE]
+    _amounts: DynArray[uint256, BATCH_SIZE]
+
+
+event BadgesDetached:
+    _llama_id: indexed(uint256)
+    _sender: indexed(address)
+    _badge_ids: DynArray[uint256, BATCH_SIZE]
+    _amounts: DynArray[uint256, BATCH_SIZE]
+
+
+ERC165_INTERFACE_ID: constant(bytes4) = 0x01ffc9a7
+ERC1155_TOKEN_RECEIVER_INTERFACE_ID: constant(bytes4) = 0x4e2312e0
+ERC1155_RECEIVED: constant(bytes4) = 0xf23a6e61
+ERC1155_BATCH_RECEIVED: constant(bytes4) = 0xbc197c81
+
+AMOUNT_MASK: constant(uint256) = 2**128 - 1
+POSITION_SHIFT: constant(int128) = 128
+
+llamas: public(Llama)
+badges: public(Badge)
+
+# Attachment of each badge ID to each llama: the amount in the low 128 bits and
+# above them the index of the badge ID in badge_by_index plus one, so a badge
+# that is not attached is 0 and attaching a new one writes a single slot.
+attachments: HashMap[uint256, HashMap[uint256, uint256]]
+
+# Enumeration of the badge IDs attached to each llama
+badge_count: public(HashMap[uint256, uint256])
+badge_by_index: HashMap[uint256, HashMap[uint256, uint256]]
+
+
+@external
+def __init__(_llamas: Llama, _badges: Badge):
+    self.llamas = _llamas
+    self.badges = _badges
+
+
+### ATTACH ###
+
+
+@external
+def attach(llama_id: uint256, badge_id: uint256, amount: uint256):
+    """
+    @dev Attach `amount` of a badge held by the caller to a llama it owns or operates.
+    """
+
+    self._check_llama_operator(llama_id)
+    self.badges.safeTransferFrom(
+        msg.sender, self, badge_id, amount, empty(bytes32)
+    )
+    self._attach(llama_id, badge_id, amount)
+
+    log BadgesAttached(llama_id, msg.sender, [badge_id], [amount])
+
+
+@external
+def attach_batch(
+    llama_id: uint256,
+    badge_ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+):
+    """
+    @dev Attach several badges held by the caller to a llama it owns or operates, in one Badge transfer.
+    """
+
+    self._check_llama_operator(llama_id)
+    assert len(badge_ids) == len(
+        amounts
+    ), "Badge IDs and amounts length mismatch"
+    self.badges.safeBatchTransferFrom(
+        msg.sender, self, badge_ids, amounts, empty(bytes32)
+    )
+    for i in range(BATCH_SIZE):
+        if i >= len(badge_ids):
+            break
+        self._attach(llama_id, badge_ids[i], amounts[i])
+
+    log BadgesAttached(llama_id, msg.sender, badge_ids, amounts)
+
+
+### DETACH ###
+
+
+@external
+def detach(llama_id: uint256, badge_id: uint256, amount: uint256):
+    """
+    @dev Detach `amount` of a badge from a llama the caller owns or operates, and send it to the caller.
+    """
+
+    self._check_llama_operator(llama_id)
+    self._detach(llama_id, badge_id, amount)
+    self.badges.safeTransferFrom(
+        self, msg.sender, badge_id, amount, empty(bytes32)
+    )
+
+    log BadgesDetached(llama_id, msg.sender, [badge_id], [amount])
+
+
 @external
-def __init__():
-    pass
+def detach_batch(
+    llama_id: uint256,
+    badge_ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+):
+    """
+    @dev Detach several badges from a llama the caller owns or operates, and send them to the caller.
+    """
+
+    self._check_llama_operator(llama_id)
+    assert len(badge_ids) == len(
+        amounts
+    ), "Badge IDs and amounts length mismatch"
+    for i in range(BATCH_SIZE):
+        if i >= len(badge_ids):
+            break
+        self._detach(llama_id, badge_ids[i], amounts[i])
+    self.badges.safeBatchTransferFrom(
+        self, msg.sender, badge_ids, amounts, empty(bytes32)
+    )
+
+    log BadgesDetached(llama_id, msg.sender, badge_ids, amounts)
+
+
+### VIEWS ###
+
+
+@external
+@view
+def attached(llama_id: uint256, badge_id: uint256) -> uint256:
+    """
+    @dev The amount of a badge attached to a llama.
+    """
+
+    return self.attachments[llama_id][badge_id] & AMOUNT_MASK
+
+
+@external
+@view
+def badges_of(llama_id: uint256) -> DynArray[Attachment, MAX_BADGES_PER_LLAMA]:
+    """
+    @dev All the badges attached to a llama, in no particular order.
+    """
+
+    count: uint256 = self.badge_count[llama_id]
+    attachments: DynArray[Attachment, MAX_BADGES_PER_LLAMA] = []
+    for i in range(MAX_BADGES_PER_LLAMA):
+        if i >= count:
+            break
+        badge_id: uint256 = self.badge_by_index[llama_id][i]
+        attachments.append(
+            Attachment(
+                {
+                    badge_id: badge_id,
+                    amount: self.attachments[llama_id][badge_id] & AMOUNT_MASK,
+                }
+            )
+        )
+    return attachments
+
+
+@external
+@view
+def badge_of_llama_by_index(llama_id: uint256, index: uint256) -> uint256:
+    """
+    @dev The badge ID at `index` of the enumeration of a llama's badges.
+    """
+
+    assert index < self.badge_count[llama_id], "Index out of range"
+    return self.badge_by_index[llama_id][index]
+
+
+@external
+@pure
+def supportsInterface(interface_id: bytes4) -> bool:
+    return interface_id in [
+        ERC165_INTERFACE_ID,
+        ERC1155_TOKEN_RECEIVER_INTERFACE_ID,
+    ]
+
+
+### ERC1155 RECEIVER ###
+
+
+@external
+def onERC1155Received(
+    operator: address,
+    sender: address,
+    id: uint256,
+    amount: uint256,
+    data: Bytes[CALLBACK_NUMBYTES],
+) -> bytes4:
+    """
+    @dev Only accepts the badges pulled in by attach, so nothing gets stuck unattached.
+    """
+
+    assert msg.sender == self.badges.address, "Only badges can be attached"
+    assert operator == self, "Attach badges with attach or attach_batch"
+    return ERC1155_RECEIVED
+
+
+@external
+def onERC1155BatchReceived(
+    operator: address,
+    sender: address,
+    ids: DynArray[uint256, BATCH_SIZE],
+    amounts: DynArray[uint256, BATCH_SIZE],
+    data: Bytes[CALLBACK_NUMBYTES],
+) -> bytes4:
+    """
+    @dev Only accepts the badges pulled in by attach_batch, so nothing gets stuck unattached.
+    """
+
+    assert msg.sender == self.badges.address, "Only badges can be attached"
+    assert operator == self, "Attach badges with attach or attach_batch"
+    return ERC1155_BATCH_RECEIVED
+
+
+### INTERNAL FUNCTIONS ###
+
+
+@internal
+@view
+def _check_llama_operator(llama_id: uint256):
+    llama_owner: address = self.llamas.ownerOf(llama_id)
+    assert (
+        llama_owner == msg.sender
+        or self.llamas.isApprovedForAll(llama_owner, msg.sender)
+    ), "Caller is not the llama owner or operator"
+
+
+@internal
+def _attach(llama_id: uint256, badge_id: uint256, amount: uint256):
+    """
+    @dev Append a badge ID to the end of the llama's enumeration when it is new.
+    """
+
+    assert amount > 0, "Cannot attach zero badges"
+    attachment: uint256 = self.attachments[llama_id][badge_id]
+    if attachment == 0:
+        count: uint256 = self.badge_count[llama_id]
+        assert count < MAX_BADGES_PER_LLAMA, "Llama has too many badges"
+        self.badge_by_index[llama_id][count] = badge_id
+        self.badge_count[llama_id] = count + 1
+        attachment = shift(count + 1, POSITION_SHIFT)
+    assert (
+        attachment & AMOUNT_MASK
+    ) + amount <= AMOUNT_MASK, "Too many badges attached"
+    self.attachments[llama_id][badge_id] = attachment + amount
+
+
+@internal
+def _detach(llama_id: uint256, badge_id: uint256, amount: uint256):
+    """
+    @dev Remove a badge ID from the llama's enumeration when none is left, moving
+         the last badge ID into its place.
+    """
+
+    attachment: uint256 = self.attachments[llama_id][badge_id]
+    assert (
+        amount > 0 and amount <= attachment & AMOUNT_MASK
+    ), "Badge is not attached to this llama"
+    if attachment & AMOUNT_MASK != amount:
+        self.attachments[llama_id][badge_id] = attachment - amount
+        return
+
+    self.attachments[llama_id][badge_id] = 0
+    last: uint256 = self.badge_count[llama_id] - 1
+    position: uint256 = shift(attachment, -POSITION_SHIFT) - 1
+    if position != last:
+        last_badge_id: uint256 = self.badge_by_index[llama_id][last]
+        self.badge_by_index[llama_id][position] = last_badge_id
+        last_attachment: uint256 = self.attachments[llama_id][last_badge_id]
+        self.attachments[llama_id][last_badge_id] = (
+            last_attachment & AMOUNT_MASK
+        ) | shift(position + 1, POSITION_SHIFT)
+    # The freed index is left as it is, badge_count bounds the enumeration
+    self.badge_count[llama_id] = last
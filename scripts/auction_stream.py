@@ -0,0 +1,421 @@
+"""
+Streams the live LlamaAuctionHouse auction to the auction frontend, so that viewers no
+longer poll `auction()` and `pending_returns` every second.
+
+The auction and its bid parameters are read once. After that one follower applies the
+`AuctionCreated`, `AuctionBid`, `AuctionExtended` and `AuctionSettled` logs, and the logs
+of the parameter setters, with a single `eth_getLogs` poll however many viewers are
+connected. Each change is serialized once and written to every subscriber as a
+Server-Sent Event carrying the high bid, the minimum next bid and the seconds left. The
+auction is sent again every HEARTBEAT_INTERVAL so idle connections are kept open, and a
+subscriber that stops reading is dropped instead of buffered without bound.
+
+Pending returns are read on the first request for an address and cached until a bid or a
+withdrawal touches the address. `withdraw_stale` logs nothing per address, so entries also
+expire after PENDING_RETURNS_TTL. Wei amounts are sent as decimal strings, as they do not
+fit in a JavaScript number. Only the standard library serves the requests.
+
+    brownie run scripts/auction_stream.py main <auction_house> [port] --network mainnet
+    brownie run scripts/auction_stream.py loadtest [subscribers] [bids]    # on a local chain
+
+Endpoints:
+
+    GET  /auction                       the live auction
+    GET  /auction/stream                the live auction, then every change (text/event-stream)
+    GET  /pending_returns/<address>     {"address", "pending_returns"}
+    GET  /health                        subscribers, last block and upstream calls
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import Llama, LlamaAuctionHouse, accounts, chain, network, web3
+from eth_utils import event_abi_to_log_topic, is_address, to_checksum_address
+from web3._utils.events import get_event_data
+
+from scripts.http_service import NOT_FOUND, BlockingCalls, SingleFlight, serve_connection
+
+# Seconds between log polls
+POLL_INTERVAL = 1
+# Seconds between two sends of an unchanged auction
+HEARTBEAT_INTERVAL = 15
+# Seconds a cached pending return is served without a log touching its address
+PENDING_RETURNS_TTL = 60
+# Bytes queued for a subscriber before it is dropped
+MAX_BUFFER = 256 * 1024
+
+EVENTS = [
+    "AuctionCreated",
+    "AuctionBid",
+    "AuctionExtended",
+    "AuctionSettled",
+    "AuctionReservePriceUpdated",
+    "AuctionMinBidIncrementPercentageUpdated",
+    "AuctionTimeBufferUpdated",
+    "Withdraw",
+]
+PARAMETERS = {
+    "AuctionReservePriceUpdated": "reserve_price",
+    "AuctionMinBidIncrementPercentageUpdated": "min_bid_increment_percentage",
+    "AuctionTimeBufferUpdated": "time_buffer",
+}
+
+# Subscribers opened at once by the load test, under the listen backlog
+CONNECT_BATCH = 250
+# Auction house the load test deploys
+LOAD_TEST_TIME_BUFFER = 100
+LOAD_TEST_RESERVE_PRICE = 100
+LOAD_TEST_DURATION = 3600
+
+
+def min_next_bid(amount, reserve_price, min_bid_increment_percentage):
+    # The smallest bid create_bid accepts over a high bid of `amount`
+    return max(reserve_price, amount + amount * min_bid_increment_percentage // 100)
+
+
+class AuctionStream(BlockingCalls):
+    def __init__(
+        self,
+        auction_house,
+        clock=time.time,
+        poll_interval=POLL_INTERVAL,
+        executor=None,
+        heartbeat_interval=HEARTBEAT_INTERVAL,
+    ):
+        self.auction_house = auction_house
+        # Returns the current time, chain.time on a local chain
+        self.clock = clock
+        self.poll_interval = poll_interval
+        self.executor = executor
+        self.heartbeat_interval = heartbeat_interval
+        self.events = {
+            event_abi_to_log_topic(item): item
+            for item in auction_house.abi
+            if item["type"] == "event" and item["name"] in EVENTS
+        }
+        self.auction = None
+        self.parameters = None
+        self.last_block = None
+        self.subscribers = set()
+        self.pending_returns_cache = SingleFlight(PENDING_RETURNS_TTL)
+        self.metrics = {"polls": 0, "pending_returns_reads": 0, "broadcasts": 0, "dropped": 0}
+        self._follower = None
+
+    def load(self):
+        # The one read of the auction and its parameters, later changes come from the logs
+        self.last_block = web3.eth.block_number
+        auction = self.auction_house.auction()
+        self.auction = {
+            "llama_id": auction["llama_id"],
+            "amount": auction["amount"],
+            "bidder": auction["bidder"],
+            "start_time": auction["start_time"],
+            "end_time": auction["end_time"],
+            "settled": auction["settled"] or auction["start_time"] == 0,
+        }
+        self.parameters = {
+            name: getattr(self.auction_house, name)() for name in PARAMETERS.values()
+        }
+
+    def fetch(self):
+        # Returns the decoded logs of the blocks mined since the last fetch, in order
+        head = web3.eth.block_number
+        if head <= self.last_block:
+            return []
+        logs = web3.eth.get_logs(
+            {
+                "address": self.auction_house.address,
+                "topics": [["0x" + topic.hex() for topic in self.events]],
+                "fromBlock": self.last_block + 1,
+                "toBlock": head,
+            }
+        )
+        self.metrics["polls"] += 1
+        self.last_block = head
+        return [
+            get_event_data(web3.codec, self.events[bytes(log["topics"][0])], log)
+            for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        ]
+
+    def apply(self, event):
+        name, args = event["event"], event["args"]
+        auction = self.auction
+        if name in PARAMETERS:
+            self.parameters[PARAMETERS[name]] = args["_" + PARAMETERS[name]]
+        elif name == "Withdraw":
+            self.invalidate(args["_withdrawer"])
+        elif name == "AuctionCreated":
+            auction.update(
+                llama_id=args["_llama_id"],
+                amount=0,
+                bidder="0x" + "00" * 20,
+                start_time=args["_start_time"],
+                end_time=args["_end_time"],
+                settled=False,
+            )
+        elif args["_llama_id"] != auction["llama_id"]:
+            return
+        elif name == "AuctionBid":
+            # The outbid bidder is credited and the new one may have spent pending returns
+            self.invalidate(auction["bidder"])
+            self.invalidate(args["_sender"])
+            auction.update(amount=args["_value"], bidder=args["_sender"])
+        elif name == "AuctionExtended":
+            auction["end_time"] = args["_end_time"]
+        else:
+            auction["settled"] = True
+
+    def snapshot(self):
+        auction = self.auction
+        parameters = self.parameters
+        return {
+            "llama_id": auction["llama_id"],
+            "amount": str(auction["amount"]),
+            "bidder": auction["bidder"],
+            "start_time": auction["start_time"],
+            "end_time": auction["end_time"],
+            "settled": auction["settled"],
+            "min_next_bid": str(
+                min_next_bid(
+                    auction["amount"],
+                    parameters["reserve_price"],
+                    parameters["min_bid_increment_percentage"],
+                )
+            ),
+            "remaining": max(auction["end_time"] - int(self.clock()), 0),
+            "reserve_price": str(parameters["reserve_price"]),
+            "min_bid_increment_percentage": parameters["min_bid_increment_percentage"],
+            "time_buffer": parameters["time_buffer"],
+            "block": self.last_block,
+        }
+
+    def _frame(self):
+        data = json.dumps(self.snapshot(), separators=(",", ":"))
+        return f"event: auction\ndata: {data}\n\n".encode()
+
+    def broadcast(self):
+        # The auction is serialized once for every subscriber
+        frame = self._frame()
+        for writer in list(self.subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                self.subscribers.discard(writer)
+                writer.close()
+                self.metrics["dropped"] += 1
+                continue
+            writer.write(frame)
+        self.metrics["broadcasts"] += 1
+
+    async def _follow(self):
+        heartbeat = time.monotonic()
+        while True:
+            try:
+                events = await self._io(self.fetch)
+            except (OSError, ValueError) as e:
+                # The node is retried on the next poll, from the same block
+                print(f"Polling logs failed: {e!r}")
+                events = []
+            for event in events:
+                self.apply(event)
+            if events or time.monotonic() - heartbeat >= self.heartbeat_interval:
+                self.broadcast()
+                heartbeat = time.monotonic()
+            await asyncio.sleep(self.poll_interval)
+
+    def invalidate(self, address):
+        self.pending_returns_cache.invalidate(address)
+
+    async def _read_pending_returns(self, address):
+        self.metrics["pending_returns_reads"] += 1
+        return await self._io(self.auction_house.pending_returns, address)
+
+    async def pending_returns(self, address):
+        # Concurrent requests for an address share one read
+        return await self.pending_returns_cache.get(
+            address, lambda: self._read_pending_returns(address)
+        )
+
+    async def _respond(self, method, path, body):
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if method != "GET":
+            return NOT_FOUND
+        if parts == ["auction"]:
+            return 200, self.snapshot()
+        if parts == ["health"]:
+            return 200, {
+                "subscribers": len(self.subscribers),
+                "block": self.last_block,
+                **self.metrics,
+            }
+        if len(parts) == 2 and parts[0] == "pending_returns":
+            if not is_address(parts[1]):
+                return 400, {"error": "expected an address"}
+            address = to_checksum_address(parts[1])
+            try:
+                amount = await self.pending_returns(address)
+            except (OSError, ValueError) as e:
+                return 502, {"error": f"cannot read the pending returns: {e}"}
+            return 200, {"address": address, "pending_returns": str(amount)}
+        return NOT_FOUND
+
+    async def _subscribe(self, reader, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n" + self._frame()
+        )
+        self.subscribers.add(writer)
+        try:
+            # Nothing more is expected from the subscriber until it disconnects
+            while await reader.read(1024):
+                pass
+        finally:
+            self.subscribers.discard(writer)
+
+    async def handle(self, reader, writer):
+        await serve_connection(reader, writer, self._respond, {"/auction/stream": self._subscribe})
+
+    async def start(self, host="127.0.0.1", port=8080, backlog=1024):
+        await self._io(self.load)
+        self._follower = asyncio.create_task(self._follow())
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+    async def stop(self):
+        self._follower.cancel()
+        for writer in list(self.subscribers):
+            writer.close()
+        self.subscribers.clear()
+
+
+async def serve(auction_house, host="127.0.0.1", port=8080):
+    stream = AuctionStream(auction_house)
+    async with await stream.start(host, port):
+        print(f"Streaming llama {stream.auction['llama_id']} on http://{host}:{port}")
+        await asyncio.Event().wait()
+
+
+def main(auction_house, port=8080, host="127.0.0.1"):
+    try:
+        asyncio.run(serve(LlamaAuctionHouse.at(auction_house), host, int(port)))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _subscriber(host, port, received, connected):
+    # Records when each high bid first reached this subscriber
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /auction/stream HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    try:
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        connected.set_result(None)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b"data: "):
+                received.setdefault(json.loads(line[6:])["amount"], time.perf_counter())
+    finally:
+        writer.close()
+
+
+def _percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def _load_test(auction_house, subscribers, bids, bid_interval, poll_interval, executor):
+    stream = AuctionStream(auction_house, chain.time, poll_interval, executor)
+    server = await stream.start(port=0)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    loop = asyncio.get_running_loop()
+    received = [{} for _ in range(subscribers)]
+    tasks = []
+    connect_start = time.perf_counter()
+    for first in range(0, subscribers, CONNECT_BATCH):
+        connected = [
+            loop.create_future() for _ in range(first, min(first + CONNECT_BATCH, subscribers))
+        ]
+        for i, future in enumerate(connected, first):
+            tasks.append(asyncio.create_task(_subscriber(host, port, received[i], future)))
+        await asyncio.gather(*connected)
+    connect_time = time.perf_counter() - connect_start
+
+    # Each bid is the minimum the previous one allows, sent by two bidders in turn
+    llama_id = stream.auction["llama_id"]
+    parameters = stream.parameters
+    mined = {}
+    amount = 0
+    for i in range(bids):
+        amount = min_next_bid(
+            amount, parameters["reserve_price"], parameters["min_bid_increment_percentage"]
+        )
+        params = {"from": accounts[1 + i % 2], "value": amount}
+        await stream._io(auction_house.create_bid, llama_id, amount, params)
+        mined[str(amount)] = time.perf_counter()
+        await asyncio.sleep(bid_interval)
+
+    deadline = time.perf_counter() + 10 * poll_interval + 5
+    while time.perf_counter() < deadline and not all(str(amount) in r for r in received):
+        await asyncio.sleep(poll_interval)
+    polls = stream.metrics["polls"]
+    await stream.stop()
+    server.close()
+    await server.wait_closed()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = sorted(r[bid] - mined[bid] for r in received for bid in mined if bid in r)
+    result = {
+        "subscribers": subscribers,
+        "connect_s": connect_time,
+        "deliveries": len(latencies),
+        "missed": subscribers * bids - len(latencies),
+        "upstream_polls": polls,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    print(
+        f"{subscribers} subscribers connected in {connect_time:.2f}s, {bids} bids, "
+        f"{result['deliveries']} deliveries, {result['missed']} missed, "
+        f"{polls} upstream log polls. Latency from the mined bid: p50 {result['p50_ms']:.0f}ms, "
+        f"p99 {result['p99_ms']:.0f}ms, max {result['max_ms']:.0f}ms"
+    )
+    return result
+
+
+def loadtest(subscribers=2000, bids=20, bid_interval=0.5, poll_interval=0.2):
+    # The subscribers, the service and the chain share one process, so the latencies are an
+    # upper bound of what the service alone adds to the poll interval
+    if network.show_active() != "development":
+        raise SystemExit("The load test deploys its own auction house on a development network")
+    deployer = accounts[0]
+    token = Llama.deploy([], {"from": deployer})
+    auction_house = LlamaAuctionHouse.deploy(
+        token,
+        LOAD_TEST_TIME_BUFFER,
+        LOAD_TEST_RESERVE_PRICE,
+        5,
+        LOAD_TEST_DURATION,
+        deployer,
+        95,
+        {"from": deployer},
+    )
+    token.set_minter(auction_house, {"from": deployer})
+    auction_house.unpause({"from": deployer})
+    auction_house.disable_wl({"from": deployer})
+
+    # One thread runs every RPC call, see BlockingCalls
+    executor = ThreadPoolExecutor(1)
+    result = asyncio.run(
+        _load_test(
+            auction_house,
+            int(subscribers),
+            int(bids),
+            float(bid_interval),
+            float(poll_interval),
+            executor,
+        )
+    )
+    executor.shutdown()
+    return result
@@ -0,0 +1,200 @@
+"""
+Batched reads of holder profiles from Llama and LlamaAuctionHouse for the dashboards.
+
+A profile is the balance, token ids and token URIs of a holder, plus its `pending_returns`
+and `wl_auctions_won` on the auction house. Read one call at a time that is 2N + 3 round
+trips for a holder of N tokens. `BatchClient` sends many `eth_call`s as one JSON-RPC batch
+request instead, so a profile takes two round trips for up to MAX_BATCH tokens: one for the
+balance, token ids (`tokensForOwner`) and auction house state, one for the token URIs.
+
+Every call in a batch succeeds or fails on its own, a revert or undecodable result only
+marks that call's `Result` as failed.
+
+    brownie run scripts/batch_reads.py    # round trips and timings for 1, 100 and 1111 tokens
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import requests
+from brownie import Llama, LlamaAuctionHouse, accounts, web3
+from eth_abi import decode, encode
+from eth_utils import function_abi_to_4byte_selector
+from eth_utils.abi import collapse_if_tuple
+
+# eth_calls per JSON-RPC batch request, as providers cap the size of a batch
+MAX_BATCH = 1000
+
+# Tokens held by the profiled holder in the benchmark
+HOLDER_SIZES = [1, 100, 1111]
+
+
+class Call(NamedTuple):
+    address: str
+    abi: dict
+    args: tuple = ()
+
+
+class Result(NamedTuple):
+    success: bool
+    value: Any = None
+    error: Optional[str] = None
+
+
+@dataclass
+class HolderProfile:
+    owner: str
+    balance: int
+    token_ids: List[int]
+    token_uris: Dict[int, Optional[str]]
+    pending_returns: Optional[int]
+    wl_auctions_won: Optional[int]
+    # Name of every call that failed, to its error
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def function_call(contract, name, *args):
+    # Returns the Call of `contract.name(*args)`, `contract` being a brownie contract
+    abi = next(item for item in contract.abi if item.get("name") == name)
+    return Call(contract.address, abi, args)
+
+
+def _types(params):
+    return [collapse_if_tuple(param) for param in params]
+
+
+def encode_call(call):
+    selector = function_abi_to_4byte_selector(call.abi)
+    return "0x" + (selector + encode(_types(call.abi["inputs"]), call.args)).hex()
+
+
+def decode_result(call, data):
+    # Functions with a single output return it as is, others return a tuple
+    values = decode(_types(call.abi["outputs"]), bytes.fromhex(data[2:]))
+    return values[0] if len(values) == 1 else values
+
+
+def _error_message(error):
+    return error.get("message", str(error)) if isinstance(error, dict) else str(error)
+
+
+class BatchClient:
+    def __init__(self, endpoint_uri, max_batch=MAX_BATCH, block="latest"):
+        self.endpoint_uri = endpoint_uri
+        self.max_batch = max_batch
+        self.block = block
+        self.session = requests.Session()
+        self.round_trips = 0
+
+    def call(self, calls):
+        # Returns a Result for each of `calls`, in order
+        results = []
+        for start in range(0, len(calls), self.max_batch):
+            chunk = calls[start : start + self.max_batch]
+            payload = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [{"to": call.address, "data": encode_call(call)}, self.block],
+                }
+                for i, call in enumerate(chunk)
+            ]
+            response = self.session.post(self.endpoint_uri, json=payload)
+            response.raise_for_status()
+            self.round_trips += 1
+            replies = response.json()
+            if not isinstance(replies, list):
+                # The node rejected the whole batch, with one error instead of a reply per call
+                error = _error_message(
+                    replies.get("error", replies) if isinstance(replies, dict) else replies
+                )
+                results.extend(Result(False, error=error) for _ in chunk)
+                continue
+            replies = {reply.get("id"): reply for reply in replies}
+            results.extend(self._result(call, replies.get(i)) for i, call in enumerate(chunk))
+        return results
+
+    def _result(self, call, reply):
+        if reply is None:
+            return Result(False, error="No response")
+        if "error" in reply:
+            return Result(False, error=_error_message(reply["error"]))
+        try:
+            return Result(True, decode_result(call, reply["result"]))
+        except Exception as e:
+            return Result(False, error=f"Cannot decode {reply['result']!r}: {e}")
+
+
+def read_profile(client, token, auction_house, owner):
+    # Reads the profile of `owner` in two round trips
+    names = ["balanceOf", "tokensForOwner", "pending_returns", "wl_auctions_won"]
+    first = client.call(
+        [
+            function_call(token, "balanceOf", owner),
+            function_call(token, "tokensForOwner", owner),
+            function_call(auction_house, "pending_returns", owner),
+            function_call(auction_house, "wl_auctions_won", owner),
+        ]
+    )
+    errors = {name: result.error for name, result in zip(names, first) if not result.success}
+    balance, token_ids, pending_returns, wl_auctions_won = (result.value for result in first)
+    token_ids = list(token_ids or [])
+
+    uris = client.call([function_call(token, "tokenURI", token_id) for token_id in token_ids])
+    for token_id, result in zip(token_ids, uris):
+        if not result.success:
+            errors[f"tokenURI({token_id})"] = result.error
+    return HolderProfile(
+        owner=owner,
+        balance=balance,
+        token_ids=token_ids,
+        token_uris={token_id: result.value for token_id, result in zip(token_ids, uris)},
+        pending_returns=pending_returns,
+        wl_auctions_won=wl_auctions_won,
+        errors=errors,
+    )
+
+
+def read_profile_sequential(token, auction_house, owner):
+    # The unbatched reads the dashboards used to make, one round trip per call
+    balance = token.balanceOf(owner)
+    token_ids = [token.tokenOfOwnerByIndex(owner, i) for i in range(balance)]
+    return HolderProfile(
+        owner=owner,
+        balance=balance,
+        token_ids=token_ids,
+        token_uris={token_id: token.tokenURI(token_id) for token_id in token_ids},
+        pending_returns=auction_house.pending_returns(owner),
+        wl_auctions_won=auction_house.wl_auctions_won(owner),
+    )
+
+
+def main():
+    deployer = accounts[0]
+    rows = []
+    for size in HOLDER_SIZES:
+        holder = accounts.add()
+        token = Llama.deploy([holder] * size, {"from": deployer})
+        auction_house = LlamaAuctionHouse.deploy(
+            token, 100, 100, 5, 100, deployer, 95, {"from": deployer}
+        )
+
+        start = time.perf_counter()
+        expected = read_profile_sequential(token, auction_house, holder.address)
+        sequential = time.perf_counter() - start
+
+        client = BatchClient(web3.provider.endpoint_uri)
+        start = time.perf_counter()
+        profile = read_profile(client, token, auction_house, holder.address)
+        batched = time.perf_counter() - start
+        assert profile == expected, "Batched and sequential reads differ"
+        rows.append((size, 2 * size + 3, sequential, client.round_trips, batched))
+
+    print(f"\n{'tokens':>6}  {'sequential':>24}  {'batched':>24}  speedup")
+    for size, sequential_trips, sequential, batched_trips, batched in rows:
+        print(
+            f"{size:>6}  {sequential_trips:>6} round trips {sequential:>7.2f}s  "
+            f"{batched_trips:>6} round trips {batched:>7.2f}s  {sequential / batched:>6.1f}x"
+        )
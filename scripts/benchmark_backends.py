@@ -0,0 +1,114 @@
+"""
+Per-test latency of the test suite on ganache and on the in-process py-evm chain.
+
+Runs `brownie test` once per backend with a JUnit report and compares the time of every
+test, setup and teardown included, so module fixtures are charged to the first test of
+their module. Only tests that passed on both backends are compared.
+
+    python -m scripts.benchmark_backends                      # the whole suite
+    python -m scripts.benchmark_backends tests/nft --runs 3   # keep the fastest of 3 runs
+"""
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+BACKENDS = ["ganache", "pyevm"]
+
+
+def run_suite(paths, backend, report):
+    # Returns the wall clock time of the run, per-test times are written to `report`
+    start = time.perf_counter()
+    subprocess.run(
+        ["brownie", "test", *paths, "--evm", backend, f"--junitxml={report}", "-q"],
+        check=False,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def ganache_version():
+    # The ganache brownie launches, so the numbers say what they were measured against
+    try:
+        output = subprocess.run(["ganache-cli", "--version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return "not installed"
+    return output.stdout.strip().splitlines()[0] if output.stdout.strip() else "unknown"
+
+
+def passed_times(report):
+    # Returns the time of every passed test in the JUnit `report`, by test id
+    times = {}
+    for case in ET.parse(report).iter("testcase"):
+        if any(child.tag in ("failure", "error", "skipped") for child in case):
+            continue
+        times[f"{case.get('classname')}::{case.get('name')}"] = float(case.get("time"))
+    return times
+
+
+def summary(times):
+    ordered = sorted(times)
+    return {
+        "mean": statistics.mean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[max(0, round(0.95 * len(ordered)) - 1)],
+        "total": sum(ordered),
+    }
+
+
+def benchmark(paths, runs):
+    # Returns the fastest wall clock time and per-test times of each backend over `runs` runs
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in BACKENDS:
+            wall, times = None, {}
+            for i in range(runs):
+                report = Path(tmp) / f"{backend}-{i}.xml"
+                elapsed = run_suite(paths, backend, report)
+                wall = elapsed if wall is None else min(wall, elapsed)
+                for test, seconds in passed_times(report).items():
+                    times[test] = min(seconds, times.get(test, seconds))
+            results[backend] = (wall, times)
+    return results
+
+
+def main(paths, runs):
+    results = benchmark(paths, runs)
+    (ganache_wall, ganache), (pyevm_wall, pyevm) = (results[backend] for backend in BACKENDS)
+    tests = sorted(set(ganache) & set(pyevm))
+    if not tests:
+        raise SystemExit("No test passed on both backends")
+
+    rows = [("wall clock", ganache_wall, pyevm_wall)]
+    ganache_summary = summary([ganache[test] for test in tests])
+    pyevm_summary = summary([pyevm[test] for test in tests])
+    rows += [(name, ganache_summary[name], pyevm_summary[name]) for name in ganache_summary]
+
+    print(f"\n{len(tests)} tests passed on both backends, ganache is {ganache_version()}\n")
+    print(f"{'':>10}  {'ganache':>9}  {'pyevm':>9}  speedup")
+    for name, ganache_seconds, pyevm_seconds in rows:
+        print(
+            f"{name:>10}  {ganache_seconds:>8.3f}s  {pyevm_seconds:>8.3f}s  "
+            f"{ganache_seconds / pyevm_seconds:>6.1f}x"
+        )
+
+    slowest = sorted(tests, key=lambda test: pyevm[test] / ganache[test], reverse=True)[:5]
+    print("\nSmallest speedups")
+    for test in slowest:
+        print(f"  {ganache[test]:>7.3f}s  {pyevm[test]:>7.3f}s  {test}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("paths", nargs="*", default=["tests"])
+    parser.add_argument("--runs", default=1, type=int)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args.paths, args.runs)
@@ -0,0 +1,541 @@
+"""
+Gas benchmarks for the external entry points of Llama, LlamaAuctionHouse, Badge and
+ShadowBox.
+
+Every scenario starts from a clean local development chain and uses deterministic
+accounts, so the recorded gas only changes when the contracts change.
+
+    brownie run scripts/benchmark_gas.py              # compare against the stored baseline
+    brownie run scripts/benchmark_gas.py main 2.5     # ... failing on regressions above 2.5%
+    brownie run scripts/benchmark_gas.py update       # overwrite the stored baseline
+
+The comparison also fails when a baseline entry has no result, for example a renamed or
+dropped scenario, until the baseline is regenerated with `update`.
+"""
+
+import json
+from pathlib import Path
+
+from brownie import Badge, Llama, LlamaAuctionHouse, ShadowBox, accounts, chain, web3
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from scripts import merkle
+from scripts.deploy_llama import PREMINT_ADDRESSES
+
+BASELINE_PATH = Path(__file__).parent.parent / "benchmarks" / "gas_baseline.json"
+
+# Maximum allowed increase over the baseline, in percent
+DEFAULT_THRESHOLD = 1
+
+# Number of tokens already owned by the holder under test
+HOLDER_SIZES = [1, 50, 500]
+WITHDRAW_STALE_SIZES = [1, 10, 100]
+# Missed auctions skipped together with the settlement of the current one, up to MAX_MISSED_AUCTIONS
+MISSED_AUCTION_SIZES = [1, 8, 24]
+BADGE_BATCH_SIZES = [1, 32, 128]
+# Receivers of a one badge airdrop, up to MAX_AIRDROP_RECEIVERS
+AIRDROP_SIZES = [1, 32, 128]
+# Distinct badges on the llama after an attach, up to MAX_BADGES_PER_LLAMA
+ATTACHED_BADGE_SIZES = [1, 32, 128]
+# Tokens per allowlist mint, up to MAX_MINT_PER_TX
+ALLOWLIST_MINT_AMOUNTS = [1, 2, 3, 10]
+# Leaves in the allowlist Merkle trees, i.e. proofs of 10 and 17 nodes
+MERKLE_SIZES = [1000, 100000]
+
+PREMINT = 20
+TIME_BUFFER = 100
+RESERVE_PRICE = 100
+MIN_BID_INCREMENT_PERCENTAGE = 5
+DURATION = 3600
+SPLIT_PERCENTAGE = 95
+NO_DATA = "0x" + "00" * 32
+
+SCENARIOS = []
+
+
+def scenario(fn):
+    SCENARIOS.append(fn)
+    return fn
+
+
+def _account(label):
+    # Deterministic keys keep calldata (and so gas) identical between runs
+    return accounts.add(web3.keccak(text=f"llamas-gas-benchmark:{label}"))
+
+
+def _sign(signer, types, values):
+    message = encode_defunct(web3.keccak(encode(types, values)))
+    return Account.sign_message(message, signer.private_key).signature
+
+
+def _deploy_llama(deployer):
+    preminter = _account("preminter")
+    return Llama.deploy([preminter] * PREMINT, {"from": deployer})
+
+
+def _deploy_auction_house(deployer):
+    token = _deploy_llama(deployer)
+    auction_house = LlamaAuctionHouse.deploy(
+        token,
+        TIME_BUFFER,
+        RESERVE_PRICE,
+        MIN_BID_INCREMENT_PERCENTAGE,
+        DURATION,
+        _account("proceeds"),
+        SPLIT_PERCENTAGE,
+        {"from": deployer},
+    )
+    token.set_minter(auction_house, {"from": deployer})
+    return token, auction_house
+
+
+def _funded(label):
+    account = _account(label)
+    accounts[0].transfer(account, "1 ether", silent=True)
+    return account
+
+
+def _measure(results, name, fn):
+    # Record the gas of the transaction sent by `fn`, then undo it so that every
+    # measurement in a scenario starts from the same state
+    results[name] = fn().gas_used
+    chain.undo()
+
+
+@scenario
+def llama_holders(results):
+    deployer = _account("deployer")
+    recipient = _account("recipient")
+    operator = _account("operator")
+
+    token = _deploy_llama(deployer)
+    results["Llama.__init__"] = token.tx.gas_used
+
+    for size in HOLDER_SIZES:
+        chain.snapshot()
+        holder = _account("holder")
+        token.set_minter(holder, {"from": deployer})
+        for _ in range(size - 1):
+            token.mint({"from": holder})
+        results[f"Llama.mint[holder={size}]"] = token.mint({"from": holder}).gas_used
+
+        # The first token id forces the swap-and-pop path in `_remove_token_from`
+        token_id = token.tokenOfOwnerByIndex(holder, 0)
+        _measure(
+            results,
+            f"Llama.transferFrom[holder={size}]",
+            lambda: token.transferFrom(holder, recipient, token_id, {"from": holder}),
+        )
+        _measure(
+            results,
+            f"Llama.safeTransferFrom[holder={size}]",
+            lambda: token.safeTransferFrom(holder, recipient, token_id, {"from": holder}),
+        )
+        _measure(
+            results,
+            f"Llama.approve[holder={size}]",
+            lambda: token.approve(operator, token_id, {"from": holder}),
+        )
+        chain.revert()
+
+    results["Llama.setApprovalForAll"] = token.setApprovalForAll(
+        operator, True, {"from": deployer}
+    ).gas_used
+
+
+@scenario
+def llama_premint(results):
+    # The premint of scripts/deploy_llama.py, with every address swapped for a local account
+    deployer = _account("deployer")
+    recipient = _account("recipient")
+    preminters = [_account(f"preminter:{address.lower()}") for address in PREMINT_ADDRESSES]
+
+    token = Llama.deploy(preminters, {"from": deployer})
+    results["Llama.__init__[premint=deploy_llama]"] = token.tx.gas_used
+
+    # Runs of consecutive tokens with the same preminter, as [first, last]
+    runs = []
+    for token_id, preminter in enumerate(preminters):
+        if runs and preminters[runs[-1][0]] == preminter:
+            runs[-1][1] = token_id
+        else:
+            runs.append([token_id, token_id])
+
+    # A token in the middle of the longest run, still resolved through the premint runs
+    first, last = max(runs, key=lambda run: run[1] - run[0])
+    token_id = (first + last) // 2
+    owner = preminters[token_id]
+    _measure(
+        results,
+        "Llama.transferFrom[premint=lazy]",
+        lambda: token.transferFrom(owner, recipient, token_id, {"from": owner}),
+    )
+
+
+@scenario
+def llama_allowlist_mint(results):
+    deployer = _account("deployer")
+    recipient = _account("recipient")
+    minter = _funded("allowlist-minter")
+
+    token = _deploy_llama(deployer)
+    token.start_al_mint({"from": deployer})
+
+    approved = max(ALLOWLIST_MINT_AMOUNTS)
+    sig = _sign(
+        deployer, ["string", "address", "uint256"], ["allowlist:", minter.address, approved]
+    )
+    for amount in ALLOWLIST_MINT_AMOUNTS:
+        _measure(
+            results,
+            f"Llama.allowlistMint[amount={amount}]",
+            lambda: token.allowlistMint(
+                amount, approved, sig, {"from": minter, "value": web3.toWei(0.1, "ether") * amount}
+            ),
+        )
+
+    # The last token of the largest mint is the furthest from the mint's record
+    token.allowlistMint(
+        approved, approved, sig, {"from": minter, "value": web3.toWei(0.1, "ether") * approved}
+    )
+    token_id = token.totalSupply() - 1
+    _measure(
+        results,
+        "Llama.transferFrom[allowlist=lazy]",
+        lambda: token.transferFrom(minter, recipient, token_id, {"from": minter}),
+    )
+
+
+def _merkle_proof(size, domain, address, amount=None):
+    # Returns the root and proof for `address` among `size - 1` deterministic leaves
+    member = merkle.leaf(domain, address, amount)
+    filler = [merkle.keccak(i.to_bytes(32, "big")) for i in range(size - 1)]
+    levels = merkle.build_tree(filler + [member])
+    return merkle.root(levels), merkle.proofs(levels)[member]
+
+
+@scenario
+def merkle_allowlists(results):
+    deployer = _account("deployer")
+    minter = _funded("allowlist-minter")
+    alice = _funded("alice")
+
+    token, auction_house = _deploy_auction_house(deployer)
+    token.start_al_mint({"from": deployer})
+    auction_house.unpause({"from": deployer})
+    llama_id = auction_house.auction()["llama_id"]
+
+    for size in MERKLE_SIZES:
+        root, proof = _merkle_proof(size, "allowlist:", minter.address, 3)
+        token.set_al_merkle_root(root, {"from": deployer})
+        _measure(
+            results,
+            f"Llama.allowlistMintWithProof[leaves={size}]",
+            lambda: token.allowlistMintWithProof(
+                1, 3, proof, {"from": minter, "value": web3.toWei(0.1, "ether")}
+            ),
+        )
+
+        root, proof = _merkle_proof(size, "whitelist:", alice.address)
+        auction_house.set_wl_merkle_root(root, {"from": deployer})
+        _measure(
+            results,
+            f"LlamaAuctionHouse.create_wl_bid_with_proof[leaves={size}]",
+            lambda: auction_house.create_wl_bid_with_proof(
+                llama_id, RESERVE_PRICE, proof, {"from": alice, "value": RESERVE_PRICE}
+            ),
+        )
+
+        root, proof = _merkle_proof(size, "friend:", alice.address)
+        auction_house.set_friend_merkle_root(root, {"from": deployer})
+        _measure(
+            results,
+            f"LlamaAuctionHouse.create_friend_bid_with_proof[leaves={size}]",
+            lambda: auction_house.create_friend_bid_with_proof(
+                llama_id, RESERVE_PRICE, proof, {"from": alice, "value": RESERVE_PRICE}
+            ),
+        )
+
+
+@scenario
+def auction_bids(results):
+    deployer = _account("deployer")
+    alice = _funded("alice")
+    bob = _funded("bob")
+
+    token, auction_house = _deploy_auction_house(deployer)
+    results["LlamaAuctionHouse.unpause"] = auction_house.unpause({"from": deployer}).gas_used
+    llama_id = auction_house.auction()["llama_id"]
+
+    wl_sig = _sign(deployer, ["string", "address"], ["whitelist:", alice.address])
+    friend_sig = _sign(deployer, ["string", "address"], ["friend:", alice.address])
+    _measure(
+        results,
+        "LlamaAuctionHouse.create_wl_bid",
+        lambda: auction_house.create_wl_bid(
+            llama_id, RESERVE_PRICE, wl_sig, {"from": alice, "value": RESERVE_PRICE}
+        ),
+    )
+    _measure(
+        results,
+        "LlamaAuctionHouse.create_friend_bid",
+        lambda: auction_house.create_friend_bid(
+            llama_id, RESERVE_PRICE, friend_sig, {"from": alice, "value": RESERVE_PRICE}
+        ),
+    )
+
+    auction_house.disable_wl({"from": deployer})
+    results["LlamaAuctionHouse.create_bid[first]"] = auction_house.create_bid(
+        llama_id, RESERVE_PRICE, {"from": alice, "value": RESERVE_PRICE}
+    ).gas_used
+    results["LlamaAuctionHouse.create_bid[outbid]"] = auction_house.create_bid(
+        llama_id, RESERVE_PRICE * 2, {"from": bob, "value": RESERVE_PRICE * 2}
+    ).gas_used
+    results["LlamaAuctionHouse.withdraw"] = auction_house.withdraw({"from": alice}).gas_used
+
+
+@scenario
+def auction_settlement(results):
+    deployer = _account("deployer")
+    alice = _funded("alice")
+
+    token, auction_house = _deploy_auction_house(deployer)
+    auction_house.unpause({"from": deployer})
+    auction_house.disable_wl({"from": deployer})
+    llama_id = auction_house.auction()["llama_id"]
+
+    chain.snapshot()
+    chain.sleep(DURATION + 1)
+    results[
+        "LlamaAuctionHouse.settle_current_and_create_new_auction[no_bid]"
+    ] = auction_house.settle_current_and_create_new_auction({"from": deployer}).gas_used
+    chain.revert()
+
+    auction_house.create_bid(llama_id, RESERVE_PRICE, {"from": alice, "value": RESERVE_PRICE})
+    chain.sleep(DURATION + 1)
+    _measure(
+        results,
+        "LlamaAuctionHouse.settle_current_and_create_new_auction[bid]",
+        lambda: auction_house.settle_current_and_create_new_auction({"from": deployer}),
+    )
+
+    auction_house.pause({"from": deployer})
+    results["LlamaAuctionHouse.settle_auction[bid]"] = auction_house.settle_auction(
+        {"from": deployer}
+    ).gas_used
+
+    # Settling again while the first proceeds are still unclaimed
+    auction_house.unpause({"from": deployer})
+    llama_id = auction_house.auction()["llama_id"]
+    auction_house.create_bid(llama_id, RESERVE_PRICE, {"from": alice, "value": RESERVE_PRICE})
+    chain.sleep(DURATION + 1)
+    results[
+        "LlamaAuctionHouse.settle_current_and_create_new_auction[bid,unclaimed]"
+    ] = auction_house.settle_current_and_create_new_auction({"from": deployer}).gas_used
+
+    recipients = [deployer, auction_house.proceeds_receiver()]
+    results["LlamaAuctionHouse.claim_proceeds[addresses=2]"] = auction_house.claim_proceeds(
+        recipients, {"from": deployer}
+    ).gas_used
+
+
+@scenario
+def auction_catch_up(results):
+    deployer = _account("deployer")
+
+    token, auction_house = _deploy_auction_house(deployer)
+    auction_house.unpause({"from": deployer})
+    auction_house.disable_wl({"from": deployer})
+
+    # Compare the gas per auction with settle_current_and_create_new_auction[no_bid]
+    for size in MISSED_AUCTION_SIZES:
+        chain.snapshot()
+        chain.sleep((size + 1) * DURATION + 1)
+        gas = auction_house.settle_missed_and_create_new_auction(size, {"from": deployer}).gas_used
+        name = "LlamaAuctionHouse.settle_missed_and_create_new_auction"
+        results[f"{name}[missed={size}]"] = gas
+        results[f"{name}[missed={size},per_auction]"] = gas // (size + 1)
+        chain.revert()
+
+
+@scenario
+def auction_withdraw_stale(results):
+    deployer = _account("deployer")
+
+    token, auction_house = _deploy_auction_house(deployer)
+    auction_house.unpause({"from": deployer})
+    auction_house.disable_wl({"from": deployer})
+    llama_id = auction_house.auction()["llama_id"]
+
+    # Every bidder but the last one is left with pending returns
+    bidders = [_funded(f"bidder-{i}") for i in range(max(WITHDRAW_STALE_SIZES) + 1)]
+    amount = RESERVE_PRICE
+    for bidder in bidders:
+        auction_house.create_bid(llama_id, amount, {"from": bidder, "value": amount})
+        amount = amount * (100 + MIN_BID_INCREMENT_PERCENTAGE) // 100 + 1
+
+    for size in WITHDRAW_STALE_SIZES:
+        _measure(
+            results,
+            f"LlamaAuctionHouse.withdraw_stale[addresses={size}]",
+            lambda: auction_house.withdraw_stale(bidders[:size], {"from": deployer}),
+        )
+
+
+@scenario
+def badge_batches(results):
+    deployer = _account("deployer")
+    holder = _account("badge-holder")
+    recipient = _account("badge-recipient")
+
+    badge = Badge.deploy("The Llamas Badges", "BADGE", "", "", {"from": deployer})
+    results["Badge.mint"] = badge.mint(holder, 0, 1, NO_DATA, {"from": deployer}).gas_used
+
+    for size in BADGE_BATCH_SIZES:
+        ids = list(range(size))
+        amounts = [1] * size
+        chain.snapshot()
+        results[f"Badge.mintBatch[ids={size}]"] = badge.mintBatch(
+            holder, ids, amounts, NO_DATA, {"from": deployer}
+        ).gas_used
+        _measure(
+            results,
+            f"Badge.safeBatchTransferFrom[ids={size}]",
+            lambda: badge.safeBatchTransferFrom(
+                holder, recipient, ids, amounts, NO_DATA, {"from": holder}
+            ),
+        )
+        _measure(
+            results,
+            f"Badge.burnBatch[ids={size}]",
+            lambda: badge.burnBatch(ids, amounts, {"from": holder}),
+        )
+        chain.revert()
+
+    # Compare the gas per receiver with Badge.mint, one transaction per receiver
+    receivers = [_account(f"badge-receiver-{i}").address for i in range(max(AIRDROP_SIZES))]
+    for size in AIRDROP_SIZES:
+        name = f"Badge.airdrop[receivers={size}]"
+        _measure(
+            results,
+            name,
+            lambda: badge.airdrop(receivers[:size], [0], [1], NO_DATA, {"from": deployer}),
+        )
+        results[f"Badge.airdrop[receivers={size},per_receiver]"] = results[name] // size
+
+    results["Badge.safeTransferFrom"] = badge.safeTransferFrom(
+        holder, recipient, 0, 1, NO_DATA, {"from": holder}
+    ).gas_used
+    results["Badge.burn"] = badge.burn(0, 1, {"from": recipient}).gas_used
+
+
+@scenario
+def shadow_box_attachments(results):
+    deployer = _account("deployer")
+    preminter = _account("preminter")
+
+    token = _deploy_llama(deployer)
+    badge = Badge.deploy("The Llamas Badges", "BADGE", "", "", {"from": deployer})
+    box = ShadowBox.deploy(token, badge, {"from": deployer})
+    ids = list(range(max(ATTACHED_BADGE_SIZES)))
+    badge.mintBatch(preminter, ids, [1] * len(ids), NO_DATA, {"from": deployer})
+    badge.setApprovalForAll(preminter, box, True, {"from": preminter})
+
+    # Attaching or detaching one badge costs the same however many the llama carries
+    for size in ATTACHED_BADGE_SIZES:
+        chain.snapshot()
+        if size > 1:
+            box.attach_batch(0, ids[: size - 1], [1] * (size - 1), {"from": preminter})
+        results[f"ShadowBox.attach[badges={size}]"] = box.attach(
+            0, ids[size - 1], 1, {"from": preminter}
+        ).gas_used
+        # The first badge forces the move of the last one into its place
+        _measure(
+            results,
+            f"ShadowBox.detach[badges={size}]",
+            lambda: box.detach(0, ids[0], 1, {"from": preminter}),
+        )
+        chain.revert()
+
+    for size in BADGE_BATCH_SIZES:
+        chain.snapshot()
+        results[f"ShadowBox.attach_batch[ids={size}]"] = box.attach_batch(
+            0, ids[:size], [1] * size, {"from": preminter}
+        ).gas_used
+        _measure(
+            results,
+            f"ShadowBox.detach_batch[ids={size}]",
+            lambda: box.detach_batch(0, ids[:size], [1] * size, {"from": preminter}),
+        )
+        chain.revert()
+
+
+def run_benchmarks():
+    results = {}
+    for fn in SCENARIOS:
+        # Start every scenario from genesis so account nonces, and with them the
+        # deployed contract addresses, do not depend on the other scenarios
+        chain.reset()
+        fn(results)
+    return dict(sorted(results.items()))
+
+
+def compare(baseline, results, threshold):
+    # Returns (name, baseline gas, current gas, change in percent) for every entry
+    # whose gas grew by more than `threshold` percent. New entries never fail.
+    regressions = []
+    for name, gas in results.items():
+        if name not in baseline:
+            continue
+        change = (gas - baseline[name]) * 100 / baseline[name]
+        if change > threshold:
+            regressions.append((name, baseline[name], gas, change))
+    return regressions
+
+
+def missing(baseline, results):
+    # Baseline entries no scenario produced, renamed or dropped ones: run `update` if intended
+    return sorted(name for name in baseline if name not in results)
+
+
+def _report(baseline, results):
+    width = max(len(name) for name in {**baseline, **results})
+    print(f"{'function':<{width}}  {'gas':>10}  {'baseline':>10}  {'change':>8}")
+    for name, gas in results.items():
+        if name in baseline:
+            change = (gas - baseline[name]) * 100 / baseline[name]
+            print(f"{name:<{width}}  {gas:>10}  {baseline[name]:>10}  {change:+7.2f}%")
+        else:
+            print(f"{name:<{width}}  {gas:>10}  {'new':>10}")
+    for name in missing(baseline, results):
+        print(f"{name:<{width}}  {'missing':>10}  {baseline[name]:>10}")
+
+
+def update():
+    results = run_benchmarks()
+    BASELINE_PATH.parent.mkdir(exist_ok=True)
+    BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {len(results)} entries to {BASELINE_PATH}")
+
+
+def main(threshold=DEFAULT_THRESHOLD):
+    threshold = float(threshold)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    results = run_benchmarks()
+    _report(baseline, results)
+
+    errors = []
+    regressions = compare(baseline, results, threshold)
+    if regressions:
+        lines = [f"{n}: {old} -> {new} ({change:+.2f}%)" for n, old, new, change in regressions]
+        errors.append(f"Gas regressions above {threshold}%:\n" + "\n".join(lines))
+    absent = missing(baseline, results)
+    if absent:
+        errors.append(
+            "Baseline entries without a result, run `update` if they were removed:\n"
+            + "\n".join(absent)
+        )
+    if errors:
+        raise AssertionError("\n".join(errors))
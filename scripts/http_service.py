@@ -0,0 +1,125 @@
+"""
+The asyncio plumbing shared by the services in `scripts/`: the signature server, the auction
+stream, the metadata service and the keeper. Only the standard library is used.
+
+`serve_connection` answers the HTTP/1.1 requests of one connection with JSON, keeping it
+alive unless the client asks otherwise. `BlockingCalls` runs blocking calls, RPC calls
+mostly, off the event loop, and `SingleFlight` caches values read on demand, with one read
+shared by the concurrent requests for a key.
+"""
+
+import asyncio
+import functools
+import json
+import time
+
+NOT_FOUND = (404, {"error": "not found"})
+
+
+async def read_request(reader):
+    # Returns (method, path, headers, body), or None once the client closed the connection
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def json_response(status, payload, keep_alive=True):
+    # `payload` is serialized unless it already is
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload, separators=(",", ":")).encode()
+    return (
+        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+    )
+
+
+async def serve_connection(reader, writer, respond, streams=None):
+    # Answers each request with `await respond(method, path, body)`, a (status, payload)
+    # pair. A GET of one of the paths of `streams` hands the connection over to
+    # `await streams[path](reader, writer)` for good.
+    streams = streams or {}
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+            method, path, headers, body = request
+            route = path.split("?", 1)[0].rstrip("/")
+            if method == "GET" and route in streams:
+                await streams[route](reader, writer)
+                break
+            status, payload = await respond(method, path, body)
+            keep_alive = headers.get("connection", "").lower() != "close"
+            writer.write(json_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+class BlockingCalls:
+    # `executor` runs the blocking calls, the default executor unless they go to the
+    # in-process py-evm chain, which is not thread safe and needs a single thread
+    executor = None
+
+    async def _io(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+
+class SingleFlight:
+    def __init__(self, ttl=None):
+        # Seconds a value is served before it is read again, forever when None
+        self.ttl = ttl
+        # {key: (value, monotonic time of the read)}, and the reads in flight
+        self.values = {}
+        self._reads = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def put(self, key, value):
+        self.values[key] = (value, time.monotonic())
+
+    def invalidate(self, key):
+        # A read in flight is left to its waiters but no longer cached
+        self.values.pop(key, None)
+        self._reads.pop(key, None)
+
+    def clear(self):
+        self.values.clear()
+        self._reads.clear()
+
+    def _store(self, key, read):
+        if self._reads.get(key) is not read:
+            return
+        del self._reads[key]
+        if not read.cancelled() and read.exception() is None:
+            self.put(key, read.result())
+
+    async def get(self, key, read):
+        # Returns the value of `key`, awaiting `read()` when it is not cached
+        cached = self.values.get(key)
+        if cached and (self.ttl is None or time.monotonic() - cached[1] < self.ttl):
+            return cached[0]
+        future = self._reads.get(key)
+        if future is None:
+            future = asyncio.ensure_future(read())
+            self._reads[key] = future
+            future.add_done_callback(functools.partial(self._store, key))
+        return await asyncio.shield(future)
@@ -0,0 +1,577 @@
+"""
+Indexes the logs of Llama and LlamaAuctionHouse into a local SQLite database, so that
+dashboards can read ownership and auctions without calling the contracts for every page.
+The `Badge` transfers and the `ShadowBox` attachments are indexed the same way into a
+database of their own, with the badges on each llama and the llamas carrying each badge.
+
+    brownie run scripts/indexer.py main <llama> <auction_house> --network mainnet
+    brownie run scripts/indexer.py main <llama> <auction_house> <start_block> follow ...
+    brownie run scripts/indexer.py attachments <badge> <shadow_box> <start_block> ...
+    brownie run scripts/indexer.py benchmark [llamas] [badge_types] [badges_per_llama]
+
+Logs are fetched for both contracts at once in ranges of BATCH_SIZE blocks and only up to
+`confirmations` blocks behind the head. Each range is written in a single transaction
+together with its checkpoint, the number and hash of the last indexed block. Before a
+range is fetched the checkpoint hash is compared with the chain. On a mismatch the stored
+hashes of earlier blocks are walked back to the last one still on the chain, the logs
+after it are dropped and the derived tables are rebuilt from the remaining logs.
+
+The databases are written to `indexer/llamas.db` and `indexer/attachments.db`.
+"""
+
+import json
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from brownie import Badge, Llama, LlamaAuctionHouse, ShadowBox, web3
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from web3._utils.events import get_event_data
+from web3.exceptions import BlockNotFound
+
+DB_PATH = Path(__file__).parent.parent / "indexer" / "llamas.db"
+ATTACHMENTS_DB_PATH = DB_PATH.with_name("attachments.db")
+
+# Blocks per eth_getLogs request
+BATCH_SIZE = 2000
+# Blocks left unindexed behind the head, as they are the most likely to be reorganized
+CONFIRMATIONS = 5
+# Seconds between syncs when following the chain
+POLL_INTERVAL = 12
+
+EVENTS = {
+    "Transfer",
+    "ConsecutiveTransfer",
+    "Approval",
+    "ApprovalForAll",
+    "AuctionCreated",
+    "AuctionBid",
+    "AuctionExtended",
+    "AuctionSettled",
+    "Withdraw",
+    "TransferSingle",
+    "TransferBatch",
+    "BadgesAttached",
+    "BadgesDetached",
+}
+# Badge also logs an ERC1155 ApprovalForAll, which is not the one of Llama
+BADGE_EVENTS = {"TransferSingle", "TransferBatch"}
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    address TEXT PRIMARY KEY,
+    start_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS logs (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    token_id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    approved TEXT
+);
+CREATE INDEX IF NOT EXISTS tokens_owner ON tokens (owner);
+CREATE TABLE IF NOT EXISTS operators (
+    owner TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    PRIMARY KEY (owner, operator)
+);
+CREATE TABLE IF NOT EXISTS auctions (
+    llama_id INTEGER PRIMARY KEY,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL,
+    amount TEXT NOT NULL,
+    bidder TEXT,
+    settled INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bids (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    llama_id INTEGER NOT NULL,
+    bidder TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    extended INTEGER NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS bids_llama_id ON bids (llama_id);
+CREATE INDEX IF NOT EXISTS bids_bidder ON bids (bidder);
+CREATE TABLE IF NOT EXISTS withdrawals (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    withdrawer TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS withdrawals_withdrawer ON withdrawals (withdrawer);
+CREATE TABLE IF NOT EXISTS badge_balances (
+    owner TEXT NOT NULL,
+    badge_id INTEGER NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (owner, badge_id)
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    llama_id INTEGER NOT NULL,
+    badge_id INTEGER NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (llama_id, badge_id)
+);
+CREATE INDEX IF NOT EXISTS attachments_badge_id ON attachments (badge_id, llama_id);
+"""
+
+DERIVED_TABLES = [
+    "tokens",
+    "operators",
+    "auctions",
+    "bids",
+    "withdrawals",
+    "badge_balances",
+    "attachments",
+]
+
+
+# Each handler applies one decoded log to the derived tables. Wei amounts are stored as
+# text, as they do not fit in an SQLite integer.
+
+
+def _transfer(conn, block_number, log_index, args):
+    # Transfers reset the approval of the token
+    conn.execute(
+        "INSERT OR REPLACE INTO tokens VALUES (?, ?, NULL)", (args["_tokenId"], args["_to"])
+    )
+
+
+def _consecutive_transfer(conn, block_number, log_index, args):
+    conn.executemany(
+        "INSERT OR REPLACE INTO tokens VALUES (?, ?, NULL)",
+        (
+            (token_id, args["_toAddress"])
+            for token_id in range(args["_fromTokenId"], args["_toTokenId"] + 1)
+        ),
+    )
+
+
+def _approval(conn, block_number, log_index, args):
+    conn.execute(
+        "UPDATE tokens SET approved = ? WHERE token_id = ?", (args["_approved"], args["_tokenId"])
+    )
+
+
+def _approval_for_all(conn, block_number, log_index, args):
+    if args["_approved"]:
+        conn.execute(
+            "INSERT OR IGNORE INTO operators VALUES (?, ?)", (args["_owner"], args["_operator"])
+        )
+    else:
+        conn.execute(
+            "DELETE FROM operators WHERE owner = ? AND operator = ?",
+            (args["_owner"], args["_operator"]),
+        )
+
+
+def _auction_created(conn, block_number, log_index, args):
+    conn.execute(
+        "INSERT OR REPLACE INTO auctions VALUES (?, ?, ?, '0', NULL, 0)",
+        (args["_llama_id"], args["_start_time"], args["_end_time"]),
+    )
+
+
+def _auction_bid(conn, block_number, log_index, args):
+    conn.execute(
+        "INSERT OR REPLACE INTO bids VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            block_number,
+            log_index,
+            args["_llama_id"],
+            args["_sender"],
+            str(args["_value"]),
+            int(args["_extended"]),
+        ),
+    )
+    conn.execute(
+        "UPDATE auctions SET amount = ?, bidder = ? WHERE llama_id = ?",
+        (str(args["_value"]), args["_sender"], args["_llama_id"]),
+    )
+
+
+def _auction_extended(conn, block_number, log_index, args):
+    conn.execute(
+        "UPDATE auctions SET end_time = ? WHERE llama_id = ?",
+        (args["_end_time"], args["_llama_id"]),
+    )
+
+
+def _auction_settled(conn, block_number, log_index, args):
+    conn.execute("UPDATE auctions SET settled = 1 WHERE llama_id = ?", (args["_llama_id"],))
+
+
+def _withdraw(conn, block_number, log_index, args):
+    conn.execute(
+        "INSERT OR REPLACE INTO withdrawals VALUES (?, ?, ?, ?)",
+        (block_number, log_index, args["_withdrawer"], str(args["_amount"])),
+    )
+
+
+def _add(conn, table, key_columns, key, delta):
+    # Adds `delta` to an amount stored as text, dropping the row when it reaches zero
+    where = " AND ".join(f"{column} = ?" for column in key_columns)
+    row = conn.execute(f"SELECT amount FROM {table} WHERE {where}", key).fetchone()
+    amount = (int(row[0]) if row else 0) + delta
+    if amount:
+        conn.execute(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", (*key, str(amount)))
+    elif row:
+        conn.execute(f"DELETE FROM {table} WHERE {where}", key)
+
+
+def _move_badges(conn, sender, receiver, ids, amounts):
+    for badge_id, amount in zip(ids, amounts):
+        if sender != ZERO_ADDRESS:
+            _add(conn, "badge_balances", ("owner", "badge_id"), (sender, badge_id), -amount)
+        if receiver != ZERO_ADDRESS:
+            _add(conn, "badge_balances", ("owner", "badge_id"), (receiver, badge_id), amount)
+
+
+def _transfer_single(conn, block_number, log_index, args):
+    _move_badges(conn, args["fromAddress"], args["to"], [args["id"]], [args["value"]])
+
+
+def _transfer_batch(conn, block_number, log_index, args):
+    _move_badges(conn, args["fromAddress"], args["to"], args["ids"], args["values"])
+
+
+def _badges_attached(conn, block_number, log_index, args):
+    for badge_id, amount in zip(args["_badge_ids"], args["_amounts"]):
+        _add(conn, "attachments", ("llama_id", "badge_id"), (args["_llama_id"], badge_id), amount)
+
+
+def _badges_detached(conn, block_number, log_index, args):
+    for badge_id, amount in zip(args["_badge_ids"], args["_amounts"]):
+        _add(conn, "attachments", ("llama_id", "badge_id"), (args["_llama_id"], badge_id), -amount)
+
+
+HANDLERS = {
+    "Transfer": _transfer,
+    "ConsecutiveTransfer": _consecutive_transfer,
+    "Approval": _approval,
+    "ApprovalForAll": _approval_for_all,
+    "AuctionCreated": _auction_created,
+    "AuctionBid": _auction_bid,
+    "AuctionExtended": _auction_extended,
+    "AuctionSettled": _auction_settled,
+    "Withdraw": _withdraw,
+    "TransferSingle": _transfer_single,
+    "TransferBatch": _transfer_batch,
+    "BadgesAttached": _badges_attached,
+    "BadgesDetached": _badges_detached,
+}
+
+
+class Indexer:
+    def __init__(self, web3, contracts, db_path=DB_PATH, start_block=0, batch_size=BATCH_SIZE):
+        # `contracts` is a list of (address, abi), usually Llama and LlamaAuctionHouse, or of
+        # (address, abi, events) to index only some of the EVENTS of a contract
+        self.web3 = web3
+        self.addresses = [to_checksum_address(address) for address, *_ in contracts]
+        self.start_block = start_block
+        self.batch_size = batch_size
+        # Event ABIs by (contract, topic), as both contracts could share an event name
+        self.events = {}
+        for address, abi, *events in contracts:
+            names = EVENTS.intersection(*events)
+            for item in abi:
+                if item["type"] == "event" and item["name"] in names:
+                    key = (to_checksum_address(address), event_abi_to_log_topic(item))
+                    self.events[key] = item
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        # The contracts the logs come from, for readers of the database to check
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO contracts VALUES (?, ?)",
+                [(address, start_block) for address in self.addresses],
+            )
+
+    def close(self):
+        self.conn.close()
+
+    def checkpoint(self):
+        # Returns (block number, block hash) of the last indexed block, or None
+        return self.conn.execute(
+            "SELECT block_number, block_hash FROM checkpoint WHERE id = 0"
+        ).fetchone()
+
+    def _chain_hash(self, number):
+        # None once a reorganization left the chain shorter than `number`
+        try:
+            return self.web3.eth.get_block(number)["hash"].hex()
+        except BlockNotFound:
+            return None
+
+    def _common_ancestor(self):
+        # Returns the last indexed block that is still on the chain
+        rows = self.conn.execute("SELECT number, hash FROM blocks ORDER BY number DESC")
+        for number, block_hash in rows.fetchall():
+            if self._chain_hash(number) == block_hash:
+                return number
+        return self.start_block - 1
+
+    def _rewind(self, block_number):
+        # Drops the logs after `block_number` and replays the rest into the derived tables
+        with self.conn:
+            self.conn.execute("DELETE FROM logs WHERE block_number > ?", (block_number,))
+            self.conn.execute("DELETE FROM blocks WHERE number > ?", (block_number,))
+            for table in DERIVED_TABLES:
+                self.conn.execute(f"DELETE FROM {table}")
+            logs = self.conn.execute(
+                "SELECT block_number, log_index, event, args FROM logs "
+                "ORDER BY block_number, log_index"
+            ).fetchall()
+            for number, log_index, event, args in logs:
+                HANDLERS[event](self.conn, number, log_index, json.loads(args))
+            if block_number < self.start_block:
+                self.conn.execute("DELETE FROM checkpoint")
+            else:
+                self.conn.execute(
+                    "UPDATE checkpoint SET block_number = ?, block_hash = ?",
+                    (block_number, self._chain_hash(block_number)),
+                )
+
+    def _check_reorg(self):
+        # Returns the block to resume after, rewinding first if the chain was reorganized
+        checkpoint = self.checkpoint()
+        if checkpoint is None:
+            return self.start_block - 1
+        block_number, block_hash = checkpoint
+        if self._chain_hash(block_number) == block_hash:
+            return block_number
+        ancestor = self._common_ancestor()
+        self._rewind(ancestor)
+        return ancestor
+
+    def _decode(self, log):
+        event_abi = self.events.get((to_checksum_address(log["address"]), bytes(log["topics"][0])))
+        if event_abi is None:
+            return None
+        return get_event_data(self.web3.codec, event_abi, log)
+
+    def apply(self, number, log_index, transaction_hash, block_hash, address, event, args):
+        # Stores one decoded log and applies it to the derived tables, in the caller's
+        # transaction
+        self.conn.execute(
+            "INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?, ?)",
+            (number, log_index, transaction_hash, address, event, json.dumps(args)),
+        )
+        self.conn.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?)", (number, block_hash))
+        HANDLERS[event](self.conn, number, log_index, args)
+
+    def _index_range(self, first, last):
+        # Returns None if the range was reorganized while its logs were fetched, or if the
+        # chain is now shorter than `last`, for sync to check for a reorganization again
+        last_hash = self._chain_hash(last)
+        if last_hash is None:
+            return None
+        logs = self.web3.eth.get_logs(
+            {"address": self.addresses, "fromBlock": first, "toBlock": last}
+        )
+        if self._chain_hash(last) != last_hash:
+            return None
+        logs = sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        count = 0
+        with self.conn:
+            for log in logs:
+                event = self._decode(log)
+                if event is None:
+                    continue
+                self.apply(
+                    log["blockNumber"],
+                    log["logIndex"],
+                    log["transactionHash"].hex(),
+                    log["blockHash"].hex(),
+                    event["address"],
+                    event["event"],
+                    dict(event["args"]),
+                )
+                count += 1
+            self.conn.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?)", (last, last_hash))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (0, ?, ?)", (last, last_hash)
+            )
+        return count
+
+    def sync(self, confirmations=CONFIRMATIONS):
+        # Indexes every block up to `confirmations` behind the head, returns the logs indexed
+        count = 0
+        while True:
+            first = self._check_reorg() + 1
+            head = self.web3.eth.block_number - confirmations
+            while first <= head:
+                last = min(first + self.batch_size - 1, head)
+                indexed = self._index_range(first, last)
+                if indexed is None:
+                    break
+                count += indexed
+                first = last + 1
+            else:
+                return count
+
+    # Queries for the dashboards
+
+    def owner_of(self, token_id):
+        row = self.conn.execute(
+            "SELECT owner FROM tokens WHERE token_id = ?", (token_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def tokens_for_owner(self, owner):
+        rows = self.conn.execute(
+            "SELECT token_id FROM tokens WHERE owner = ? ORDER BY token_id",
+            (to_checksum_address(owner),),
+        )
+        return [token_id for token_id, in rows]
+
+    def auction(self, llama_id=None):
+        # Returns the latest auction, or the auction of `llama_id`, as a dict
+        query = "SELECT llama_id, start_time, end_time, amount, bidder, settled FROM auctions"
+        if llama_id is None:
+            row = self.conn.execute(query + " ORDER BY llama_id DESC LIMIT 1").fetchone()
+        else:
+            row = self.conn.execute(query + " WHERE llama_id = ?", (llama_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ["llama_id", "start_time", "end_time", "amount", "bidder", "settled"]
+        auction = dict(zip(keys, row))
+        auction["amount"] = int(auction["amount"])
+        auction["settled"] = bool(auction["settled"])
+        return auction
+
+    def bids_by(self, bidder):
+        rows = self.conn.execute(
+            "SELECT llama_id, amount FROM bids WHERE bidder = ? ORDER BY block_number, log_index",
+            (to_checksum_address(bidder),),
+        )
+        return [(llama_id, int(amount)) for llama_id, amount in rows]
+
+    def badges_of(self, llama_id):
+        # Returns [(badge_id, amount)] attached to `llama_id`
+        rows = self.conn.execute(
+            "SELECT badge_id, amount FROM attachments WHERE llama_id = ? ORDER BY badge_id",
+            (llama_id,),
+        )
+        return [(badge_id, int(amount)) for badge_id, amount in rows]
+
+    def llamas_with_badge(self, badge_id):
+        # Returns [(llama_id, amount)] for the llamas carrying `badge_id`
+        rows = self.conn.execute(
+            "SELECT llama_id, amount FROM attachments WHERE badge_id = ? ORDER BY llama_id",
+            (badge_id,),
+        )
+        return [(llama_id, int(amount)) for llama_id, amount in rows]
+
+    def badge_balances(self, owner):
+        # Returns {badge_id: amount} held by `owner`, not counting attached badges
+        rows = self.conn.execute(
+            "SELECT badge_id, amount FROM badge_balances WHERE owner = ?",
+            (to_checksum_address(owner),),
+        )
+        return {badge_id: int(amount) for badge_id, amount in rows}
+
+
+def _run(indexer, db_path, follow):
+    while True:
+        start = time.perf_counter()
+        count = indexer.sync()
+        block_number, _ = indexer.checkpoint() or (None, None)
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {count} logs up to block {block_number} in {elapsed:.2f}s -> {db_path}")
+        if not follow:
+            break
+        time.sleep(POLL_INTERVAL)
+    indexer.close()
+
+
+def main(llama, auction_house, start_block=0, follow=False):
+    indexer = Indexer(
+        web3,
+        [(llama, Llama.abi), (auction_house, LlamaAuctionHouse.abi)],
+        start_block=int(start_block),
+    )
+    _run(indexer, DB_PATH, follow)
+
+
+def attachments(badge, shadow_box, start_block=0, follow=False):
+    indexer = Indexer(
+        web3,
+        [(badge, Badge.abi, BADGE_EVENTS), (shadow_box, ShadowBox.abi)],
+        ATTACHMENTS_DB_PATH,
+        start_block=int(start_block),
+    )
+    _run(indexer, ATTACHMENTS_DB_PATH, follow)
+
+
+def _timed(fn, keys):
+    # Returns the median and maximum milliseconds of `fn(key)` over `keys`
+    times = []
+    for key in keys:
+        start = time.perf_counter()
+        fn(key)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), max(times)
+
+
+def benchmark(llamas=1111, badge_types=300, badges_per_llama=20, logs_per_block=50):
+    # Applies synthetic logs: one badge mint and one attachment per llama for its holder,
+    # committed in block ranges as sync does, then times the queries of both directions
+    llamas, badge_types, badges_per_llama = int(llamas), int(badge_types), int(badges_per_llama)
+    rng = random.Random(0)
+    box = "0x" + "b0" * 20
+    logs = []
+    for llama_id in range(llamas):
+        holder = f"0x{llama_id + 1:040x}"
+        ids = sorted(rng.sample(range(badge_types), badges_per_llama))
+        amounts = [1] * len(ids)
+        mint = {"fromAddress": ZERO_ADDRESS, "to": holder, "ids": ids, "values": amounts}
+        pull = {"fromAddress": holder, "to": box, "ids": ids, "values": amounts}
+        attach = {"_llama_id": llama_id, "_sender": holder, "_badge_ids": ids, "_amounts": amounts}
+        logs += [("TransferBatch", mint), ("TransferBatch", pull), ("BadgesAttached", attach)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        indexer = Indexer(None, [], Path(directory) / "attachments.db")
+        start = time.perf_counter()
+        for first in range(0, len(logs), BATCH_SIZE):
+            with indexer.conn:
+                for i, (event, args) in enumerate(logs[first : first + BATCH_SIZE], first):
+                    number = i // logs_per_block
+                    indexer.apply(number, i, "0x", f"0x{number:064x}", box, event, args)
+        ingest = time.perf_counter() - start
+        per_llama = _timed(indexer.badges_of, range(llamas))
+        per_badge = _timed(indexer.llamas_with_badge, range(badge_types))
+        indexer.close()
+
+    print(
+        f"{len(logs)} logs for {llamas} llamas x {badge_types} badge types "
+        f"({llamas * badges_per_llama} attachments) in {ingest:.2f}s "
+        f"({len(logs) / ingest:.0f} logs/s)\n"
+        f"badges_of: median {per_llama[0]:.3f}ms, max {per_llama[1]:.3f}ms\n"
+        f"llamas_with_badge: median {per_badge[0]:.3f}ms, max {per_badge[1]:.3f}ms"
+    )
+    return {"ingest_s": ingest, "badges_of_ms": per_llama, "llamas_with_badge_ms": per_badge}
@@ -0,0 +1,236 @@
+"""
+Keeper that rotates the LlamaAuctionHouse auctions, calling
+`settle_current_and_create_new_auction` as soon as the current auction has ended.
+
+The auction is read once at start. After that the keeper follows the `AuctionCreated`,
+`AuctionExtended` and `AuctionSettled` logs of the auction house to know the live
+`end_time`, and sleeps until the first second a block can be settled in. Every settlement
+is simulated with `eth_call` before it is sent. When several keepers compete, the losers
+see "Auction has already been settled" or "Auction hasn't completed", from the simulation
+or from the reverted transaction, and poll the logs again: they bring either the next
+auction or an extension the keeper had not seen yet.
+
+The latency of every settlement, from `end_time` to the timestamp of the block that
+settled it, is recorded with the races won and lost and printed when the keeper stops.
+
+    brownie run scripts/keeper.py main <auction_house> <account_id> --network mainnet
+    brownie run scripts/keeper.py simulate [rounds] [keepers]    # on a local chain
+"""
+
+import asyncio
+import functools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import Llama, LlamaAuctionHouse, accounts, chain, network, web3
+from brownie.exceptions import VirtualMachineError
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+
+from scripts.http_service import BlockingCalls
+
+# Seconds between log polls, and so the longest an extension can go unseen
+POLL_INTERVAL = 2
+# Seconds to wait before retrying while the auction house is paused
+PAUSED_INTERVAL = 60
+
+EVENTS = ["AuctionCreated", "AuctionExtended", "AuctionSettled"]
+# Reverts of a keeper that lost the race to another keeper
+LOST_RACE = ["Auction has already been settled", "Auction hasn't completed"]
+PAUSED = "Auction house is paused"
+
+# Auction house of the simulation, as in scripts/benchmark_gas.py
+SIMULATION_DURATION = 3600
+SIMULATION_TIME_BUFFER = 100
+SIMULATION_RESERVE_PRICE = 100
+
+
+def _revert_reason(error):
+    # brownie raises VirtualMachineError on development networks and a ValueError with the
+    # node's message when gas estimation fails on live networks
+    return getattr(error, "revert_msg", None) or str(error)
+
+
+class Keeper(BlockingCalls):
+    def __init__(
+        self, auction_house, account, clock=time.time, poll_interval=POLL_INTERVAL, executor=None
+    ):
+        self.auction_house = auction_house
+        self.account = account
+        # Returns the current time, chain.time in the simulation
+        self.clock = clock
+        self.poll_interval = poll_interval
+        self.executor = executor
+        self.events = {
+            event_abi_to_log_topic(item): item
+            for item in auction_house.abi
+            if item["type"] == "event" and item["name"] in EVENTS
+        }
+        self.llama_id = None
+        self.end_time = None
+        self.settled = True
+        self.last_block = None
+        # Seconds from end_time to the settling block, and attempts the chain was ahead of
+        self.metrics = {"latencies": [], "lost_races": 0, "failures": 0}
+        self.running = False
+
+    def load(self):
+        # The one read of the auction, later changes come from the logs
+        self.last_block = web3.eth.block_number
+        auction = self.auction_house.auction()
+        self.llama_id = auction["llama_id"]
+        self.end_time = auction["end_time"]
+        self.settled = auction["settled"] or auction["start_time"] == 0
+
+    def _apply(self, log):
+        event = get_event_data(web3.codec, self.events[bytes(log["topics"][0])], log)
+        args = event["args"]
+        if event["event"] == "AuctionCreated":
+            self.llama_id, self.end_time, self.settled = args["_llama_id"], args["_end_time"], False
+        elif args["_llama_id"] != self.llama_id:
+            return
+        elif event["event"] == "AuctionExtended":
+            self.end_time = args["_end_time"]
+        else:
+            self.settled = True
+
+    def poll(self):
+        # Applies the logs of the blocks mined since the last poll
+        head = web3.eth.block_number
+        if head <= self.last_block:
+            return
+        logs = web3.eth.get_logs(
+            {
+                "address": self.auction_house.address,
+                "topics": [["0x" + topic.hex() for topic in self.events]],
+                "fromBlock": self.last_block + 1,
+                "toBlock": head,
+            }
+        )
+        for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+            self._apply(log)
+        self.last_block = head
+
+    async def settle(self):
+        # Returns the seconds to wait before the next attempt. The simulation and the
+        # transaction are separate calls, so another keeper can settle in between.
+        fn = self.auction_house.settle_current_and_create_new_auction
+        end_time = self.end_time
+        try:
+            await self._io(fn.call, {"from": self.account})
+            tx = await self._io(fn, {"from": self.account})
+            reason = None if tx.status == 1 else tx.revert_msg
+        except (VirtualMachineError, ValueError) as e:
+            reason = _revert_reason(e)
+
+        if reason is None:
+            block = await self._io(web3.eth.get_block, tx.block_number)
+            self.metrics["latencies"].append(block["timestamp"] - end_time)
+            self.settled = True
+            return 0
+        if any(lost in reason for lost in LOST_RACE):
+            self.metrics["lost_races"] += 1
+            return self.poll_interval
+        if PAUSED in reason:
+            return PAUSED_INTERVAL
+        self.metrics["failures"] += 1
+        print(f"Settling llama {self.llama_id} failed: {reason}")
+        return self.poll_interval
+
+    async def run(self):
+        self.running = True
+        await self._io(self.load)
+        while self.running:
+            await self._io(self.poll)
+            wait = self.poll_interval
+            if not self.settled:
+                # block.timestamp must be past end_time, and polling goes on meanwhile as a bid
+                # can extend it. The wait settle() returns is kept, PAUSED_INTERVAL included.
+                wait = min(self.end_time + 1 - self.clock(), self.poll_interval)
+                if wait <= 0:
+                    wait = await self.settle()
+            await asyncio.sleep(max(wait, 0))
+
+    def stop(self):
+        self.running = False
+
+    def summary(self):
+        latencies = self.metrics["latencies"]
+        summary = (
+            f"{len(latencies)} settled, {self.metrics['lost_races']} lost races, "
+            f"{self.metrics['failures']} failures"
+        )
+        if latencies:
+            summary += (
+                f", latency from end_time median {statistics.median(latencies)}s "
+                f"max {max(latencies)}s"
+            )
+        return summary
+
+
+def main(auction_house, account_id):
+    keeper = Keeper(LlamaAuctionHouse.at(auction_house), accounts.load(account_id))
+    try:
+        asyncio.run(keeper.run())
+    except KeyboardInterrupt:
+        pass
+    print(keeper.summary())
+
+
+async def drive(auction_house, keepers, rounds, bidder, executor=None):
+    # Bids on every other auction near its end, which extends it, then jumps to just before
+    # the end and lets the keepers race to settle it
+    loop = asyncio.get_running_loop()
+
+    def io(fn, *args):
+        return loop.run_in_executor(executor, functools.partial(fn, *args))
+
+    tasks = [asyncio.create_task(keeper.run()) for keeper in keepers]
+    for i in range(rounds):
+        auction = await io(auction_house.auction)
+        if i % 2:
+            await io(chain.sleep, auction["end_time"] - chain.time() - 10)
+            params = {"from": bidder, "value": SIMULATION_RESERVE_PRICE}
+            await io(
+                auction_house.create_bid, auction["llama_id"], SIMULATION_RESERVE_PRICE, params
+            )
+            auction = await io(auction_house.auction)
+        await io(chain.sleep, max(auction["end_time"] - chain.time() - 1, 0))
+        while (await io(auction_house.auction))["llama_id"] == auction["llama_id"]:
+            await asyncio.sleep(0.1)
+    for keeper in keepers:
+        keeper.stop()
+    await asyncio.gather(*tasks)
+
+
+def simulate(rounds=4, keepers=2, poll_interval=0.5):
+    if network.show_active() != "development":
+        raise SystemExit("The simulation deploys its own auction house on a development network")
+    deployer = accounts[0]
+    token = Llama.deploy([], {"from": deployer})
+    auction_house = LlamaAuctionHouse.deploy(
+        token,
+        SIMULATION_TIME_BUFFER,
+        SIMULATION_RESERVE_PRICE,
+        5,
+        SIMULATION_DURATION,
+        deployer,
+        95,
+        {"from": deployer},
+    )
+    token.set_minter(auction_house, {"from": deployer})
+    auction_house.unpause({"from": deployer})
+    auction_house.disable_wl({"from": deployer})
+
+    # One thread runs every RPC call, see BlockingCalls
+    executor = ThreadPoolExecutor(1)
+    keepers = [
+        Keeper(auction_house, accounts[i + 2], chain.time, float(poll_interval), executor)
+        for i in range(int(keepers))
+    ]
+    asyncio.run(drive(auction_house, keepers, int(rounds), accounts[1], executor))
+    executor.shutdown()
+    for i, keeper in enumerate(keepers):
+        print(f"keeper {i}: {keeper.summary()}")
+    return keepers
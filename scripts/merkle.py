@@ -0,0 +1,125 @@
+"""
+Builds the Merkle trees for the proof based allowlist mode of `Llama.allowlistMintWithProof`
+and `LlamaAuctionHouse.create_wl_bid_with_proof` / `create_friend_bid_with_proof`.
+
+A leaf is `keccak256(_abi_encode(domain, address[, amount]))`, the same message that is signed
+in signature mode, and pairs are hashed in sorted order to match `_verify_proof`.
+
+    brownie run scripts/merkle.py    # writes signatures/<domain>.merkle.json, prints the roots
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from scripts.signatures import AMOUNT_DOMAINS, OUTPUT_DIR, SOURCES, encode_message, read_rows
+
+try:
+    from Crypto.Hash import keccak as _keccak
+
+    def keccak(data):
+        return _keccak.new(digest_bits=256, data=data).digest()
+
+except ImportError:
+    from eth_utils import keccak
+
+# Must match MAX_PROOF_LENGTH in the contracts
+MAX_PROOF_LENGTH = 20
+
+ROOT_SETTERS = {
+    "whitelist:": "LlamaAuctionHouse.set_wl_merkle_root",
+    "friend:": "LlamaAuctionHouse.set_friend_merkle_root",
+    "allowlist:": "Llama.set_al_merkle_root",
+}
+
+
+def leaf(domain, address, amount=None):
+    return keccak(encode_message(domain, address, amount))
+
+
+def _hash_level(nodes):
+    # Hashes a whole level in one pass: sorted pairs, with an odd last node carried up
+    parents = list(
+        map(keccak, [a + b if a < b else b + a for a, b in zip(nodes[::2], nodes[1::2])])
+    )
+    if len(nodes) % 2:
+        parents.append(nodes[-1])
+    return parents
+
+
+def build_tree(leaves):
+    # Returns every level of the tree, from the sorted, deduplicated leaves up to the root
+    levels = [sorted(set(leaves))]
+    if not levels[0]:
+        raise ValueError("Cannot build a tree without leaves")
+    while len(levels[-1]) > 1:
+        levels.append(_hash_level(levels[-1]))
+    if len(levels) - 1 > MAX_PROOF_LENGTH:
+        raise ValueError(f"{len(levels[0])} leaves need proofs longer than {MAX_PROOF_LENGTH}")
+    return levels
+
+
+def root(levels):
+    return levels[-1][0]
+
+
+def proofs(levels):
+    # Returns {leaf: proof} for every leaf of the tree
+    result = {}
+    for index, node in enumerate(levels[0]):
+        proof = []
+        for level in levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        result[node] = proof
+    return result
+
+
+def verify(proof, root_hash, leaf_hash):
+    computed = leaf_hash
+    for node in proof:
+        computed = keccak(computed + node if computed < node else node + computed)
+    return computed == root_hash
+
+
+def output_path(domain, output_dir=OUTPUT_DIR):
+    return Path(output_dir) / f"{domain.rstrip(':')}.merkle.json"
+
+
+def build_all(sources=SOURCES, output_dir=OUTPUT_DIR):
+    # Returns {domain: root} for every source that exists
+    roots = {}
+    for domain, path in sources.items():
+        if not Path(path).exists():
+            print(f"{domain:<11} skipped, {path} does not exist")
+            continue
+        start = time.perf_counter()
+        rows = list(read_rows(path, with_amount=domain in AMOUNT_DOMAINS))
+        leaves = {address: leaf(domain, address, amount) for address, amount in rows}
+        levels = build_tree(leaves.values())
+        by_leaf = proofs(levels)
+
+        entries = {}
+        for address, amount in rows:
+            entries[address] = {"proof": ["0x" + node.hex() for node in by_leaf[leaves[address]]]}
+            if amount is not None:
+                entries[address]["amount"] = amount
+        roots[domain] = "0x" + root(levels).hex()
+        artifact = {"domain": domain, "root": roots[domain], "proofs": entries}
+
+        path = output_path(domain, output_dir)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(artifact, separators=(",", ":"), sort_keys=True) + "\n")
+        os.replace(tmp, path)
+        elapsed = time.perf_counter() - start
+        print(f"{domain:<11} {len(rows)} leaves in {elapsed:.2f}s, root {roots[domain]} -> {path}")
+    return roots
+
+
+def main():
+    for domain, root_hash in build_all().items():
+        print(f"{ROOT_SETTERS[domain]}({root_hash})")
@@ -0,0 +1,270 @@
+"""
+Serves the Llama token URIs and their metadata to marketplaces, so that refreshing the
+collection no longer takes a `tokenURI` call for each of its 1,111 tokens.
+
+`tokenURI` is `base_uri` followed by the token id once the collection is revealed, and
+`default_uri` for every token before. The whole table is computed locally from `base_uri`,
+`revealed`, `default_uri` and `totalSupply`, read together as one JSON-RPC batch request of
+`scripts/batch_reads.py`. The setters log nothing, so that batch is polled every
+POLL_INTERVAL: a new `base_uri`, `revealed` or `default_uri` rebuilds the table and drops
+the cached metadata, while new mints only extend the table.
+
+Metadata documents are fetched from their URI on first request, `ipfs://` URIs through
+IPFS_GATEWAY, and cached by URI, so before the reveal every token shares the one document
+of `default_uri`. Concurrent requests for a URI share one fetch. The requests are served
+with `scripts/http_service.py`, using only the standard library.
+
+    brownie run scripts/metadata.py main <llama> [port] --network mainnet
+    brownie run scripts/metadata.py export <llama> [path] [resolve] --network mainnet
+    brownie run scripts/metadata.py benchmark    # table against 1111 tokenURI calls
+
+Endpoints:
+
+    GET  /token_uri/<token_id>      {"token_id", "token_uri"}, or 404 past totalSupply
+    GET  /token_uris                every token URI in token id order, for a bulk refresh
+    GET  /metadata/<token_id>       the metadata document of the token
+    GET  /health                    the contract state, table version and upstream calls
+"""
+
+import asyncio
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import requests
+from brownie import Llama, accounts, web3
+
+from scripts.batch_reads import BatchClient, function_call
+from scripts.http_service import NOT_FOUND, BlockingCalls, SingleFlight, serve_connection
+
+EXPORT_PATH = Path(__file__).parent.parent / "metadata" / "token_uris.json"
+IPFS_GATEWAY = "https://ipfs.io/ipfs/"
+
+# Seconds between two reads of the contract state
+POLL_INTERVAL = 5
+# Seconds to wait for a metadata document
+FETCH_TIMEOUT = 10
+# Metadata documents fetched at once by the export
+EXPORT_FETCHES = 16
+
+STATE_FUNCTIONS = ["base_uri", "revealed", "default_uri", "totalSupply"]
+
+# Tokens of the benchmark, the whole collection
+BENCHMARK_SUPPLY = 1111
+
+
+class TokenURIState(NamedTuple):
+    base_uri: str
+    revealed: bool
+    default_uri: str
+    total_supply: int
+
+
+def read_state(client, token):
+    # One round trip whatever the supply
+    results = client.call([function_call(token, name) for name in STATE_FUNCTIONS])
+    for name, result in zip(STATE_FUNCTIONS, results):
+        if not result.success:
+            raise ValueError(f"Cannot read {name}: {result.error}")
+    return TokenURIState(*(result.value for result in results))
+
+
+def read_state_sequential(token):
+    # For chains without an HTTP endpoint to batch against, like the in-process py-evm chain
+    return TokenURIState(
+        token.base_uri(), token.revealed(), token.default_uri(), token.totalSupply()
+    )
+
+
+def state_reader(token):
+    if str(web3.provider.endpoint_uri).startswith("http"):
+        return functools.partial(read_state, BatchClient(web3.provider.endpoint_uri), token)
+    return functools.partial(read_state_sequential, token)
+
+
+def token_uri(state, token_id):
+    # Llama.tokenURI of a minted token, token ids run from 0 to totalSupply - 1
+    if state.revealed:
+        return state.base_uri + str(token_id)
+    return state.default_uri
+
+
+def token_uris(state):
+    return [token_uri(state, token_id) for token_id in range(state.total_supply)]
+
+
+def fetch_json(uri, session=requests):
+    if uri.startswith("ipfs://"):
+        uri = IPFS_GATEWAY + uri[len("ipfs://") :]
+    response = session.get(uri, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+class MetadataCache(BlockingCalls):
+    def __init__(self, reader, fetch=fetch_json, poll_interval=POLL_INTERVAL, executor=None):
+        # Returns the TokenURIState, see state_reader
+        self.reader = reader
+        # Returns the metadata document of a URI
+        self.fetch = fetch
+        self.poll_interval = poll_interval
+        self.executor = executor
+        self.state = None
+        self.uris = []
+        # Bumped whenever the URIs of minted tokens change
+        self.version = 0
+        # The metadata documents by URI
+        self.documents = SingleFlight()
+        # The body of /token_uris, serialized once per table
+        self._table = None
+        self.metrics = {"state_reads": 0, "invalidations": 0, "fetches": 0}
+        self._follower = None
+
+    def apply(self, state):
+        # Returns whether the URIs of minted tokens changed
+        previous, self.state = self.state, state
+        if previous is not None and previous[:3] == state[:3]:
+            # Tokens are never burned, a mint appends to the table
+            if state.total_supply != previous.total_supply:
+                self.uris.extend(
+                    token_uri(state, token_id)
+                    for token_id in range(previous.total_supply, state.total_supply)
+                )
+                self._table = None
+            return False
+        self.uris = token_uris(state)
+        self._table = None
+        self.documents.clear()
+        if previous is not None:
+            self.version += 1
+            self.metrics["invalidations"] += 1
+        return previous is not None
+
+    def refresh(self):
+        self.metrics["state_reads"] += 1
+        return self.apply(self.reader())
+
+    async def _follow(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._io(self.refresh)
+            except (OSError, ValueError) as e:
+                print(f"Reading the token URI state failed: {e}")
+
+    def table(self):
+        if self._table is None:
+            self._table = json.dumps(
+                {"version": self.version, "token_uris": self.uris}, separators=(",", ":")
+            ).encode()
+        return self._table
+
+    async def _fetch(self, uri):
+        self.metrics["fetches"] += 1
+        return await self._io(self.fetch, uri)
+
+    async def metadata(self, token_id):
+        # Raises IndexError past totalSupply
+        uri = self.uris[token_id]
+        return await self.documents.get(uri, lambda: self._fetch(uri))
+
+    def _token_id(self, part):
+        if not part.isdigit() or int(part) >= len(self.uris):
+            return None
+        return int(part)
+
+    async def _respond(self, method, path, body):
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if method != "GET":
+            return NOT_FOUND
+        if parts == ["token_uris"]:
+            return 200, self.table()
+        if parts == ["health"]:
+            return 200, {
+                "state": self.state._asdict(),
+                "version": self.version,
+                "documents": len(self.documents),
+                **self.metrics,
+            }
+        if len(parts) == 2 and parts[0] in ("token_uri", "metadata"):
+            token_id = self._token_id(parts[1])
+            if token_id is None:
+                return 404, {"error": "nonexistent token"}
+            if parts[0] == "token_uri":
+                return 200, {"token_id": token_id, "token_uri": self.uris[token_id]}
+            try:
+                return 200, await self.metadata(token_id)
+            except (OSError, ValueError) as e:
+                return 502, {"error": f"cannot fetch the metadata: {e}"}
+        return NOT_FOUND
+
+    async def handle(self, reader, writer):
+        await serve_connection(reader, writer, self._respond)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        await self._io(self.refresh)
+        self._follower = asyncio.create_task(self._follow())
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def stop(self):
+        self._follower.cancel()
+
+
+async def serve(token, host="127.0.0.1", port=8080):
+    cache = MetadataCache(state_reader(token))
+    async with await cache.start(host, port):
+        print(f"Serving {cache.state.total_supply} token URIs on http://{host}:{port}")
+        await asyncio.Event().wait()
+
+
+def main(llama, port=8080, host="127.0.0.1"):
+    try:
+        asyncio.run(serve(Llama.at(llama), host, int(port)))
+    except KeyboardInterrupt:
+        pass
+
+
+def build_export(state, documents=None):
+    # The token URIs in token id order, and with `documents` the metadata of each distinct URI
+    export = {**state._asdict(), "token_uris": token_uris(state)}
+    if documents is not None:
+        export["metadata"] = documents
+    return export
+
+
+def export(llama, path=EXPORT_PATH, resolve=False, fetch=fetch_json):
+    state = state_reader(Llama.at(llama))()
+    documents = None
+    if resolve:
+        uris = sorted(set(token_uris(state)))
+        with ThreadPoolExecutor(EXPORT_FETCHES) as executor:
+            documents = dict(zip(uris, executor.map(fetch, uris)))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(build_export(state, documents), indent=2) + "\n")
+    print(f"Wrote {state.total_supply} token URIs to {path}")
+    return path
+
+
+def benchmark():
+    deployer = accounts[0]
+    token = Llama.deploy([deployer] * BENCHMARK_SUPPLY, {"from": deployer})
+    token.set_base_uri("ipfs://QmLlamas/", {"from": deployer})
+    token.set_revealed(True, {"from": deployer})
+
+    start = time.perf_counter()
+    expected = [token.tokenURI(token_id) for token_id in range(BENCHMARK_SUPPLY)]
+    sequential = time.perf_counter() - start
+
+    reader = state_reader(token)
+    start = time.perf_counter()
+    uris = token_uris(reader())
+    computed = time.perf_counter() - start
+    assert uris == expected, "Computed and contract token URIs differ"
+    print(
+        f"{BENCHMARK_SUPPLY} tokenURI calls {sequential:.2f}s, "
+        f"state read and table {computed * 1000:.1f}ms, {sequential / computed:.0f}x"
+    )
@@ -0,0 +1,382 @@
+"""
+An in-process py-evm chain for the test suite, in place of a ganache subprocess.
+
+`PyEVMProvider` is a web3 provider that answers JSON-RPC requests from an `EthereumTester`
+in the same process, so a request is a function call rather than a round trip over
+localhost. It behaves like the ganache that brownie launches: the same mnemonic derived and
+funded accounts, block timestamps that follow the wall clock plus `evm_increaseTime`,
+snapshots that also restore the time, and reverts reported the way ganache reports them.
+
+The module is also a brownie RPC backend. `install()` registers it and points the
+development network at it, which the `--evm pyevm` option of `tests/conftest.py` does:
+
+    brownie test --evm pyevm
+
+Needs `eth-tester[py-evm]`, see the README. Transactions cannot be traced, so `--coverage`
+and `--gas` need ganache, and accounts from `accounts.at(address, force=True)` can be used
+as addresses but cannot send transactions.
+"""
+
+import gc
+import json
+import sys
+import time
+
+import psutil
+from brownie._config import CONFIG
+from brownie.network.rpc import LAUNCH_BACKENDS
+from brownie.network.web3 import web3
+from eth_abi import decode
+from eth_utils import ValidationError
+from eth_account.hdaccount import key_from_seed
+from eth_account.hdaccount.mnemonic import Mnemonic
+from web3 import EthereumTesterProvider, Web3
+from web3.providers.base import JSONBaseProvider
+
+try:
+    from eth.vm.forks import BerlinVM, IstanbulVM, LondonVM
+    from eth.vm.spoof import SpoofTransaction
+    from eth_keys import keys
+    from eth_tester import EthereumTester, PyEVMBackend
+    from eth_tester.backends.pyevm.main import _execute_and_revert_transaction
+    from eth_tester.exceptions import TransactionFailed
+    from eth_tester.exceptions import ValidationError as TesterValidationError
+except ImportError:
+    PyEVMBackend = None
+
+CMD = "pyevm"
+
+# Defaults of the ganache that brownie launches
+GAS_LIMIT = 12000000
+ACCOUNTS = 10
+DEFAULT_BALANCE = 1000  # ether
+MNEMONIC = "brownie"
+
+ERROR_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+METHOD_NOT_FOUND = -32601
+
+
+def install(network_id=None):
+    # Runs the development network `network_id` (the default network if None) on this backend
+    if PyEVMBackend is None:
+        raise ImportError('The pyevm backend needs eth-tester, `pip install "eth-tester[py-evm]"`')
+    network_id = network_id or CONFIG.settings["networks"]["default"]
+    LAUNCH_BACKENDS[CMD] = sys.modules[__name__]
+    CONFIG.networks[network_id]["cmd"] = CMD
+
+
+if PyEVMBackend is not None:
+
+    class _Backend(PyEVMBackend):
+        # Calls and gas estimates are run as their `from` address without signing, like ganache,
+        # so they work from accounts eth-tester has no key for. Without a fee they are free.
+
+        def _unsigned(self, transaction, block_number):
+            if "max_fee_per_gas" not in transaction:
+                transaction = {"gas_price": 0, **transaction}
+            unsigned = self._get_normalized_and_unsigned_evm_transaction(transaction, block_number)
+            return SpoofTransaction(unsigned, from_=transaction["from"])
+
+        def call(self, transaction, block_number="latest"):
+            transaction = {"gas": self._max_available_gas(), **transaction}
+            computation = _execute_and_revert_transaction(
+                self.chain, self._unsigned(transaction, block_number), block_number
+            )
+            if computation.is_error:
+                raise TransactionFailed(_revert_reason(computation))
+            return computation.output
+
+        def estimate_gas(self, transaction, block_number="latest"):
+            spoofed = self._unsigned({**transaction, "gas": 21000}, block_number)
+            header = None
+            if block_number != "latest":
+                header = self.chain.get_canonical_block_header_by_number(block_number)
+            return self.chain.estimate_gas(spoofed, header)
+
+
+def _same_second_blocks(vm_class):
+    # ganache gives blocks mined in the same second the same timestamp, py-evm requires a block to
+    # be later than its parent and adjusts the difficulty to the gap. Keep the difficulty fixed.
+
+    class VM(vm_class):
+        @classmethod
+        def create_header_from_parent(cls, parent_header, **header_params):
+            if parent_header is not None:
+                header_params.setdefault("difficulty", parent_header.difficulty)
+            return vm_class.create_header_from_parent(parent_header, **header_params)
+
+        @classmethod
+        def compute_difficulty(cls, parent_header, timestamp):
+            return parent_header.difficulty
+
+        def configure_header(self, **header_params):
+            with self.get_header().build_changeset(**header_params) as changeset:
+                return changeset.commit()
+
+        @classmethod
+        def validate_header(cls, header, parent_header):
+            if header.timestamp == parent_header.timestamp:
+                parent_header = parent_header.copy(timestamp=header.timestamp - 1)
+            super().validate_header(header, parent_header)
+
+    return VM
+
+
+def _revert_reason(computation):
+    error = computation._error
+    if error is None or not error.args or not isinstance(error.args[0], bytes):
+        return None
+    data = error.args[0]
+    if data[:4] != ERROR_SELECTOR:
+        return None
+    return decode(["string"], data[4:])[0]
+
+
+def _to_json(value):
+    # Results as they would be serialized by a JSON-RPC server
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int):
+        return hex(value)
+    if hasattr(value, "items"):
+        value = dict(value)
+        if isinstance(value.get("logsBloom"), int):
+            value["logsBloom"] = value["logsBloom"].to_bytes(256, "big")
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _vm_error(reason, data):
+    # The error format of ganache 6, which brownie reads without a ganache 7 middleware
+    message = "VM Exception while processing transaction: revert"
+    if reason:
+        message += f" {reason}"
+    return {"code": -32000, "message": message, "data": data}
+
+
+class PyEVMProvider(JSONBaseProvider):
+    endpoint_uri = CMD
+
+    def __init__(
+        self,
+        gas_limit=GAS_LIMIT,
+        accounts=ACCOUNTS,
+        evm_version="istanbul",
+        mnemonic=MNEMONIC,
+        default_balance=DEFAULT_BALANCE,
+        **kwargs,
+    ):
+        super().__init__()
+        vm = {"istanbul": IstanbulVM, "berlin": BerlinVM, "london": LondonVM}[evm_version]
+        vm = _same_second_blocks(vm)
+
+        # Accounts are derived along ganache's path, so they have the same addresses
+        seed = Mnemonic.to_seed(mnemonic)
+        account_keys = [
+            keys.PrivateKey(key_from_seed(seed, f"m/44'/60'/0'/0/{i}")) for i in range(accounts)
+        ]
+        state = {"balance": int(default_balance) * 10**18, "nonce": 0, "code": b"", "storage": {}}
+        backend = _Backend(
+            genesis_parameters=PyEVMBackend.generate_genesis_params({"gas_limit": gas_limit}),
+            genesis_state={key.public_key.to_canonical_address(): state for key in account_keys},
+            vm_configuration=((0, vm),),
+        )
+        backend.account_keys = tuple(account_keys)
+
+        self.backend = backend
+        self.tester = EthereumTester(backend)
+        self._web3 = Web3(EthereumTesterProvider(self.tester), middlewares=[])
+        self.time_offset = 0
+        self.snapshots = {}
+        self.handlers = {
+            "eth_call": self._call,
+            "eth_estimateGas": self._call,
+            "eth_sendTransaction": self._send,
+            "eth_sendRawTransaction": self._send,
+        }
+        self.methods = {
+            "web3_clientVersion": lambda: f"PyEVM/{self._web3.clientVersion}",
+            "eth_chainId": lambda: self.backend.chain.chain_id,
+            "net_version": lambda: str(self.backend.chain.chain_id),
+            "evm_increaseTime": self.increase_time,
+            "evm_mine": self.mine,
+            "evm_snapshot": self.snapshot,
+            "evm_revert": self.revert,
+        }
+
+    def isConnected(self):
+        return True
+
+    def make_request(self, method, params):
+        # Requests go through JSON as they would over HTTP, so they are formatted the same way
+        request = json.loads(self.encode_rpc_request(method, params))
+        params = request["params"]
+        if method in self.handlers:
+            response = self.handlers[method](method, params)
+        elif method in self.methods:
+            try:
+                response = {"result": self.methods[method](*params)}
+            except (KeyError, ValueError) as e:
+                response = {"error": {"code": -32000, "message": str(e)}}
+        else:
+            response = self._forward(method, params)
+        if method == "eth_getTransactionByHash" and response.get("result"):
+            # eth-tester names the calldata of a transaction `data`, clients name it `input`
+            transaction = dict(response["result"])
+            transaction["input"] = transaction.pop("data")
+            response = {"result": transaction}
+        if "result" in response:
+            response = {"result": _to_json(response["result"])}
+        return {"jsonrpc": "2.0", "id": request["id"], **response}
+
+    def _forward(self, method, params):
+        # Everything else is answered by web3's eth-tester provider
+        try:
+            response = self._web3.manager._make_request(method, params)
+        except NotImplementedError:
+            response = {"error": f"{method} is not supported"}
+        except (ValidationError, TesterValidationError) as e:
+            # A transaction the chain would not accept, such as one the sender cannot pay for
+            return {"error": {"code": -32000, "message": str(e)}}
+        if isinstance(response.get("error"), str):
+            # Unknown and unimplemented methods come back as a bare message
+            return {"error": {"code": METHOD_NOT_FOUND, "message": response["error"]}}
+        return {key: response[key] for key in ("result", "error") if key in response}
+
+    def now(self):
+        return int(time.time()) + self.time_offset
+
+    def _next_block(self):
+        # Stamps the pending block with the current time, at least that of its parent
+        chain = self.backend.chain
+        parent = chain.get_canonical_head()
+        timestamp = max(self.now(), parent.timestamp)
+        chain.header = chain.create_header_from_parent(parent, timestamp=timestamp)
+
+    def _call(self, method, params):
+        if method == "eth_call" and params[1:] in ([], ["latest"]):
+            # ganache runs calls in a block stamped with the current time, so that they see
+            # `evm_increaseTime`, eth-tester would run them in the last mined block
+            self._next_block()
+            params = [params[0], "pending"]
+        try:
+            return self._forward(method, params)
+        except TransactionFailed as e:
+            reason = e.args[0] if e.args else None
+            return {"error": _vm_error(reason, {"0x": {"error": "revert", "reason": reason}})}
+
+    def _send(self, method, params):
+        self._next_block()
+        response = self._forward(method, params)
+        if "error" in response:
+            return response
+        tx_hash = response["result"]
+        receipt = self.tester.get_transaction_receipt(tx_hash)
+        if receipt["status"]:
+            return response
+        reason = self._replay_reason(receipt)
+        data = {"error": "revert", "program_counter": None, "return": "0x", "reason": reason}
+        return {"error": _vm_error(reason, {tx_hash: data})}
+
+    def _replay_reason(self, receipt):
+        # A failed transaction is mined, replay it on its parent state to read the revert reason
+        chain = self.backend.chain
+        block = chain.get_canonical_block_by_number(receipt["block_number"])
+        parent = chain.get_canonical_block_header_by_number(block.number - 1)
+        header = block.header.copy(state_root=parent.state_root, gas_used=0)
+        transactions = block.transactions[: receipt["transaction_index"] + 1]
+        state = chain.get_vm(at_header=header).state
+        for transaction in transactions[:-1]:
+            state.apply_transaction(transaction)
+        return _revert_reason(state.apply_transaction(transactions[-1]))
+
+    def increase_time(self, seconds):
+        self.time_offset += int(seconds, 16) if isinstance(seconds, str) else int(seconds)
+        return self.time_offset
+
+    def mine(self, timestamp=None):
+        if timestamp is not None:
+            timestamp = int(timestamp, 16) if isinstance(timestamp, str) else int(timestamp)
+            self.time_offset = timestamp - int(time.time())
+        self._next_block()
+        self.tester.mine_blocks(1)
+        return "0x0"
+
+    def snapshot(self):
+        snapshot_id = len(self.snapshots) + 1
+        self.snapshots[snapshot_id] = (self.tester.take_snapshot(), self.time_offset)
+        return snapshot_id
+
+    def revert(self, snapshot_id):
+        snapshot_id = int(snapshot_id, 16) if isinstance(snapshot_id, str) else int(snapshot_id)
+        tester_id, self.time_offset = self.snapshots[snapshot_id]
+        self.tester.revert_to_snapshot(tester_id)
+        # Later snapshots are gone with the blocks they were taken on
+        for later in [i for i in self.snapshots if i > snapshot_id]:
+            del self.snapshots[later]
+        return True
+
+
+class _InProcess:
+    # Stands in for the RPC subprocess brownie keeps track of
+
+    def __init__(self):
+        self.running = True
+
+    def is_running(self):
+        return self.running
+
+    def parent(self):
+        return psutil.Process()
+
+    def children(self, recursive=False):
+        return []
+
+    def kill(self):
+        self.running = False
+
+    def wait(self):
+        pass
+
+
+# Brownie RPC backend interface, see brownie.network.rpc.ganache
+
+
+def launch(cmd, **kwargs):
+    print(f"\nLaunching an in-process py-evm chain ({kwargs.get('evm_version', 'istanbul')})...")
+    kwargs.pop("port", None)
+    web3.provider = PyEVMProvider(**kwargs)
+    # Brownie runs a full garbage collection on every revert, which has to walk the objects of
+    # the chain and its compiled VM now that they live in this process. Nothing loaded so far is
+    # garbage, so move it out of the collector's way.
+    gc.freeze()
+    return _InProcess()
+
+
+def on_connection():
+    pass
+
+
+def sleep(seconds):
+    return web3.provider.increase_time(seconds)
+
+
+def mine(timestamp=None):
+    web3.provider.mine(timestamp)
+
+
+def snapshot():
+    return web3.provider.snapshot()
+
+
+def revert(snapshot_id):
+    web3.provider.revert(snapshot_id)
+
+
+def unlock_account(address):
+    # eth-tester cannot send from an address it has no key for
+    pass
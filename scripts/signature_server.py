@@ -0,0 +1,328 @@
+"""
+Serves the signatures written by `scripts/signatures.py` to the mint and bid frontend.
+
+The JSON artifacts in `signatures/` are compiled into `signatures/index.bin`, an open
+addressing hash table of fixed size records that is memory mapped, so a lookup is a
+hash and usually a single record compare. The artifacts are polled and the index is
+rebuilt and swapped in whenever one of them changes. Only the standard library is used.
+
+    python -m scripts.signature_server serve --port 8080
+    python -m scripts.signature_server loadtest --url http://127.0.0.1:8080 --rps 5000
+
+Endpoints, where `<domain>` is one of `whitelist`, `friend` or `allowlist`:
+
+    GET  /signature/<domain>/<address>    one entry, or 404
+    POST /signatures/<domain>             {"addresses": [...]} -> {address: entry or null}
+    GET  /health                          number of entries and index build time
+"""
+
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import random
+import struct
+import time
+from pathlib import Path
+
+from scripts.http_service import NOT_FOUND, BlockingCalls, serve_connection
+
+ARTIFACT_DIR = Path(__file__).parent.parent / "signatures"
+INDEX_NAME = "index.bin"
+
+# Domains are stored by id, 0 marks an empty slot
+DOMAINS = {"whitelist:": 1, "friend:": 2, "allowlist:": 3}
+
+MAGIC = b"LLAMASIG"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")  # magic, version, entries, slots
+RECORD = struct.Struct("<B20sQ65s2x")  # domain id, address, amount, signature
+
+MAX_BATCH = 1000
+RELOAD_INTERVAL = 1.0
+LOAD_FACTOR = 0.5
+
+
+def _slot(domain_id, address, mask):
+    # Addresses are uniformly distributed, so their leading bytes make a good hash
+    return (int.from_bytes(address[:8], "little") ^ domain_id * 0x9E3779B97F4A7C15) & mask
+
+
+def _artifact_paths(directory):
+    return [Path(directory) / f"{domain.rstrip(':')}.json" for domain in DOMAINS]
+
+
+def build_index(directory=ARTIFACT_DIR, path=None):
+    # Writes the index next to the artifacts, replacing any previous one atomically
+    entries = []
+    for artifact in _artifact_paths(directory):
+        if not artifact.exists():
+            continue
+        data = json.loads(artifact.read_text())
+        domain_id = DOMAINS[data["domain"]]
+        for address, entry in data["signatures"].items():
+            entries.append(
+                (
+                    domain_id,
+                    bytes.fromhex(address[2:]),
+                    entry.get("amount", 0),
+                    bytes.fromhex(entry["signature"][2:]),
+                )
+            )
+
+    slots = 1
+    while slots * LOAD_FACTOR < max(len(entries), 1):
+        slots *= 2
+    mask = slots - 1
+    table = bytearray(HEADER.size + slots * RECORD.size)
+    HEADER.pack_into(table, 0, MAGIC, VERSION, len(entries), slots)
+    for domain_id, address, amount, signature in entries:
+        slot = _slot(domain_id, address, mask)
+        while table[HEADER.size + slot * RECORD.size]:
+            slot = (slot + 1) & mask
+        RECORD.pack_into(
+            table, HEADER.size + slot * RECORD.size, domain_id, address, amount, signature
+        )
+
+    path = Path(path or Path(directory) / INDEX_NAME)
+    path.parent.mkdir(exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(table)
+    os.replace(tmp, path)
+    return path
+
+
+class SignatureIndex:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.entries, slots = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a signature index")
+        self._mask = slots - 1
+        self.built_at = os.stat(path).st_mtime
+
+    def close(self):
+        self._map.close()
+
+    def lookup(self, domain, address):
+        # Returns {"signature", "amount"?} for a hex address, or None
+        domain_id = DOMAINS.get(domain)
+        try:
+            key = bytes.fromhex(address[2:] if address[:2] in ("0x", "0X") else address)
+        except ValueError:
+            return None
+        if domain_id is None or len(key) != 20:
+            return None
+
+        slot = _slot(domain_id, key, self._mask)
+        while True:
+            offset = HEADER.size + slot * RECORD.size
+            stored_domain = self._map[offset]
+            if not stored_domain:
+                return None
+            if stored_domain == domain_id and self._map[offset + 1 : offset + 21] == key:
+                _, _, amount, signature = RECORD.unpack_from(self._map, offset)
+                entry = {"signature": "0x" + signature.hex()}
+                if domain == "allowlist:":
+                    entry["amount"] = amount
+                return entry
+            slot = (slot + 1) & self._mask
+
+
+class SignatureServer(BlockingCalls):
+    def __init__(self, directory=ARTIFACT_DIR, reload_interval=RELOAD_INTERVAL):
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self.index = None
+        self._fingerprint = None
+        self._watcher = None
+
+    def _artifacts_fingerprint(self):
+        fingerprint = []
+        for artifact in _artifact_paths(self.directory):
+            try:
+                stat = artifact.stat()
+            except FileNotFoundError:
+                continue
+            fingerprint.append((artifact.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(fingerprint)
+
+    def _build(self):
+        # Returns (fingerprint, index) when the artifacts changed since the last load
+        fingerprint = self._artifacts_fingerprint()
+        if fingerprint == self._fingerprint:
+            return None
+        return fingerprint, SignatureIndex(build_index(self.directory))
+
+    def _swap(self, fingerprint, index):
+        previous, self.index, self._fingerprint = self.index, index, fingerprint
+        if previous is not None:
+            previous.close()
+
+    def reload(self):
+        built = self._build()
+        if built:
+            self._swap(*built)
+        return bool(built)
+
+    async def _watch(self):
+        # The index is built on a worker thread but swapped in on the event loop, so a
+        # lookup never sees a closed map
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                built = await self._io(self._build)
+            except (OSError, ValueError, KeyError) as e:
+                # A half written artifact is picked up on the next poll
+                print(f"Reload failed: {e!r}")
+                continue
+            if built:
+                self._swap(*built)
+                print(f"Reloaded {self.index.entries} signatures")
+
+    async def _respond(self, method, path, body):
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        if method == "GET" and parts == ["health"]:
+            return 200, {"entries": self.index.entries, "built_at": self.index.built_at}
+        if method == "GET" and len(parts) == 3 and parts[0] == "signature":
+            entry = self.index.lookup(parts[1] + ":", parts[2])
+            return (200, entry) if entry else NOT_FOUND
+        if method == "POST" and len(parts) == 2 and parts[0] == "signatures":
+            try:
+                addresses = json.loads(body)["addresses"]
+            except (ValueError, KeyError, TypeError):
+                return 400, {"error": 'expected {"addresses": [...]}'}
+            if (
+                not isinstance(addresses, list)
+                or len(addresses) > MAX_BATCH
+                or not all(isinstance(a, str) for a in addresses)
+            ):
+                return 400, {"error": f"expected a list of at most {MAX_BATCH} addresses"}
+            domain = parts[1] + ":"
+            return 200, {a: self.index.lookup(domain, a) for a in addresses}
+        return NOT_FOUND
+
+    async def handle(self, reader, writer):
+        await serve_connection(reader, writer, self._respond)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.reload()
+        self._watcher = asyncio.create_task(self._watch())
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(directory=ARTIFACT_DIR, host="127.0.0.1", port=8080):
+    server = SignatureServer(directory)
+    async with await server.start(host, port):
+        print(f"Serving {server.index.entries} signatures on http://{host}:{port}")
+        await asyncio.Event().wait()
+
+
+async def _client(host, port, requests, interval, start, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    for i, request in enumerate(requests):
+        # Open loop: every request has a scheduled send time, so a slow response
+        # delays the next one and shows up in its latency
+        scheduled = start + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        writer.write(request)
+        await writer.drain()
+        status = await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - scheduled)
+        if not status.startswith(b"HTTP/1.1 200") and not status.startswith(b"HTTP/1.1 404"):
+            errors.append(status)
+    writer.close()
+
+
+def _percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def load_test(
+    url, rps=5000, duration=10, connections=64, domain="whitelist", directory=ARTIFACT_DIR
+):
+    # Replays lookups for the addresses in the served artifact, plus 10% unknown ones
+    host, port = url.split("//", 1)[-1].rstrip("/").split(":")
+    artifact = Path(directory) / f"{domain}.json"
+    known = list(json.loads(artifact.read_text())["signatures"]) if artifact.exists() else []
+
+    total = int(rps * duration)
+    requests = []
+    for _ in range(total):
+        if known and random.random() < 0.9:
+            address = random.choice(known)
+        else:
+            address = "0x" + os.urandom(20).hex()
+        requests.append(f"GET /signature/{domain}/{address} HTTP/1.1\r\nHost: {host}\r\n\r\n")
+
+    latencies, errors = [], []
+    start = time.perf_counter() + 0.1
+    interval = connections / rps
+    await asyncio.gather(
+        *(
+            _client(
+                host,
+                int(port),
+                [r.encode() for r in requests[i::connections]],
+                interval,
+                start + i / rps,
+                latencies,
+                errors,
+            )
+            for i in range(connections)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    print(
+        f"{result['requests']} requests in {elapsed:.2f}s ({result['rps']:.0f} req/s), "
+        f"{result['errors']} errors, p50 {result['p50_ms']:.2f}ms, "
+        f"p99 {result['p99_ms']:.2f}ms, max {result['max_ms']:.2f}ms"
+    )
+    return result
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("--dir", default=ARTIFACT_DIR, type=Path)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", default=8080, type=int)
+    load_parser = commands.add_parser("loadtest")
+    load_parser.add_argument("--url", default="http://127.0.0.1:8080")
+    load_parser.add_argument("--rps", default=5000, type=int)
+    load_parser.add_argument("--duration", default=10, type=float)
+    load_parser.add_argument("--connections", default=64, type=int)
+    load_parser.add_argument(
+        "--domain", default="whitelist", choices=["whitelist", "friend", "allowlist"]
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "serve":
+        asyncio.run(serve(args.dir, args.host, args.port))
+    else:
+        asyncio.run(load_test(args.url, args.rps, args.duration, args.connections, args.domain))
@@ -0,0 +1,302 @@
+"""
+Signs the allowlists in `wl_data/` for every signature domain checked on chain:
+
+    whitelist:  LlamaAuctionHouse.create_wl_bid      wl_data/wl_data.csv
+    friend:     LlamaAuctionHouse.create_friend_bid  wl_data/friend_data.csv
+    allowlist:  Llama.allowlistMint                  wl_data/al_data.csv (address,amount)
+
+Each domain is written to `signatures/<domain>.json`, keyed by checksummed address.
+Signatures are cached in `signatures/cache.db` by (domain, signer, address, amount), so
+a run only signs rows that are new or changed since the last run with the same key, and
+a CSV whose content hash is unchanged is skipped entirely. Delete the file to re-sign
+everything.
+
+    brownie run scripts/signatures.py                        # sign with `llama_deployer`
+    brownie run scripts/signatures.py main llama_signer      # ... or another brownie account
+    brownie run scripts/signatures.py main llama_signer 8    # ... using 8 worker processes
+
+Signing is CPU bound and uses `coincurve` (see requirements.txt) when it is installed,
+falling back to the much slower pure Python backend of `eth_keys`.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from brownie import accounts
+from eth_account import Account
+from eth_keys import keys
+from eth_utils import (
+    is_address,
+    keccak,
+    remove_0x_prefix,
+    to_canonical_address,
+    to_checksum_address,
+)
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+DATA_DIR = Path(__file__).parent.parent / "wl_data"
+OUTPUT_DIR = Path(__file__).parent.parent / "signatures"
+CACHE_NAME = "cache.db"
+
+# Signature domain -> CSV with an `address` column, plus an `amount` column for `allowlist:`
+SOURCES = {
+    "whitelist:": DATA_DIR / "wl_data.csv",
+    "friend:": DATA_DIR / "friend_data.csv",
+    "allowlist:": DATA_DIR / "al_data.csv",
+}
+AMOUNT_DOMAINS = {"allowlist:"}
+
+# Rows handed to a worker at a time; inputs smaller than this are signed in process
+CHUNK_SIZE = 2000
+
+# Signatures timed to estimate how long the cached rows would have taken to sign
+CALIBRATION_SIZE = 200
+
+ETH_SIGNED_MESSAGE_PREFIX = b"\x19Ethereum Signed Message:\n32"
+
+_worker_key = None
+
+
+def _word(value):
+    return value.to_bytes(32, "big")
+
+
+def encode_message(domain, address, amount=None):
+    # Same bytes as `_abi_encode(domain, address[, amount])` in the contracts: the head holds
+    # the offset of the string, the address and the amount, the tail the string itself
+    text = domain.encode()
+    head_size = 64 if amount is None else 96
+    head = _word(head_size) + bytes(12) + to_canonical_address(address)
+    if amount is not None:
+        head += _word(amount)
+    padding = bytes(-len(text) % 32)
+    return head + _word(len(text)) + text + padding
+
+
+def message_hash(domain, address, amount=None):
+    return keccak(ETH_SIGNED_MESSAGE_PREFIX + keccak(encode_message(domain, address, amount)))
+
+
+def _load_key(private_key):
+    secret = bytes.fromhex(remove_0x_prefix(private_key))
+    if coincurve is not None:
+        return coincurve.PrivateKey(secret)
+    return keys.PrivateKey(secret)
+
+
+def sign(key, domain, address, amount=None):
+    # `key` is a hex private key, or a key returned by `_load_key` when signing many rows
+    if isinstance(key, str):
+        key = _load_key(key)
+    digest = message_hash(domain, address, amount)
+    if coincurve is not None:
+        signature = bytearray(key.sign_recoverable(digest, hasher=None))
+    else:
+        signature = bytearray(key.sign_msg_hash(digest).to_bytes())
+    # Both backends return the recovery id, the contracts expect `v` to be 27 or 28
+    signature[64] += 27
+    return "0x" + signature.hex()
+
+
+def read_rows(path, with_amount=False):
+    # Streams `(checksummed address, amount)` from a CSV, skipping repeated addresses.
+    # Malformed addresses, and an address listed twice with different amounts, are errors.
+    seen = {}
+    with open(path, newline="") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            raw = (row.get("address") or "").strip()
+            if not raw:
+                continue
+            if not is_address(raw):
+                raise ValueError(f"{path}:{line}: invalid address {raw!r}")
+            address = to_checksum_address(raw)
+            amount = int(row["amount"]) if with_amount else None
+            if address in seen:
+                if seen[address] != amount:
+                    raise ValueError(f"{path}:{line}: conflicting amounts for {address}")
+                continue
+            seen[address] = amount
+            yield address, amount
+
+
+def _init_worker(private_key):
+    global _worker_key
+    _worker_key = _load_key(private_key)
+
+
+def _sign_chunk(domain, rows):
+    return [(address, sign(_worker_key, domain, address, amount)) for address, amount in rows]
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def sign_rows(private_key, domain, rows, workers=None):
+    # Returns {address: signature}, signing chunks of `rows` across a process pool
+    chunks = list(_chunks(rows, CHUNK_SIZE))
+    if len(chunks) <= 1:
+        _init_worker(private_key)
+        return dict(pair for chunk in chunks for pair in _sign_chunk(domain, chunk))
+
+    signatures = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(private_key,)) as pool:
+        for signed in pool.map(_sign_chunk, [domain] * len(chunks), chunks):
+            signatures.update(signed)
+    return signatures
+
+
+def output_path(domain, output_dir=OUTPUT_DIR):
+    return Path(output_dir) / f"{domain.rstrip(':')}.json"
+
+
+def write_artifact(path, domain, signer, rows, signatures):
+    if domain in AMOUNT_DOMAINS:
+        entries = {a: {"amount": amount, "signature": signatures[a]} for a, amount in rows}
+    else:
+        entries = {a: {"signature": signatures[a]} for a, _ in rows}
+    artifact = {"domain": domain, "signer": signer, "signatures": entries}
+    path.parent.mkdir(exist_ok=True)
+    # Written aside and moved into place, so readers never see a partial artifact
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(artifact, separators=(",", ":"), sort_keys=True) + "\n")
+    os.replace(tmp, path)
+
+
+def open_cache(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS signatures (
+            domain TEXT NOT NULL,
+            signer TEXT NOT NULL,
+            address TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            signature TEXT NOT NULL,
+            PRIMARY KEY (domain, signer, address, amount)
+        );
+        CREATE TABLE IF NOT EXISTS sources (
+            domain TEXT NOT NULL,
+            signer TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            PRIMARY KEY (domain, signer)
+        );
+        """
+    )
+    return conn
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cached_hash(conn, domain, signer):
+    row = conn.execute(
+        "SELECT content_hash FROM sources WHERE domain = ? AND signer = ?", (domain, signer)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _cached_signatures(conn, domain, signer):
+    # Amounts are stored as 0 for the domains that do not sign one
+    rows = conn.execute(
+        "SELECT address, amount, signature FROM signatures WHERE domain = ? AND signer = ?",
+        (domain, signer),
+    )
+    return {(address, amount): signature for address, amount, signature in rows}
+
+
+def _store(conn, domain, signer, content_hash, rows, signatures):
+    # Replaces every cached row of (domain, signer), which drops removed addresses and
+    # superseded amounts
+    with conn:
+        conn.execute("DELETE FROM signatures WHERE domain = ? AND signer = ?", (domain, signer))
+        conn.executemany(
+            "INSERT INTO signatures VALUES (?, ?, ?, ?, ?)",
+            ((domain, signer, a, amount or 0, signatures[a]) for a, amount in rows),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (domain, signer, content_hash)
+        )
+
+
+def _seconds_per_signature(private_key):
+    key = _load_key(private_key)
+    start = time.perf_counter()
+    for i in range(CALIBRATION_SIZE):
+        sign(key, "calibration:", to_checksum_address(_word(i)[12:]))
+    return (time.perf_counter() - start) / CALIBRATION_SIZE
+
+
+def sign_all(private_key, sources=SOURCES, output_dir=OUTPUT_DIR, workers=None):
+    # Returns {domain: stats} for every source that exists
+    signer = Account.from_key(private_key).address
+    Path(output_dir).mkdir(exist_ok=True)
+    conn = open_cache(Path(output_dir) / CACHE_NAME)
+    per_signature = _seconds_per_signature(private_key)
+    stats = {}
+    for domain, path in sources.items():
+        if not Path(path).exists():
+            print(f"{domain:<11} skipped, {path} does not exist")
+            continue
+        start = time.perf_counter()
+        content_hash = _content_hash(path)
+        artifact = output_path(domain, output_dir)
+        cached = _cached_signatures(conn, domain, signer)
+
+        if artifact.exists() and _cached_hash(conn, domain, signer) == content_hash:
+            addresses, missing, removed = len(cached), [], 0
+        else:
+            rows = list(read_rows(path, with_amount=domain in AMOUNT_DOMAINS))
+            missing = [(a, amount) for a, amount in rows if (a, amount or 0) not in cached]
+            signed = sign_rows(private_key, domain, missing, workers)
+            signatures = {a: signed.get(a) or cached[a, amount or 0] for a, amount in rows}
+            addresses = len(rows)
+            removed = len({a for a, _ in cached if a not in signatures})
+            write_artifact(artifact, domain, signer, rows, signatures)
+            _store(conn, domain, signer, content_hash, rows, signatures)
+
+        hits = addresses - len(missing)
+        stats[domain] = {
+            "path": artifact,
+            "addresses": addresses,
+            "hits": hits,
+            "signed": len(missing),
+            "removed": removed,
+            "seconds": time.perf_counter() - start,
+            "saved": hits * per_signature,
+        }
+        hit_rate = hits / addresses if addresses else 1
+        print(
+            f"{domain:<11} {addresses} addresses: {hits} cached ({hit_rate:.1%}), "
+            f"{len(missing)} signed, {removed} removed in {stats[domain]['seconds']:.2f}s "
+            f"(~{stats[domain]['saved']:.2f}s of signing saved) -> {artifact}"
+        )
+    conn.close()
+    return stats
+
+
+def main(signer_id="llama_deployer", workers=None):
+    signer = accounts.load(signer_id)
+    sign_all(signer.private_key, workers=int(workers) if workers else None)
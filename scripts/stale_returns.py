@@ -0,0 +1,210 @@
+"""
+Plans and sends the `withdraw_stale` sweeps that refund every unclaimed pending return of
+LlamaAuctionHouse in as few transactions as possible.
+
+Every bidder that was ever outbid may have pending returns, so the candidates are the
+senders of `AuctionBid` logs since `start_block`, the block the auction house was deployed
+in. When the indexer database exists it must have indexed the auction house, and it is
+read for the blocks from its start block to its checkpoint, while the logs of the blocks
+before and after are read from the chain. Their `pending_returns` are then read in
+JSON-RPC batches and the nonzero ones are packed into batches of at most
+ADMIN_MAX_WITHDRAWALS addresses whose estimated gas fits in `max_gas`. Each batch is taken
+as large as it can be, so a sweep of N addresses takes N / ADMIN_MAX_WITHDRAWALS
+transactions, rounded up, unless the gas bound is lower.
+
+`plan` runs on a fork: it sends the batches there one after the other as the owner and
+writes them, with the gas each one used, to `refunds/withdraw_stale.json`. `send` sends
+the planned batches on the live network, dropping addresses that withdrew in the meantime.
+
+    brownie run scripts/stale_returns.py plan <auction_house> --network mainnet-fork
+    brownie run scripts/stale_returns.py plan <auction_house> <start_block> <max_gas> ...
+    brownie run scripts/stale_returns.py send <auction_house> <account_id> --network mainnet
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from brownie import LlamaAuctionHouse, accounts, network, web3
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+
+from scripts import indexer
+from scripts.batch_reads import BatchClient, function_call
+
+PLAN_PATH = Path(__file__).parent.parent / "refunds" / "withdraw_stale.json"
+
+# Bound of the `addresses` argument of withdraw_stale
+ADMIN_MAX_WITHDRAWALS = 100
+# Gas budget of one sweep transaction
+MAX_GAS = 3_000_000
+# Gas limit sent on the live network, over the gas the batch used on the fork
+GAS_MARGIN = 1.2
+
+
+def bidders_from_db(auction_house, db_path=indexer.DB_PATH):
+    # Returns every bidder of `auction_house` indexed by scripts/indexer.py, in the order they
+    # first bid, and the first and last indexed blocks. Raises ValueError if the database did
+    # not index `auction_house`.
+    conn = sqlite3.connect(db_path)
+    try:
+        contract = conn.execute(
+            "SELECT start_block FROM contracts WHERE address = ?", (auction_house.address,)
+        ).fetchone()
+        if contract is None:
+            raise ValueError(f"{db_path} did not index {auction_house.address}")
+        checkpoint = conn.execute("SELECT block_number FROM checkpoint WHERE id = 0").fetchone()
+        rows = conn.execute(
+            "SELECT bids.bidder FROM bids JOIN logs USING (block_number, log_index) "
+            "WHERE logs.address = ? ORDER BY block_number, log_index",
+            (auction_house.address,),
+        ).fetchall()
+    except sqlite3.OperationalError as e:
+        # A database from before the contracts table
+        raise ValueError(f"{db_path} did not index {auction_house.address}: {e}")
+    finally:
+        conn.close()
+    first_block = contract[0]
+    last_block = checkpoint[0] if checkpoint else first_block - 1
+    return list(dict.fromkeys(bidder for bidder, in rows)), first_block, last_block
+
+
+def bidders_from_logs(auction_house, start_block=0, batch_size=indexer.BATCH_SIZE, end_block=None):
+    # Returns the sender of every AuctionBid log from `start_block` to `end_block`, the head by
+    # default, in the order they first bid
+    event_abi = next(
+        item
+        for item in auction_house.abi
+        if item["type"] == "event" and item["name"] == "AuctionBid"
+    )
+    topic = "0x" + event_abi_to_log_topic(event_abi).hex()
+    bidders = {}
+    head = web3.eth.block_number if end_block is None else end_block
+    for first in range(start_block, head + 1, batch_size):
+        logs = web3.eth.get_logs(
+            {
+                "address": auction_house.address,
+                "topics": [topic],
+                "fromBlock": first,
+                "toBlock": min(first + batch_size - 1, head),
+            }
+        )
+        for log in logs:
+            bidders.setdefault(get_event_data(web3.codec, event_abi, log)["args"]["_sender"])
+    return list(bidders)
+
+
+def collect_bidders(auction_house, start_block=0, db_path=indexer.DB_PATH):
+    # Returns every bidder from `start_block`, the block the auction house was deployed in,
+    # reading the blocks the database covers from it and the others from the chain
+    if not Path(db_path).exists():
+        return bidders_from_logs(auction_house, start_block)
+    bidders, first_block, last_block = bidders_from_db(auction_house, db_path)
+    before = []
+    if start_block < first_block:
+        before = bidders_from_logs(auction_house, start_block, end_block=first_block - 1)
+    after = bidders_from_logs(auction_house, max(start_block, last_block + 1))
+    return list(dict.fromkeys(before + bidders + after))
+
+
+def outstanding(auction_house, addresses, client=None):
+    # Returns {address: pending returns} for the addresses with pending returns, read in
+    # batches with `client` or one call at a time without it
+    if client is None:
+        amounts = [auction_house.pending_returns(address) for address in addresses]
+    else:
+        results = client.call(
+            [function_call(auction_house, "pending_returns", address) for address in addresses]
+        )
+        failed = [address for address, result in zip(addresses, results) if not result.success]
+        if failed:
+            raise RuntimeError(f"Cannot read the pending returns of {failed}")
+        amounts = [result.value for result in results]
+    return {address: amount for address, amount in zip(addresses, amounts) if amount > 0}
+
+
+def pack(addresses, estimate, max_gas=MAX_GAS, max_batch=ADMIN_MAX_WITHDRAWALS):
+    # Splits `addresses` into consecutive batches of at most `max_batch` addresses whose
+    # `estimate(batch)` gas is at most `max_gas`, taking the largest batch that fits each time
+    batches = []
+    start = 0
+    while start < len(addresses):
+        size = min(max_batch, len(addresses) - start)
+        if estimate(addresses[start : start + size]) > max_gas:
+            # The gas grows with the batch, so search for the largest size that fits
+            low, high = 0, size
+            while low < high - 1:
+                middle = (low + high) // 2
+                if estimate(addresses[start : start + middle]) <= max_gas:
+                    low = middle
+                else:
+                    high = middle
+            if low == 0:
+                raise ValueError(f"{addresses[start]} alone needs more than {max_gas} gas")
+            size = low
+        batches.append(addresses[start : start + size])
+        start += size
+    return batches
+
+
+def simulate(auction_house, owner, batches):
+    # Sends `batches` in order and returns the gas each one used. Only for a fork.
+    gas_used = []
+    for batch in batches:
+        tx = auction_house.withdraw_stale(batch, {"from": owner})
+        remaining = [address for address in batch if auction_house.pending_returns(address)]
+        if remaining:
+            raise RuntimeError(f"Pending returns left after the sweep: {remaining}")
+        gas_used.append(tx.gas_used)
+    return gas_used
+
+
+def plan(auction_house, start_block=0, max_gas=MAX_GAS):
+    active = network.show_active()
+    if not (active.endswith("-fork") or active == "development"):
+        raise SystemExit(f"Plan on a fork of the network, not on {active}")
+    auction_house = LlamaAuctionHouse.at(auction_house)
+    owner = accounts.at(auction_house.owner(), force=True)
+
+    bidders = collect_bidders(auction_house, int(start_block))
+    pending = outstanding(auction_house, bidders, BatchClient(web3.provider.endpoint_uri))
+
+    def estimate(batch):
+        return auction_house.withdraw_stale.estimate_gas(batch, {"from": owner})
+
+    batches = pack(list(pending), estimate, int(max_gas))
+    gas_used = simulate(auction_house, owner, batches)
+
+    PLAN_PATH.parent.mkdir(exist_ok=True)
+    PLAN_PATH.write_text(
+        json.dumps(
+            {
+                "auction_house": auction_house.address,
+                "batches": [
+                    {"addresses": batch, "gas_used": gas} for batch, gas in zip(batches, gas_used)
+                ],
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(
+        f"{len(bidders)} bidders, {len(pending)} with {sum(pending.values())} wei of pending "
+        f"returns, in {len(batches)} transactions using {sum(gas_used)} gas -> {PLAN_PATH}"
+    )
+
+
+def send(auction_house, account_id):
+    account = accounts.load(account_id)
+    sweep = json.loads(PLAN_PATH.read_text())
+    auction_house = LlamaAuctionHouse.at(auction_house)
+    if sweep["auction_house"] != auction_house.address:
+        raise SystemExit(f"{PLAN_PATH} was planned for {sweep['auction_house']}")
+    client = BatchClient(web3.provider.endpoint_uri)
+    for batch in sweep["batches"]:
+        addresses = list(outstanding(auction_house, batch["addresses"], client))
+        if not addresses:
+            continue
+        auction_house.withdraw_stale(
+            addresses, {"from": account, "gas_limit": int(batch["gas_used"] * GAS_MARGIN)}
+        )
@@ -1,8 +1,7 @@
 import brownie
-from brownie import chain, web3, ZERO_ADDRESS
-from eth_abi import encode
-from eth_account import Account
-from eth_account.messages import encode_defunct
+from brownie import accounts, chain, ZERO_ADDRESS
+
+from scripts import merkle
 
 
 # Helper methods
@@ -116,6 +115,13 @@ def test_set_wl_signer(auction_house, alice):
     assert auction_house.wl_signer() == alice
 
 
+def test_set_merkle_roots(auction_house):
+    auction_house.set_wl_merkle_root("0x" + "11" * 32)
+    auction_house.set_friend_merkle_root("0x" + "22" * 32)
+    assert auction_house.wl_merkle_root() == "0x" + "11" * 32
+    assert auction_house.friend_merkle_root() == "0x" + "22" * 32
+
+
 def test_enable_disable_wl(auction_house):
     assert auction_house.wl_enabled()
     auction_house.disable_wl()
@@ -162,6 +168,13 @@ def test_set_wl_signer_not_owner(auction_house, alice):
         auction_house.set_wl_signer(alice, {"from": alice})
 
 
+def test_set_merkle_roots_not_owner(auction_house, alice):
+    with brownie.reverts("Caller is not the owner"):
+        auction_house.set_wl_merkle_root("0x" + "11" * 32, {"from": alice})
+    with brownie.reverts("Caller is not the owner"):
+        auction_house.set_friend_merkle_root("0x" + "11" * 32, {"from": alice})
+
+
 def test_pause_not_owner(auction_house, alice):
     with brownie.reverts("Caller is not the owner"):
         auction_house.pause({"from": alice})
@@ -180,40 +193,31 @@ def test_withdraw_stale_not_owner(auction_house, alice):
 # WL Bidding
 
 
-def test_create_friend_bid(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["friend:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_friend_bid(auction_house_unpaused, alice, signer):
+    signature = signer.sign("friend:", alice)
     auction_house_unpaused.create_friend_bid(
-        20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+        20, 100, signature, {"from": alice, "value": "100 wei"}
     )
     current_auction = auction_house_unpaused.auction()
     assert current_auction["bidder"] == alice
     assert current_auction["amount"] == 100
 
 
-def test_create_friend_bid_wl_disabled(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["friend:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_friend_bid_wl_disabled(auction_house_unpaused, alice, signer):
+    signature = signer.sign("friend:", alice)
     auction_house_unpaused.disable_wl()
     with brownie.reverts("WL auction is not enabled"):
         auction_house_unpaused.create_friend_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
 def test_create_friend_bid_after_already_winning_one_auction(
-    token, auction_house_unpaused, alice, deployer
+    token, auction_house_unpaused, alice, signer
 ):
-    alice_encoded = encode(["string", "address"], ["friend:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+    signature = signer.sign("friend:", alice)
     auction_house_unpaused.create_friend_bid(
-        20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+        20, 100, signature, {"from": alice, "value": "100 wei"}
     )
     current_auction = auction_house_unpaused.auction()
     assert current_auction["bidder"] == alice
@@ -227,116 +231,157 @@ def test_create_friend_bid_after_already_winning_one_auction(
 
     with brownie.reverts("Already won 1 WL auction"):
         auction_house_unpaused.create_friend_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
-def test_wl_signature_cannot_be_used_for_friend_bid(token, auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_wl_signature_cannot_be_used_for_friend_bid(token, auction_house_unpaused, alice, signer):
+    signature = signer.sign("whitelist:", alice)
     with brownie.reverts("Signature is invalid"):
         auction_house_unpaused.create_friend_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
-def test_create_wl_bid(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
-    auction_house_unpaused.create_wl_bid(
-        20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+def test_create_wl_bid(auction_house_unpaused, alice, signer):
+    signature = signer.sign("whitelist:", alice)
+    auction_house_unpaused.create_wl_bid(20, 100, signature, {"from": alice, "value": "100 wei"})
+    current_auction = auction_house_unpaused.auction()
+    assert current_auction["bidder"] == alice
+    assert current_auction["amount"] == 100
+
+
+def test_create_wl_bid_with_proof(auction_house_unpaused, alice, bob):
+    levels = merkle.build_tree([merkle.leaf("whitelist:", a.address) for a in (alice, bob)])
+    auction_house_unpaused.set_wl_merkle_root(merkle.root(levels))
+    proof = merkle.proofs(levels)[merkle.leaf("whitelist:", alice.address)]
+    auction_house_unpaused.create_wl_bid_with_proof(
+        20, 100, proof, {"from": alice, "value": "100 wei"}
     )
     current_auction = auction_house_unpaused.auction()
     assert current_auction["bidder"] == alice
     assert current_auction["amount"] == 100
 
 
+def test_create_friend_bid_with_proof(auction_house_unpaused, alice, bob):
+    levels = merkle.build_tree([merkle.leaf("friend:", a.address) for a in (alice, bob)])
+    auction_house_unpaused.set_friend_merkle_root(merkle.root(levels))
+    proof = merkle.proofs(levels)[merkle.leaf("friend:", alice.address)]
+    auction_house_unpaused.create_friend_bid_with_proof(
+        20, 100, proof, {"from": alice, "value": "100 wei"}
+    )
+    assert auction_house_unpaused.auction()["bidder"] == alice
+
+
+def test_wl_proof_cannot_be_used_for_friend_bid(auction_house_unpaused, alice, bob):
+    levels = merkle.build_tree([merkle.leaf("whitelist:", a.address) for a in (alice, bob)])
+    auction_house_unpaused.set_wl_merkle_root(merkle.root(levels))
+    auction_house_unpaused.set_friend_merkle_root(merkle.root(levels))
+    proof = merkle.proofs(levels)[merkle.leaf("whitelist:", alice.address)]
+    with brownie.reverts("Proof is invalid"):
+        auction_house_unpaused.create_friend_bid_with_proof(
+            20, 100, proof, {"from": alice, "value": "100 wei"}
+        )
+
+
+def test_create_wl_bid_with_proof_wl_disabled(auction_house_unpaused, alice, bob):
+    levels = merkle.build_tree([merkle.leaf("whitelist:", a.address) for a in (alice, bob)])
+    auction_house_unpaused.set_wl_merkle_root(merkle.root(levels))
+    auction_house_unpaused.disable_wl()
+    proof = merkle.proofs(levels)[merkle.leaf("whitelist:", alice.address)]
+    with brownie.reverts("WL auction is not enabled"):
+        auction_house_unpaused.create_wl_bid_with_proof(
+            20, 100, proof, {"from": alice, "value": "100 wei"}
+        )
+
+
 def test_create_bid_wl_enabled(auction_house_unpaused, alice):
     with brownie.reverts("Public auction is not enabled"):
         auction_house_unpaused.create_bid(20, 100, {"from": alice, "value": "100 wei"})
 
 
-def test_create_wl_bid_invalid_signature(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["blah:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_invalid_signature(auction_house_unpaused, alice, signer):
+    signature = signer.sign("blah:", alice)
+    with brownie.reverts("Signature is invalid"):
+        auction_house_unpaused.create_wl_bid(
+            20, 100, signature, {"from": alice, "value": "100 wei"}
+        )
+
+
+def test_create_wl_bid_tampered_signature(auction_house_unpaused, alice, signer):
     with brownie.reverts("Signature is invalid"):
         auction_house_unpaused.create_wl_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signer.tampered("whitelist:", alice), {"from": alice, "value": "100 wei"}
         )
 
 
-def test_create_wl_bid_wl_not_enabled(auction_house_unpaused, alice, deployer):
+def test_create_wl_bid_wrong_domain_signature(auction_house_unpaused, alice, signer):
+    with brownie.reverts("Signature is invalid"):
+        auction_house_unpaused.create_wl_bid(
+            20, 100, signer.wrong_domain("whitelist:", alice), {"from": alice, "value": "100 wei"}
+        )
+
+
+def test_create_wl_bid_many_bidders(auction_house_unpaused, signer):
+    bidders = accounts[1:10]
+    amounts = [100 * 2**i for i in range(len(bidders))]
+    for bidder, amount, signature in zip(bidders, amounts, signer.sign_many("whitelist:", bidders)):
+        auction_house_unpaused.create_wl_bid(
+            20, amount, signature, {"from": bidder, "value": f"{amount} wei"}
+        )
+    current_auction = auction_house_unpaused.auction()
+    assert current_auction["bidder"] == bidders[-1]
+    assert current_auction["amount"] == amounts[-1]
+    for bidder, amount in zip(bidders[:-1], amounts):
+        assert auction_house_unpaused.pending_returns(bidder) == amount
+
+
+def test_create_wl_bid_wl_not_enabled(auction_house_unpaused, alice, signer):
     auction_house_unpaused.disable_wl()
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+    signature = signer.sign("whitelist:", alice)
     with brownie.reverts("WL auction is not enabled"):
         auction_house_unpaused.create_wl_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
-def test_create_wl_bid_wrong_llama_id(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_wrong_llama_id(auction_house_unpaused, alice, signer):
+    signature = signer.sign("whitelist:", alice)
     with brownie.reverts("Llama not up for auction"):
         auction_house_unpaused.create_wl_bid(
-            21, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            21, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
-def test_create_wl_bid_auction_expired(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_auction_expired(auction_house_unpaused, alice, signer):
+    signature = signer.sign("whitelist:", alice)
     chain.sleep(1000)
     with brownie.reverts("Auction expired"):
         auction_house_unpaused.create_wl_bid(
-            20, 100, signed_message.signature, {"from": alice, "value": "100 wei"}
+            20, 100, signature, {"from": alice, "value": "100 wei"}
         )
 
 
-def test_create_wl_bid_less_than_reserve_price(auction_house_unpaused, alice, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_less_than_reserve_price(auction_house_unpaused, alice, signer):
+    signature = signer.sign("whitelist:", alice)
     with brownie.reverts("Must send at least reservePrice"):
-        auction_house_unpaused.create_wl_bid(
-            20, 99, signed_message.signature, {"from": alice, "value": "99 wei"}
-        )
+        auction_house_unpaused.create_wl_bid(20, 99, signature, {"from": alice, "value": "99 wei"})
 
 
-def test_create_wl_bid_not_over_prev_bid(auction_house_unpaused, alice, bob, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    alice_signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_not_over_prev_bid(auction_house_unpaused, alice, bob, signer):
+    alice_signature = signer.sign("whitelist:", alice)
     auction_house_unpaused.create_wl_bid(
-        20, 100, alice_signed_message.signature, {"from": alice, "value": "100 wei"}
+        20, 100, alice_signature, {"from": alice, "value": "100 wei"}
     )
     bid_before = auction_house_unpaused.auction()
     assert bid_before["bidder"] == alice
     assert bid_before["amount"] == 100
 
-    bob_encoded = encode(["string", "address"], ["whitelist:", bob.address])
-    bob_hashed = web3.keccak(bob_encoded)
-    bob_signable_message = encode_defunct(bob_hashed)
-    bob_signed_message = Account.sign_message(bob_signable_message, deployer.private_key)
+    bob_signature = signer.sign("whitelist:", bob)
 
     with brownie.reverts("Must send more than last bid by min_bid_increment_percentage amount"):
         auction_house_unpaused.create_wl_bid(
-            20, 101, bob_signed_message.signature, {"from": bob, "value": "101 wei"}
+            20, 101, bob_signature, {"from": bob, "value": "101 wei"}
         )
 
     bid_after = auction_house_unpaused.auction()
@@ -345,14 +390,11 @@ def test_create_wl_bid_not_over_prev_bid(auction_house_unpaused, alice, bob, dep
 
 
 def test_create_wl_bid_can_only_win_two_wl_auctions(
-    token, auction_house_unpaused, alice, bob, deployer
+    token, auction_house_unpaused, alice, bob, signer
 ):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    alice_signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+    alice_signature = signer.sign("whitelist:", alice)
     auction_house_unpaused.create_wl_bid(
-        20, 100, alice_signed_message.signature, {"from": alice, "value": "100 wei"}
+        20, 100, alice_signature, {"from": alice, "value": "100 wei"}
     )
     bid_before = auction_house_unpaused.auction()
     assert bid_before["bidder"] == alice
@@ -366,7 +408,7 @@ def test_create_wl_bid_can_only_win_two_wl_auctions(
     assert auction_house_unpaused.auction()["llama_id"] == 21
 
     auction_house_unpaused.create_wl_bid(
-        21, 100, alice_signed_message.signature, {"from": alice, "value": "100 wei"}
+        21, 100, alice_signature, {"from": alice, "value": "100 wei"}
     )
     chain.sleep(1000)
     auction_house_unpaused.settle_current_and_create_new_auction()
@@ -378,18 +420,13 @@ def test_create_wl_bid_can_only_win_two_wl_auctions(
     # Alice can't win any more wl auctions.
     with brownie.reverts("Already won 2 WL auctions"):
         auction_house_unpaused.create_wl_bid(
-            22, 100, alice_signed_message.signature, {"from": alice, "value": "100 wei"}
+            22, 100, alice_signature, {"from": alice, "value": "100 wei"}
         )
 
     # Bob can still win a wl auction.
-    bob_encoded = encode(["string", "address"], ["whitelist:", bob.address])
-    bob_hashed = web3.keccak(bob_encoded)
-    bob_signable_message = encode_defunct(bob_hashed)
-    bob_signed_message = Account.sign_message(bob_signable_message, deployer.private_key)
+    bob_signature = signer.sign("whitelist:", bob)
 
-    auction_house_unpaused.create_wl_bid(
-        22, 100, bob_signed_message.signature, {"from": bob, "value": "100 wei"}
-    )
+    auction_house_unpaused.create_wl_bid(22, 100, bob_signature, {"from": bob, "value": "100 wei"})
     chain.sleep(1000)
     auction_house_unpaused.settle_current_and_create_new_auction()
 
@@ -398,26 +435,18 @@ def test_create_wl_bid_can_only_win_two_wl_auctions(
     assert auction_house_unpaused.auction()["llama_id"] == 23
 
 
-def test_create_wl_bid_using_pending_returns(token, auction_house_unpaused, alice, bob, deployer):
-    alice_encoded = encode(["string", "address"], ["whitelist:", alice.address])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    alice_signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
+def test_create_wl_bid_using_pending_returns(token, auction_house_unpaused, alice, bob, signer):
+    alice_signature = signer.sign("whitelist:", alice)
     auction_house_unpaused.create_wl_bid(
-        20, 100, alice_signed_message.signature, {"from": alice, "value": "100 wei"}
+        20, 100, alice_signature, {"from": alice, "value": "100 wei"}
     )
     auction_1 = auction_house_unpaused.auction()
     assert auction_1["bidder"] == alice
     assert auction_1["amount"] == 100
 
-    bob_encoded = encode(["string", "address"], ["whitelist:", bob.address])
-    bob_hashed = web3.keccak(bob_encoded)
-    bob_signable_message = encode_defunct(bob_hashed)
-    bob_signed_message = Account.sign_message(bob_signable_message, deployer.private_key)
+    bob_signature = signer.sign("whitelist:", bob)
 
-    auction_house_unpaused.create_wl_bid(
-        20, 200, bob_signed_message.signature, {"from": bob, "value": "200 wei"}
-    )
+    auction_house_unpaused.create_wl_bid(20, 200, bob_signature, {"from": bob, "value": "200 wei"})
 
     auction_2 = auction_house_unpaused.auction()
     assert auction_2["bidder"] == bob
@@ -426,7 +455,7 @@ def test_create_wl_bid_using_pending_returns(token, auction_house_unpaused, alic
     assert auction_house_unpaused.pending_returns(alice) == 100
 
     auction_house_unpaused.create_wl_bid(
-        20, 300, alice_signed_message.signature, {"from": alice, "value": "200 wei"}
+        20, 300, alice_signature, {"from": alice, "value": "200 wei"}
     )
 
     auction_3 = auction_house_unpaused.auction()
@@ -435,7 +464,7 @@ def test_create_wl_bid_using_pending_returns(token, auction_house_unpaused, alic
     assert auction_house_unpaused.pending_returns(alice) == 0
 
     auction_house_unpaused.create_wl_bid(
-        20, 1000, bob_signed_message.signature, {"from": bob, "value": "1000 wei"}
+        20, 1000, bob_signature, {"from": bob, "value": "1000 wei"}
     )
 
     auction_4 = auction_house_unpaused.auction()
@@ -640,6 +669,65 @@ def test_withdraw_zero_pending(auction_house, alice):
     assert balance_before == balance_after
 
 
+def test_claim_proceeds(auction_house_unpaused, deployer, split_recipient, alice):
+    auction_house_unpaused.disable_wl()
+    auction_house_unpaused.create_bid(20, 1000, {"from": alice, "value": "1000 wei"})
+    chain.sleep(1000)
+    auction_house_unpaused.settle_current_and_create_new_auction()
+    deployer_balance_before = deployer.balance()
+    split_recipient_before = split_recipient.balance()
+    tx = auction_house_unpaused.claim_proceeds([deployer, split_recipient], {"from": alice})
+    assert deployer.balance() == deployer_balance_before + 50
+    assert split_recipient.balance() == split_recipient_before + 950
+    assert auction_house_unpaused.pending_proceeds(deployer) == 0
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 0
+    assert auction_house_unpaused.balance() == 0
+    assert [(event["_recipient"], event["_amount"]) for event in tx.events["ProceedsClaimed"]] == [
+        (deployer, 50),
+        (split_recipient, 950),
+    ]
+
+
+def test_claim_proceeds_accumulates(auction_house_unpaused, deployer, split_recipient, alice):
+    auction_house_unpaused.disable_wl()
+    for llama_id in (20, 21):
+        auction_house_unpaused.create_bid(llama_id, 1000, {"from": alice, "value": "1000 wei"})
+        chain.sleep(1000)
+        auction_house_unpaused.settle_current_and_create_new_auction()
+    assert auction_house_unpaused.pending_proceeds(deployer) == 100
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 1900
+    split_recipient_before = split_recipient.balance()
+    auction_house_unpaused.claim_proceeds([split_recipient, split_recipient])
+    # Claiming twice in one batch pays once
+    assert split_recipient.balance() == split_recipient_before + 1900
+    assert auction_house_unpaused.pending_proceeds(deployer) == 100
+
+
+def test_claim_proceeds_none_pending(auction_house, alice):
+    balance_before = alice.balance()
+    tx = auction_house.claim_proceeds([alice])
+    assert alice.balance() == balance_before
+    assert "ProceedsClaimed" not in tx.events
+
+
+def test_settle_with_reverting_owner(
+    token, auction_house_unpaused, deployer, split_recipient, tokenReceiver, alice
+):
+    # The owner cannot receive ETH, which no longer blocks settlement
+    auction_house_unpaused.disable_wl()
+    auction_house_unpaused.set_owner(tokenReceiver, {"from": deployer})
+    auction_house_unpaused.create_bid(20, 1000, {"from": alice, "value": "1000 wei"})
+    chain.sleep(1000)
+    auction_house_unpaused.settle_current_and_create_new_auction()
+    assert token.ownerOf(20) == alice
+    assert auction_house_unpaused.auction()["llama_id"] == 21
+    assert auction_house_unpaused.pending_proceeds(tokenReceiver) == 50
+    auction_house_unpaused.claim_proceeds([split_recipient])
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 0
+    with brownie.reverts():
+        auction_house_unpaused.claim_proceeds([tokenReceiver])
+
+
 def test_withdraw_stale(token, auction_house_unpaused, deployer, split_recipient, alice, bob):
     balance_of_alice_before = alice.balance()
     balance_of_deployer_before = deployer.balance()
@@ -650,16 +738,17 @@ def test_withdraw_stale(token, auction_house_unpaused, deployer, split_recipient
     auction_house_unpaused.settle_current_and_create_new_auction()
 
     assert token.ownerOf(20) == bob
-    assert deployer.balance() == balance_of_deployer_before + 10
-    assert split_recipient.balance() == balance_of_split_recipient_before + 190
+    assert auction_house_unpaused.pending_proceeds(deployer) == 10
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 190
     assert alice.balance() == balance_of_alice_before - 100
     assert auction_house_unpaused.pending_returns(alice) == 100
     auction_house_unpaused.withdraw_stale([alice])
     assert auction_house_unpaused.pending_returns(alice) == 0
     assert alice.balance() == balance_of_alice_before - 5  # Alice gets a 5% penalty
     assert (
-        deployer.balance() == balance_of_deployer_before + 15
+        deployer.balance() == balance_of_deployer_before + 5
     )  # The owner takes 5% of alices pending returns
+    assert split_recipient.balance() == balance_of_split_recipient_before
 
 
 def test_withdraw_stale_user_has_no_pending_withdraws(auction_house_unpaused, alice, bob, charlie):
@@ -724,15 +813,11 @@ def test_settle_auction_with_bid(token, deployer, auction_house_unpaused, alice,
     auction_house_unpaused.create_bid(20, 100, {"from": alice, "value": "100 wei"})
     chain.sleep(1000)
     auction_house_unpaused.pause()
-    deployer_balance_before = deployer.balance()
-    split_recipient_before = split_recipient.balance()
     auction_house_unpaused.settle_auction()
-    deployer_balance_after = deployer.balance()
-    split_recipient_after = split_recipient.balance()
     assert auction_house_unpaused.auction()["settled"]
     assert token.ownerOf(20) == alice
-    assert deployer_balance_after == deployer_balance_before + 5
-    assert split_recipient_after == split_recipient_before + 95
+    assert auction_house_unpaused.pending_proceeds(deployer) == 5
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 95
 
 
 def test_settle_current_and_create_new_auction_with_bid_smart_contract_owner(
@@ -744,6 +829,7 @@ def test_settle_current_and_create_new_auction_with_bid_smart_contract_owner(
     deployer_balance_before = smart_contract_owner.balance()
     split_recipient_before = split_recipient.balance()
     auction_house_sc_owner.settle_current_and_create_new_auction()
+    auction_house_sc_owner.claim_proceeds([smart_contract_owner, split_recipient])
     deployer_balance_after = smart_contract_owner.balance()
     split_recipient_after = split_recipient.balance()
     assert auction_house_sc_owner.auction()["llama_id"] == 21
@@ -760,16 +846,12 @@ def test_settle_current_and_create_new_auction_with_bid(
     old_auction_id = auction_house_unpaused.auction()["llama_id"]
     auction_house_unpaused.create_bid(20, 100, {"from": alice, "value": "100 wei"})
     chain.sleep(1000)
-    deployer_balance_before = deployer.balance()
-    split_recipient_before = split_recipient.balance()
     auction_house_unpaused.settle_current_and_create_new_auction()
-    deployer_balance_after = deployer.balance()
-    split_recipient_after = split_recipient.balance()
     new_auction_id = auction_house_unpaused.auction()["llama_id"]
     assert not auction_house_unpaused.auction()["settled"]
     assert old_auction_id < new_auction_id
-    assert deployer_balance_after == deployer_balance_before + 5
-    assert split_recipient_after == split_recipient_before + 95
+    assert auction_house_unpaused.pending_proceeds(deployer) == 5
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 95
 
 
 def test_settle_current_and_create_new_auction_when_paused(token, auction_house):
@@ -778,6 +860,84 @@ def test_settle_current_and_create_new_auction_when_paused(token, auction_house)
         auction_house.settle_current_and_create_new_auction()
 
 
+def test_settle_missed_and_create_new_auction_no_missed(token, deployer, auction_house_unpaused):
+    auction_house_unpaused.disable_wl()
+    chain.sleep(150)
+    auction_house_unpaused.settle_missed_and_create_new_auction(10)
+    assert auction_house_unpaused.auction()["llama_id"] == 21
+    assert not auction_house_unpaused.auction()["settled"]
+    assert token.ownerOf(20) == deployer
+
+
+def test_settle_missed_and_create_new_auction(token, deployer, auction_house_unpaused):
+    auction_house_unpaused.disable_wl()
+    # Three full auctions fit between the end of the current one and now
+    chain.sleep(450)
+    tx = auction_house_unpaused.settle_missed_and_create_new_auction(10)
+    for llama_id in range(20, 24):
+        assert token.ownerOf(llama_id) == deployer
+    assert auction_house_unpaused.auction()["llama_id"] == 24
+    assert auction_house_unpaused.auction()["start_time"] == tx.timestamp
+    assert not auction_house_unpaused.auction()["settled"]
+    # The skipped auctions are not logged as created or settled
+    assert [event["_llama_id"] for event in tx.events["AuctionSkipped"]] == [21, 22, 23]
+    assert [event["_llama_id"] for event in tx.events["AuctionCreated"]] == [24]
+    settled = tx.events["AuctionSettled"]
+    assert [event["_llama_id"] for event in settled] == [20]
+    assert settled[0]["_winner"] == ZERO_ADDRESS
+
+
+def test_settle_missed_and_create_new_auction_max_missed(token, deployer, auction_house_unpaused):
+    auction_house_unpaused.disable_wl()
+    chain.sleep(1000)
+    auction_house_unpaused.settle_missed_and_create_new_auction(2)
+    assert token.ownerOf(22) == deployer
+    assert auction_house_unpaused.auction()["llama_id"] == 23
+
+
+def test_settle_missed_and_create_new_auction_max_missed_auctions(
+    token, deployer, auction_house_unpaused
+):
+    auction_house_unpaused.disable_wl()
+    chain.sleep(100 * 100)
+    auction_house_unpaused.settle_missed_and_create_new_auction(100)
+    # At most 24 missed auctions are settled at once
+    assert token.ownerOf(44) == deployer
+    assert auction_house_unpaused.auction()["llama_id"] == 45
+
+
+def test_settle_missed_and_create_new_auction_with_bid(
+    token, deployer, auction_house_unpaused, split_recipient, alice
+):
+    auction_house_unpaused.disable_wl()
+    auction_house_unpaused.create_bid(20, 1000, {"from": alice, "value": "1000 wei"})
+    chain.sleep(450)
+    auction_house_unpaused.settle_missed_and_create_new_auction(10)
+    assert token.ownerOf(20) == alice
+    assert token.ownerOf(21) == deployer
+    assert auction_house_unpaused.auction()["llama_id"] == 24
+    # Only the auction with a bid has proceeds
+    assert auction_house_unpaused.pending_proceeds(deployer) == 50
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 950
+
+
+def test_settle_missed_and_create_new_auction_not_completed(auction_house_unpaused):
+    with brownie.reverts("Auction hasn't completed"):
+        auction_house_unpaused.settle_missed_and_create_new_auction(10)
+
+
+def test_settle_missed_and_create_new_auction_nonowner(auction_house_unpaused, alice):
+    chain.sleep(450)
+    with brownie.reverts("Caller is not the owner"):
+        auction_house_unpaused.settle_missed_and_create_new_auction(10, {"from": alice})
+
+
+def test_settle_missed_and_create_new_auction_when_paused(token, auction_house):
+    token.set_minter(auction_house)
+    with brownie.reverts("Auction house is paused"):
+        auction_house.settle_missed_and_create_new_auction(10)
+
+
 def test_settle_auction_multiple_bids(
     token, deployer, auction_house_unpaused, split_recipient, alice, bob
 ):
@@ -788,11 +948,7 @@ def test_settle_auction_multiple_bids(
     auction_house_unpaused.create_bid(20, 1000, {"from": bob, "value": "1000 wei"})
     chain.sleep(1000)
     auction_house_unpaused.pause()
-    deployer_balance_before = deployer.balance()
-    split_recipient_before = split_recipient.balance()
     auction_house_unpaused.settle_auction()
-    deployer_balance_after = deployer.balance()
-    split_recipient_after = split_recipient.balance()
     alice_balance_before_withdraw = alice.balance()
     assert alice_balance_before_withdraw == alice_balance_start - 100
     auction_house_unpaused.withdraw({"from": alice})
@@ -800,8 +956,8 @@ def test_settle_auction_multiple_bids(
     assert alice_balance_after_withdraw == alice_balance_start
     assert auction_house_unpaused.auction()["settled"]
     assert token.ownerOf(20) == bob
-    assert deployer_balance_after == deployer_balance_before + 50
-    assert split_recipient_after == split_recipient_before + 950
+    assert auction_house_unpaused.pending_proceeds(deployer) == 50
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 950
 
 
 def test_bidder_outbids_prev_bidder(
@@ -815,11 +971,7 @@ def test_bidder_outbids_prev_bidder(
     auction_house_unpaused.create_bid(20, 1000, {"from": bob, "value": "1000 wei"})
     auction_house_unpaused.create_bid(20, 2000, {"from": alice, "value": "2000 wei"})
     chain.sleep(1000)
-    deployer_balance_before = deployer.balance()
-    split_recipient_before = split_recipient.balance()
     auction_house_unpaused.settle_current_and_create_new_auction()
-    deployer_balance_after = deployer.balance()
-    split_recipient_after = split_recipient.balance()
     alice_balance_before_withdraw = alice.balance()
     bob_balance_before_withdraw = bob.balance()
     assert alice_balance_before_withdraw == alice_balance_start - 2100
@@ -832,8 +984,8 @@ def test_bidder_outbids_prev_bidder(
     assert bob_balance_after_withdraw == bob_balance_start
     assert not auction_house_unpaused.auction()["settled"]
     assert token.ownerOf(20) == alice
-    assert deployer_balance_after == deployer_balance_before + 100
-    assert split_recipient_after == split_recipient_before + 1900
+    assert auction_house_unpaused.pending_proceeds(deployer) == 100
+    assert auction_house_unpaused.pending_proceeds(split_recipient) == 1900
 
 
 # AUCTION EXTENSION
@@ -0,0 +1,372 @@
+import time
+
+from brownie import ZERO_ADDRESS, accounts, chain, history
+from brownie.exceptions import VirtualMachineError
+from hypothesis import strategies as st
+
+# Stateful fuzzing of LlamaAuctionHouse: random sequences of bids, settlements, pauses, withdrawals
+# and parameter changes by several actors, checked against a Python model of the contract. The
+# state machine replaces the `fn_isolation` snapshot, so it gets a module of its own.
+#
+# Print the throughput with `brownie test tests/auction/test_auction_house_stateful.py --evm pyevm`
+
+ACTORS = 5
+STEPS = 50
+# Examples per run, each of up to STEPS steps. Ganache takes far longer per transaction.
+EXAMPLES = {"ganache": 4, "pyevm": 40}
+
+NOT_OWNER = "Caller is not the owner"
+MAX_MISSED_AUCTIONS = 24
+
+
+class AuctionHouseStateMachine:
+
+    st_actor = st.integers(0, ACTORS - 1)
+    st_actors = st.lists(st.integers(0, ACTORS - 1), max_size=ACTORS)
+    st_kind = st.sampled_from(["public", "wl", "friend"])
+    # Bid relative to the smallest valid one, and how much of it comes from pending returns
+    st_delta = st.integers(-20, 300)
+    st_from_pending = st.sampled_from([0, 0, 10, 100, 1000])
+    st_overpay = st.sampled_from([0, 0, 0, 7])
+    st_id_offset = st.sampled_from([0, 0, 0, 0, 1])
+    st_seconds = st.sampled_from([1, 10, 100, 1000, 3600, 100000])
+    st_settle = st.sampled_from(
+        [
+            "settle_auction",
+            "settle_current_and_create_new_auction",
+            "settle_missed_and_create_new_auction",
+        ]
+    )
+    st_max_missed = st.sampled_from([0, 1, 3, 30])
+    st_time_buffer = st.integers(0, 1000)
+    st_reserve_price = st.integers(0, 500)
+    st_percentage = st.integers(0, 20)
+    st_duration = st.sampled_from([60, 3600, 7200, 300000])
+    st_setter = st.sampled_from(
+        [
+            "set_time_buffer",
+            "set_reserve_price",
+            "pause",
+            "disable_wl",
+            "settle_missed_and_create_new_auction",
+        ]
+    )
+
+    def __init__(cls, token, auction_house, owner, proceeds_receiver, actors, signer, stats):
+        cls.token = token
+        cls.auction_house = auction_house
+        cls.owner = owner
+        cls.proceeds_receiver = proceeds_receiver
+        cls.actors = actors
+        cls.signer = signer
+        cls.stats = stats
+        cls.split_percentage = auction_house.proceeds_receiver_split_percentage()
+        cls.deployed = {
+            "time_buffer": auction_house.time_buffer(),
+            "reserve_price": auction_house.reserve_price(),
+            "min_bid_increment_percentage": auction_house.min_bid_increment_percentage(),
+            "duration": auction_house.duration(),
+            "next_llama_id": token.totalSupply(),
+        }
+
+    def setup(self):
+        # The model starts from the deployed, paused auction house without an auction
+        self.__dict__.update(self.deployed)
+        self.paused = True
+        self.wl_enabled = True
+        self.auction = {
+            "llama_id": 0,
+            "amount": 0,
+            "start_time": 0,
+            "end_time": 0,
+            "bidder": ZERO_ADDRESS,
+            "settled": False,
+        }
+        self.pending = {actor.address: 0 for actor in self.actors}
+        self.wl_won = {actor.address: 0 for actor in self.actors}
+        # Bids that send more than `bid_amount` keep the excess in the contract
+        self.stranded = 0
+        # Settled proceeds not yet claimed by the owner and the proceeds receiver
+        self.proceeds = {self.owner.address: 0, self.proceeds_receiver.address: 0}
+        # Accounts whose pending returns or WL wins a step may have changed
+        self.dirty = set()
+
+    def _transact(self, fn, *args):
+        # Returns the receipt, reverted or not, so the model can use its block timestamp
+        self.stats["steps"] += 1
+        try:
+            fn(*args)
+        except VirtualMachineError:
+            pass
+        return history[-1]
+
+    def _assert_result(self, tx, error):
+        if error is None:
+            assert tx.status == 1, tx.revert_msg
+        else:
+            assert tx.status == 0 and tx.revert_msg == error
+
+    def _create_auction(self, timestamp):
+        self.auction = {
+            "llama_id": self.next_llama_id,
+            "amount": 0,
+            "start_time": timestamp,
+            "end_time": timestamp + self.duration,
+            "bidder": ZERO_ADDRESS,
+            "settled": False,
+        }
+        self.next_llama_id += 1
+
+    def _bid_error(self, sender, kind, llama_id, amount, value, timestamp):
+        auction = self.auction
+        if kind == "public":
+            if self.wl_enabled:
+                return "Public auction is not enabled"
+        else:
+            limit = 2 if kind == "wl" else 1
+            if not self.wl_enabled:
+                return "WL auction is not enabled"
+            if self.wl_won[sender] >= limit:
+                return "Already won 2 WL auctions" if limit == 2 else "Already won 1 WL auction"
+        if value < amount and self.pending[sender] < amount - value:
+            return "Does not have enough pending returns to cover remainder"
+        if llama_id != auction["llama_id"]:
+            return "Llama not up for auction"
+        if timestamp >= auction["end_time"]:
+            return "Auction expired"
+        if amount < self.reserve_price:
+            return "Must send at least reservePrice"
+        if (
+            amount
+            < auction["amount"] + auction["amount"] * self.min_bid_increment_percentage // 100
+        ):
+            return "Must send more than last bid by min_bid_increment_percentage amount"
+        return None
+
+    def rule_bid(self, st_actor, st_kind, st_delta, st_from_pending, st_overpay, st_id_offset):
+        sender = self.actors[st_actor]
+        auction = self.auction
+        smallest = auction["amount"] + auction["amount"] * self.min_bid_increment_percentage // 100
+        amount = max(0, max(smallest, self.reserve_price) + st_delta)
+        value = amount - min(st_from_pending, amount) + st_overpay
+        llama_id = auction["llama_id"] + st_id_offset
+        params = {"from": sender, "value": value}
+        if st_kind == "public":
+            tx = self._transact(self.auction_house.create_bid, llama_id, amount, params)
+        else:
+            domain, fn = {
+                "wl": ("whitelist:", self.auction_house.create_wl_bid),
+                "friend": ("friend:", self.auction_house.create_friend_bid),
+            }[st_kind]
+            signature = self.signer.sign(domain, sender)
+            tx = self._transact(fn, llama_id, amount, signature, params)
+
+        error = self._bid_error(sender.address, st_kind, llama_id, amount, value, tx.timestamp)
+        self._assert_result(tx, error)
+        if error is not None:
+            return
+        if value < amount:
+            self.pending[sender.address] -= amount - value
+        else:
+            self.stranded += value - amount
+        if auction["bidder"] != ZERO_ADDRESS:
+            self.pending[auction["bidder"]] += auction["amount"]
+            self.dirty.add(auction["bidder"])
+        auction["amount"] = amount
+        auction["bidder"] = sender.address
+        if auction["end_time"] - tx.timestamp < self.time_buffer:
+            auction["end_time"] = tx.timestamp + self.time_buffer
+        self.dirty.add(sender.address)
+
+    def rule_settle(self, st_actor, st_settle, st_max_missed):
+        create_new = st_settle != "settle_auction"
+        args = [st_max_missed] if st_settle == "settle_missed_and_create_new_auction" else []
+        # Only the owner can skip the missed auctions, see rule_admin_not_owner
+        sender = self.owner if args else self.actors[st_actor]
+        tx = self._transact(getattr(self.auction_house, st_settle), *args, {"from": sender})
+
+        auction = self.auction
+        if create_new and self.paused:
+            error = "Auction house is paused"
+        elif not create_new and not self.paused:
+            error = "Auction house is not paused"
+        elif auction["start_time"] == 0:
+            error = "Auction hasn't begun"
+        elif auction["settled"]:
+            error = "Auction has already been settled"
+        elif tx.timestamp <= auction["end_time"]:
+            error = "Auction hasn't completed"
+        else:
+            error = None
+        self._assert_result(tx, error)
+        if error is not None:
+            return
+
+        auction["settled"] = True
+        winner = auction["bidder"] if auction["bidder"] != ZERO_ADDRESS else self.owner
+        assert self.token.ownerOf(auction["llama_id"]) == winner
+        if auction["bidder"] != ZERO_ADDRESS and self.wl_enabled:
+            self.wl_won[auction["bidder"]] += 1
+            self.dirty.add(auction["bidder"])
+        fee = auction["amount"] * self.split_percentage // 100
+        self.proceeds[self.proceeds_receiver.address] += fee
+        self.proceeds[self.owner.address] += auction["amount"] - fee
+        for address, proceeds in self.proceeds.items():
+            assert self.auction_house.pending_proceeds(address) == proceeds
+        if args:
+            # Every full duration since the auction ended is an auction without bids
+            missed = (tx.timestamp - auction["end_time"]) // self.duration
+            for _ in range(min(missed, st_max_missed, MAX_MISSED_AUCTIONS)):
+                assert self.token.ownerOf(self.next_llama_id) == self.owner
+                self.next_llama_id += 1
+        if create_new:
+            self._create_auction(tx.timestamp)
+
+    def rule_withdraw(self, st_actor):
+        sender = self.actors[st_actor]
+        before = sender.balance()
+        tx = self._transact(self.auction_house.withdraw, {"from": sender})
+        self._assert_result(tx, None)
+        gas = tx.gas_used * tx.gas_price
+        assert sender.balance() == before + self.pending[sender.address] - gas
+        self.pending[sender.address] = 0
+        self.dirty.add(sender.address)
+
+    def rule_claim_proceeds(self, st_actor):
+        recipients = [self.owner, self.proceeds_receiver]
+        before = [recipient.balance() for recipient in recipients]
+        tx = self._transact(
+            self.auction_house.claim_proceeds, recipients, {"from": self.actors[st_actor]}
+        )
+        self._assert_result(tx, None)
+        for recipient, balance in zip(recipients, before):
+            assert recipient.balance() == balance + self.proceeds[recipient.address]
+            self.proceeds[recipient.address] = 0
+
+    def rule_withdraw_stale(self, st_actors):
+        actors = [self.actors[i] for i in st_actors]
+        before = {actor: actor.balance() for actor in actors}
+        owner_before = self.owner.balance()
+        addresses = [actor.address for actor in actors]
+        tx = self._transact(self.auction_house.withdraw_stale, addresses, {"from": self.owner})
+        self._assert_result(tx, None)
+
+        total_fee = 0
+        for actor in actors:
+            pending = self.pending[actor.address]
+            fee = pending * 5 // 100
+            before[actor] += pending - fee
+            total_fee += fee
+            self.pending[actor.address] = 0
+        for actor, balance in before.items():
+            assert actor.balance() == balance
+        assert self.owner.balance() == owner_before + total_fee - tx.gas_used * tx.gas_price
+        self.dirty.update(addresses)
+
+    def rule_sleep(self, st_seconds):
+        self.stats["steps"] += 1
+        chain.sleep(st_seconds)
+
+    def rule_pause(self):
+        tx = self._transact(self.auction_house.pause, {"from": self.owner})
+        self._assert_result(tx, None)
+        self.paused = True
+        assert self.auction_house.paused()
+
+    def rule_unpause(self):
+        tx = self._transact(self.auction_house.unpause, {"from": self.owner})
+        self._assert_result(tx, None)
+        self.paused = False
+        assert not self.auction_house.paused()
+        if self.auction["start_time"] == 0 or self.auction["settled"]:
+            self._create_auction(tx.timestamp)
+
+    def rule_toggle_wl(self):
+        fn = self.auction_house.disable_wl if self.wl_enabled else self.auction_house.enable_wl
+        tx = self._transact(fn, {"from": self.owner})
+        self._assert_result(tx, None)
+        self.wl_enabled = not self.wl_enabled
+        assert self.auction_house.wl_enabled() == self.wl_enabled
+
+    def rule_set_time_buffer(self, st_time_buffer):
+        tx = self._transact(
+            self.auction_house.set_time_buffer, st_time_buffer, {"from": self.owner}
+        )
+        self._assert_result(tx, None)
+        self.time_buffer = st_time_buffer
+
+    def rule_set_reserve_price(self, st_reserve_price):
+        fn = self.auction_house.set_reserve_price
+        tx = self._transact(fn, st_reserve_price, {"from": self.owner})
+        self._assert_result(tx, None)
+        self.reserve_price = st_reserve_price
+
+    def rule_set_min_bid_increment_percentage(self, st_percentage):
+        fn = self.auction_house.set_min_bid_increment_percentage
+        tx = self._transact(fn, st_percentage, {"from": self.owner})
+        if 2 <= st_percentage <= 15:
+            self._assert_result(tx, None)
+            self.min_bid_increment_percentage = st_percentage
+        else:
+            self._assert_result(tx, "_min_bid_increment_percentage out of range")
+
+    def rule_set_duration(self, st_duration):
+        tx = self._transact(self.auction_house.set_duration, st_duration, {"from": self.owner})
+        if 3600 <= st_duration <= 259200:
+            self._assert_result(tx, None)
+            self.duration = st_duration
+        else:
+            self._assert_result(tx, "_duration out of range")
+
+    def rule_admin_not_owner(self, st_actor, st_setter):
+        fn = getattr(self.auction_house, st_setter)
+        args = [] if st_setter in ("pause", "disable_wl") else [1]
+        tx = self._transact(fn, *args, {"from": self.actors[st_actor]})
+        self._assert_result(tx, NOT_OWNER)
+
+    def invariant_balance(self):
+        # Every wei held is owed to a bidder or a proceeds recipient, is the unsettled winning
+        # bid, or is an overpayment
+        unsettled = 0 if self.auction["settled"] else self.auction["amount"]
+        expected = sum(self.pending.values()) + sum(self.proceeds.values()) + unsettled
+        expected += self.stranded
+        assert self.auction_house.balance() == expected
+
+    def invariant_state(self):
+        assert self.auction_house.auction() == tuple(self.auction.values())
+        for address in self.dirty:
+            assert self.auction_house.pending_returns(address) == self.pending[address]
+            assert self.auction_house.wl_auctions_won(address) == self.wl_won[address]
+        self.dirty = set()
+
+
+def test_auction_house_stateful(
+    request, state_machine, token, auction_house, deployer, split_recipient, signer
+):
+    token.set_minter(auction_house)
+    stats = {"steps": 0}
+    settings = {
+        "max_examples": EXAMPLES[request.config.getoption("evm")],
+        "stateful_step_count": STEPS,
+    }
+
+    start = time.perf_counter()
+    state_machine(
+        AuctionHouseStateMachine,
+        token,
+        auction_house,
+        deployer,
+        split_recipient,
+        accounts[1 : ACTORS + 1],
+        signer,
+        stats,
+        settings=settings,
+    )
+    elapsed = time.perf_counter() - start
+
+    reporter = request.config.pluginmanager.get_plugin("terminalreporter")
+    if reporter is not None:
+        reporter.write_line(
+            f"\nauction house state machine: {stats['steps']} steps in {elapsed:.1f}s, "
+            f"{stats['steps'] / elapsed:.1f} steps/s"
+        )
@@ -0,0 +1,105 @@
+import brownie
+from brownie import ZERO_ADDRESS
+
+NO_DATA = "0x" + "00" * 32
+
+
+# Test an airdrop of a single ID
+def test_airdrop_single_id(badge, deployer, alice, bob, charlie):
+    receivers = [alice, bob, charlie]
+    txn_receipt = badge.airdrop(receivers, [3], [2], NO_DATA, {"from": deployer})
+    assert badge.balanceOfBatch(receivers, [3, 3, 3]) == [2, 2, 2]
+
+    # One TransferSingle per receiver
+    events = txn_receipt.events["TransferSingle"]
+    assert [event["to"] for event in events] == receivers
+    assert all(event["fromAddress"] == ZERO_ADDRESS for event in events)
+    assert all((event["id"], event["value"]) == (3, 2) for event in events)
+    assert "TransferBatch" not in txn_receipt.events
+
+
+# Test an airdrop of several IDs, on top of existing balances
+def test_airdrop_batch(badge, deployer, alice, bob):
+    badge.mint(alice, 1, 5, NO_DATA, {"from": deployer})
+    txn_receipt = badge.airdrop([alice, bob], [1, 2], [1, 3], NO_DATA, {"from": deployer})
+    assert badge.balanceOfBatch([alice, alice, bob, bob], [1, 2, 1, 2]) == [6, 3, 1, 3]
+
+    events = txn_receipt.events["TransferBatch"]
+    assert [event["to"] for event in events] == [alice, bob]
+    assert all((event["ids"], event["values"]) == ((1, 2), (1, 3)) for event in events)
+
+
+# Test that only the owner can airdrop
+def test_airdrop_nonowner(badge, alice):
+    with brownie.reverts("Only the contract owner can mint"):
+        badge.airdrop([alice], [1], [1], NO_DATA, {"from": alice})
+
+
+# Test an airdrop to the zero address
+def test_airdrop_zero_address(badge, deployer, alice):
+    with brownie.reverts("Can not mint to ZERO ADDRESS"):
+        badge.airdrop([alice, ZERO_ADDRESS], [1], [1], NO_DATA, {"from": deployer})
+
+
+# Test an airdrop with mismatched ids and amounts
+def test_airdrop_length_mismatch(badge, deployer, alice):
+    with brownie.reverts("ERC1155: ids and amounts length mismatch"):
+        badge.airdrop([alice], [1, 2], [1], NO_DATA, {"from": deployer})
+
+
+# Test an airdrop while paused
+def test_airdrop_paused(badge, deployer, alice):
+    badge.pause({"from": deployer})
+    with brownie.reverts("The contract has been paused"):
+        badge.airdrop([alice], [1], [1], NO_DATA, {"from": deployer})
+
+
+# Test balances of IDs sharing a packed slot and of IDs in different slots
+def test_packed_balances(badge, deployer, alice):
+    ids = [0, 1, 15, 16, 17, 2**128]
+    amounts = [1, 2, 3, 4, 5, 6]
+    badge.mintBatch(alice, ids, amounts, NO_DATA, {"from": deployer})
+    assert [badge.balanceOf(alice, i) for i in ids] == amounts
+    assert badge.balanceOf(alice, 14) == 0
+    assert badge.balanceOfBatch([alice] * 2, [17, 18]) == [5, 0]
+
+
+# Test balances that do not fit in a packed lane
+def test_large_balances(badge, deployer, alice, bob):
+    badge.mint(alice, 5, 65534, NO_DATA, {"from": deployer})
+    badge.mint(alice, 5, 2, NO_DATA, {"from": deployer})
+    badge.mint(alice, 6, 2**200, NO_DATA, {"from": deployer})
+    assert badge.balanceOfBatch([alice] * 3, [4, 5, 6]) == [0, 65536, 2**200]
+
+    # Back into the lane, then out of it again
+    badge.safeBatchTransferFrom(alice, bob, [5, 6], [10, 2**200 - 1], NO_DATA, {"from": alice})
+    assert badge.balanceOfBatch([alice] * 2 + [bob] * 2, [5, 6, 5, 6]) == [
+        65526,
+        1,
+        10,
+        2**200 - 1,
+    ]
+    badge.mint(alice, 5, 100, NO_DATA, {"from": deployer})
+    badge.burn(5, 65625, {"from": alice})
+    assert badge.balanceOf(alice, 5) == 1
+
+
+# Test batch transfers of unsorted and repeated IDs
+def test_batch_transfer_unsorted(badge, deployer, alice, bob):
+    badge.mintBatch(alice, [40, 3, 41, 3], [1, 2, 3, 4], NO_DATA, {"from": deployer})
+    assert badge.balanceOfBatch([alice] * 3, [3, 40, 41]) == [6, 1, 3]
+    badge.safeBatchTransferFrom(alice, bob, [3, 41, 3, 40], [1, 3, 5, 1], NO_DATA, {"from": alice})
+    assert badge.balanceOfBatch([alice] * 3 + [bob] * 3, [3, 40, 41] * 2) == [0, 0, 0, 6, 1, 3]
+    badge.burnBatch([3, 41], [6, 3], {"from": bob})
+    assert badge.balanceOfBatch([bob] * 3, [3, 40, 41]) == [0, 1, 0]
+
+
+# Test that a transfer over the balance reverts
+def test_transfer_over_balance(badge, deployer, alice, bob):
+    badge.mintBatch(alice, [1, 2], [1, 1], NO_DATA, {"from": deployer})
+    with brownie.reverts():
+        badge.safeBatchTransferFrom(alice, bob, [1, 2], [1, 2], NO_DATA, {"from": alice})
+    with brownie.reverts():
+        badge.safeTransferFrom(alice, bob, 1, 2, NO_DATA, {"from": alice})
+    with brownie.reverts("caller does not own this ID or ZERO balance"):
+        badge.safeTransferFrom(alice, bob, 3, 1, NO_DATA, {"from": alice})
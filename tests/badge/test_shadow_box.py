@@ -0,0 +1,115 @@
+import brownie
+import pytest
+
+NO_DATA = "0x" + "00" * 32
+
+
+@pytest.fixture(scope="function")
+def holder(badge, shadow_box, deployer, preminter):
+    # The preminter owns llamas 0 to 19 and holds 5 of badges 0 to 9
+    badge.mintBatch(preminter, list(range(10)), [5] * 10, NO_DATA, {"from": deployer})
+    badge.setApprovalForAll(preminter, shadow_box, True, {"from": preminter})
+    return preminter
+
+
+def _badges_of(shadow_box, llama_id):
+    return sorted(tuple(attachment) for attachment in shadow_box.badges_of(llama_id))
+
+
+def test_attach(badge, shadow_box, holder):
+    txn_receipt = shadow_box.attach(3, 1, 2, {"from": holder})
+    shadow_box.attach(3, 1, 1, {"from": holder})
+    assert shadow_box.attached(3, 1) == 3
+    assert badge.balanceOfBatch([holder, shadow_box], [1, 1]) == [2, 3]
+    assert shadow_box.badge_count(3) == 1
+    assert _badges_of(shadow_box, 3) == [(1, 3)]
+
+    event = txn_receipt.events["BadgesAttached"]
+    assert (event["_llama_id"], event["_sender"]) == (3, holder)
+    assert (event["_badge_ids"], event["_amounts"]) == ((1,), (2,))
+
+
+def test_attach_batch(badge, shadow_box, holder):
+    shadow_box.attach_batch(3, [0, 4, 7], [1, 2, 3], {"from": holder})
+    shadow_box.attach_batch(5, [4], [1], {"from": holder})
+    assert _badges_of(shadow_box, 3) == [(0, 1), (4, 2), (7, 3)]
+    assert _badges_of(shadow_box, 5) == [(4, 1)]
+    assert badge.balanceOf(shadow_box, 4) == 3
+    assert [shadow_box.badge_of_llama_by_index(3, i) for i in range(3)] == [0, 4, 7]
+
+
+def test_detach_moves_last_badge(badge, shadow_box, holder):
+    shadow_box.attach_batch(3, [0, 1, 2, 3], [1, 1, 1, 1], {"from": holder})
+    shadow_box.detach(3, 1, 1, {"from": holder})
+    assert [shadow_box.badge_of_llama_by_index(3, i) for i in range(3)] == [0, 3, 2]
+    with brownie.reverts():
+        shadow_box.badge_of_llama_by_index(3, 3)
+
+    txn_receipt = shadow_box.detach_batch(3, [0, 2, 3], [1, 1, 1], {"from": holder})
+    assert shadow_box.badge_count(3) == 0
+    assert shadow_box.badges_of(3) == []
+    assert badge.balanceOfBatch([holder] * 4, [0, 1, 2, 3]) == [5, 5, 5, 5]
+    assert txn_receipt.events["BadgesDetached"]["_badge_ids"] == (0, 2, 3)
+
+    # A detached badge can be attached again
+    shadow_box.attach(3, 1, 1, {"from": holder})
+    assert _badges_of(shadow_box, 3) == [(1, 1)]
+
+
+def test_partial_detach(shadow_box, holder):
+    shadow_box.attach(3, 1, 3, {"from": holder})
+    shadow_box.detach(3, 1, 2, {"from": holder})
+    assert _badges_of(shadow_box, 3) == [(1, 1)]
+    with brownie.reverts("Badge is not attached to this llama"):
+        shadow_box.detach(3, 1, 2, {"from": holder})
+    with brownie.reverts("Badge is not attached to this llama"):
+        shadow_box.detach(3, 2, 1, {"from": holder})
+
+
+def test_badges_follow_the_llama(token, shadow_box, holder, alice):
+    shadow_box.attach(3, 1, 1, {"from": holder})
+    token.transferFrom(holder, alice, 3, {"from": holder})
+    with brownie.reverts("Caller is not the llama owner or operator"):
+        shadow_box.detach(3, 1, 1, {"from": holder})
+    shadow_box.detach(3, 1, 1, {"from": alice})
+
+
+def test_llama_operator(token, badge, shadow_box, holder, alice, deployer):
+    badge.mint(alice, 1, 1, NO_DATA, {"from": deployer})
+    badge.setApprovalForAll(alice, shadow_box, True, {"from": alice})
+    with brownie.reverts("Caller is not the llama owner or operator"):
+        shadow_box.attach(3, 1, 1, {"from": alice})
+
+    # An operator of the llama attaches its own badges and detaches them to itself
+    token.setApprovalForAll(alice, True, {"from": holder})
+    shadow_box.attach(3, 1, 1, {"from": alice})
+    shadow_box.attach(3, 1, 1, {"from": holder})
+    shadow_box.detach(3, 1, 2, {"from": alice})
+    assert badge.balanceOfBatch([alice, holder], [1, 1]) == [2, 4]
+
+
+def test_attach_requires_approval(badge, shadow_box, holder):
+    badge.setApprovalForAll(holder, shadow_box, False, {"from": holder})
+    with brownie.reverts("Caller is neither owner nor approved operator for this ID"):
+        shadow_box.attach(3, 1, 1, {"from": holder})
+
+
+def test_attach_zero(shadow_box, holder):
+    with brownie.reverts("Cannot attach zero badges"):
+        shadow_box.attach_batch(3, [1, 2], [1, 0], {"from": holder})
+
+
+def test_max_badges_per_llama(badge, shadow_box, holder, deployer):
+    ids = list(range(10, 138))
+    badge.mintBatch(holder, ids, [1] * 128, NO_DATA, {"from": deployer})
+    shadow_box.attach_batch(3, ids, [1] * 128, {"from": holder})
+    attachments = shadow_box.badges_of(3)
+    assert len(attachments) == 128
+    with brownie.reverts("Llama has too many badges"):
+        shadow_box.attach(3, 1, 1, {"from": holder})
+
+
+def test_receiver_hooks(shadow_box, holder):
+    with brownie.reverts("Only badges can be attached"):
+        shadow_box.onERC1155Received(holder, holder, 1, 1, b"", {"from": holder})
+    assert shadow_box.supportsInterface("0x4e2312e0")
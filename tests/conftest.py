@@ -1,10 +1,56 @@
 #!/usr/bin/python3
 
+import asyncio
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import brownie
 import pytest
 from brownie import ERC721TokenReceiverImplementation, accounts, web3
-from eth_abi import encode
-from eth_account import Account
-from eth_account.messages import encode_defunct
+from xdist.scheduler import LoadScheduling
+
+from scripts import pyevm_backend, signatures
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--evm",
+        choices=["ganache", "pyevm"],
+        default="ganache",
+        help="Chain to run the tests on, ganache or an in-process py-evm chain",
+    )
+
+
+# `brownie test -n <workers>` runs the tests on xdist workers, each with its own chain on its own
+# port. Brownie hands out whole files to workers, we hand out single tests instead: every test is
+# isolated by `fn_isolation`, and a worker redeploys the module fixtures when it switches module.
+def pytest_configure(config):
+    if config.getoption("evm") == "pyevm":
+        pyevm_backend.install()
+
+    # Workers share the build folder, keep their deployments out of build/deployments
+    if hasattr(config, "workerinput"):
+        brownie.config["dev_deployment_artifacts"] = False
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_xdist_make_scheduler(config, log):
+    return LoadScheduling(config, log)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session):
+    # Brownie records the results of a file in build/tests.json for `--update`, but only from the
+    # worker that ran its last test, so drop the per-worker results of a sharded run. `--update`
+    # then reruns every test, coverage data is kept.
+    if hasattr(session.config, "workerinput") or not session.config.getoption("numprocesses"):
+        return
+    for path in Path(session.config.rootdir, "build").glob("tests-*.json"):
+        report = json.loads(path.read_text())
+        report["tests"] = {}
+        path.write_text(json.dumps(report))
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -14,50 +60,116 @@ def isolate(fn_isolation):
     pass
 
 
-@pytest.fixture(scope="function")
-def token(Llama, deployer, preminter):
+# Deployments are module scoped: they run once per module, after `module_isolation` has reset
+# the chain, and `fn_isolation` snapshots the chain after them and reverts it after each test.
+# Setup transactions on a deployment stay function scoped so they are reverted with the test.
+@pytest.fixture(scope="module")
+def token(Llama, deployer, preminter, module_isolation):
     premint_addresses = [preminter] * 20
     token = Llama.deploy(premint_addresses, {"from": deployer})
     return token
 
 
+@pytest.fixture(scope="module")
+def badge(Badge, deployer, module_isolation):
+    return Badge.deploy("The Llamas Badges", "BADGE", "", "", {"from": deployer})
+
+
+@pytest.fixture(scope="module")
+def shadow_box(ShadowBox, token, badge, deployer):
+    return ShadowBox.deploy(token, badge, {"from": deployer})
+
+
 @pytest.fixture(scope="function")
 def token_minted(token, deployer):
     token.mint(deployer)
     return token
 
 
-@pytest.fixture(scope="function")
-def deployer():
-    return accounts.add()
+@pytest.fixture(scope="module")
+def new_account(request):
+    # Accounts from `accounts.add()` with keys derived from the test module and the account name,
+    # so each run creates the same accounts whichever tests a worker ran before
+    def new_account(name):
+        return accounts.add(web3.keccak(text=f"{request.module.__name__}:{name}"))
 
+    return new_account
 
-@pytest.fixture(scope="function")
-def split_recipient():
-    return accounts.add()
 
+@pytest.fixture(scope="module")
+def deployer(new_account):
+    return new_account("deployer")
 
-@pytest.fixture(scope="function")
-def smart_contract_owner(BasicSafe, accounts):
+
+@pytest.fixture(scope="module")
+def split_recipient(new_account):
+    return new_account("split_recipient")
+
+
+# Signatures are the same for every test of a run, so they are cached across the session
+@functools.lru_cache(maxsize=None)
+def _signing_key(private_key):
+    return signatures._load_key(private_key)
+
+
+@functools.lru_cache(maxsize=4096)
+def _signature(private_key, domain, address, amount):
+    return signatures.sign(_signing_key(private_key), domain, address, amount)
+
+
+class Signer:
+    # Signs `(domain, address[, amount])` messages as `Llama` and `LlamaAuctionHouse` check them
+
+    DOMAINS = ("whitelist:", "friend:", "allowlist:")
+
+    def __init__(self, account):
+        self.account = account
+
+    def sign(self, domain, account, amount=None):
+        return _signature(self.account.private_key, domain, str(account), amount)
+
+    def sign_many(self, domain, accounts, amount=None):
+        return [self.sign(domain, account, amount) for account in accounts]
+
+    def tampered(self, domain, account, amount=None):
+        # A well formed signature of a different message, so it recovers to another address
+        signature = bytearray.fromhex(self.sign(domain, account, amount)[2:])
+        signature[63] ^= 1
+        return "0x" + signature.hex()
+
+    def wrong_domain(self, domain, account, amount=None):
+        # The same message signed for the next domain, as if replayed from another list
+        other = self.DOMAINS[(self.DOMAINS.index(domain) + 1) % len(self.DOMAINS)]
+        return self.sign(other, account, amount)
+
+
+@pytest.fixture(scope="module")
+def signer(deployer):
+    # The `wl_signer` and `al_signer` of the deployed contracts
+    return Signer(deployer)
+
+
+@pytest.fixture(scope="module")
+def smart_contract_owner(BasicSafe, accounts, module_isolation):
     return BasicSafe.deploy({"from": accounts[0]})
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def alice():
     return accounts[1]
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def bob():
     return accounts[2]
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def charlie():
     return accounts[3]
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def preminter():
     return accounts[4]
 
@@ -69,15 +181,13 @@ def minted(token):
 
 
 @pytest.fixture(scope="function")
-def al_minted(token, alice, deployer):
+def al_minted(token, alice, signer):
     token.start_al_mint()
-    # Sign a message from the wl_signer for alice
-    alice_encoded = encode(["string", "address", "uint256"], ["allowlist:", alice.address, 1])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
     token.allowlistMint(
-        1, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
+        1,
+        1,
+        signer.sign("allowlist:", alice, 1),
+        {"from": alice, "value": web3.toWei(0.1, "ether")},
     )
 
     return token
@@ -88,6 +198,36 @@ def minted_token_id():
     return 20
 
 
+@pytest.fixture(scope="session")
+def check_transfers():
+    # Applies `moves`, (sender, receiver, token_id) transfers, to the token and to `owned`, the
+    # token ids of each owner in enumeration order, then checks the token against the model
+    def check_transfers(token, owned, moves):
+        owned = {owner: list(token_ids) for owner, token_ids in owned.items()}
+        for sender, receiver, token_id in moves:
+            token.transferFrom(sender, receiver, token_id, {"from": sender})
+            # Swap and pop: the last token takes the place of the removed one
+            position = owned[sender].index(token_id)
+            owned[sender][position] = owned[sender][-1]
+            owned[sender].pop()
+            owned[receiver].append(token_id)
+
+            # Neighbours of a transferred token keep resolving to their owner
+            for owner, token_ids in owned.items():
+                for neighbour in (token_id - 1, token_id + 1):
+                    if neighbour in token_ids:
+                        assert token.ownerOf(neighbour) == owner
+
+        for owner, token_ids in owned.items():
+            assert token.balanceOf(owner) == len(token_ids)
+            assert token.tokensForOwner(owner) == token_ids
+            for index, token_id in enumerate(token_ids):
+                assert token.tokenOfOwnerByIndex(owner, index) == token_id
+                assert token.ownerOf(token_id) == owner
+
+    return check_transfers
+
+
 # If there is a minter contract separate from the NFT, deploy here
 @pytest.fixture(scope="function")
 def minter(token):
@@ -110,33 +250,68 @@ def tokenReceiver(deployer):
     return ERC721TokenReceiverImplementation.deploy({"from": deployer})
 
 
-@pytest.fixture(scope="function")
-def auction_house(LlamaAuctionHouse, token, deployer, split_recipient):
-    auction_house = LlamaAuctionHouse.deploy(
+def _deploy_auction_house(LlamaAuctionHouse, token, deployer, split_recipient):
+    return LlamaAuctionHouse.deploy(
         token, 100, 100, 5, 100, split_recipient.address, 95, {"from": deployer}
     )
-    return auction_house
+
+
+@pytest.fixture(scope="module")
+def auction_house(LlamaAuctionHouse, token, deployer, split_recipient):
+    return _deploy_auction_house(LlamaAuctionHouse, token, deployer, split_recipient)
+
+
+# Separate deployments so a test can use more than one of the auction house fixtures
+@pytest.fixture(scope="module")
+def _auction_house_unpaused(LlamaAuctionHouse, token, deployer, split_recipient):
+    return _deploy_auction_house(LlamaAuctionHouse, token, deployer, split_recipient)
+
+
+@pytest.fixture(scope="module")
+def _auction_house_sc_owner(LlamaAuctionHouse, token, deployer, split_recipient):
+    return _deploy_auction_house(LlamaAuctionHouse, token, deployer, split_recipient)
 
 
 @pytest.fixture(scope="function")
-def auction_house_unpaused(LlamaAuctionHouse, token, deployer, split_recipient):
-    auction_house = LlamaAuctionHouse.deploy(
-        token, 100, 100, 5, 100, split_recipient.address, 95, {"from": deployer}
-    )
+def auction_house_unpaused(_auction_house_unpaused, token):
+    auction_house = _auction_house_unpaused
     token.set_minter(auction_house)
     auction_house.unpause()
     return auction_house
 
 
 @pytest.fixture(scope="function")
-def auction_house_sc_owner(
-    LlamaAuctionHouse, token, deployer, smart_contract_owner, split_recipient
-):
-    auction_house = LlamaAuctionHouse.deploy(
-        token, 100, 100, 5, 100, split_recipient.address, 95, {"from": deployer}
-    )
+def auction_house_sc_owner(_auction_house_sc_owner, token, deployer, smart_contract_owner):
+    auction_house = _auction_house_sc_owner
     token.set_minter(auction_house)
     auction_house.unpause()
     auction_house.disable_wl()
     auction_house.set_owner(smart_contract_owner, {"from": deployer})
     return auction_house
+
+
+# The services in `scripts/` run their blocking calls on an executor. The in-process py-evm chain
+# is not thread safe, so every call of a test shares one thread.
+@pytest.fixture(scope="function")
+def executor():
+    executor = ThreadPoolExecutor(1)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture(scope="session")
+def http_request():
+    # One request on its own connection, returns the status and the JSON payload
+    async def http_request(port, path, method="GET", body=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = json.dumps(body).encode() if body is not None else b""
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode() + data
+        )
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    return http_request
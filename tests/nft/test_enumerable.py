@@ -46,3 +46,10 @@ def test_tokensForOwner(minted, deployer, minted_token_id, bob):
     minted.transferFrom(deployer, bob, minted_token_id, {"from": deployer})
     assert minted.tokensForOwner(deployer) == [minted_token_id + 1]
     assert minted.tokensForOwner(bob) == [minted_token_id]
+
+
+def test_enumeration_across_packed_slots(token, preminter, bob, check_transfers):
+    # The 20 preminted tokens span two enumeration slots of the preminter
+    moves = [(preminter, bob, 0), (preminter, bob, 19), (preminter, bob, 7), (bob, preminter, 0)]
+    moves += [(preminter, bob, token_id) for token_id in (15, 16, 14, 1)]
+    check_transfers(token, {preminter: range(20), bob: []}, moves)
@@ -1,9 +1,8 @@
 import brownie
 import hexbytes
 from brownie import ZERO_ADDRESS, accounts, history, web3
-from eth_abi import encode
-from eth_account import Account
-from eth_account.messages import encode_defunct
+
+from scripts import merkle
 
 #
 # These tests are meant to be executed with brownie. To run them:
@@ -72,12 +71,9 @@ def _verifyApprovalForAllEvent(txn_receipt, owner, operator, approved):
     assert event["_approved"] == approved
 
 
-def signAllowlistMint(deployer, minter, amount):
-    alice_encoded = encode(["string", "address", "uint256"], ["allowlist:", minter.address, amount])
-    alice_hashed = web3.keccak(alice_encoded)
-    alice_signable_message = encode_defunct(alice_hashed)
-    signed_message = Account.sign_message(alice_signable_message, deployer.private_key)
-    return signed_message
+def allowlistTree(members):
+    levels = merkle.build_tree([merkle.leaf("allowlist:", m.address, a) for m, a in members])
+    return merkle.root(levels), merkle.proofs(levels)
 
 
 #
@@ -133,109 +129,127 @@ def test_allowlist_mint_one(al_minted, alice, minted_token_id):
     _verifyTransferEvent(txn_receipt, ZERO_ADDRESS, alice, minted_token_id)
 
 
-def test_allowlist_mint_max(token, alice, deployer):
+def test_allowlist_mint_max(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 3)
-    token.allowlistMint(
-        3, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.3, "ether")}
-    )
+    signature = signer.sign("allowlist:", alice, 3)
+    token.allowlistMint(3, 3, signature, {"from": alice, "value": web3.toWei(0.3, "ether")})
     assert token.ownerOf(20) == alice
     assert token.ownerOf(21) == alice
     assert token.ownerOf(22) == alice
 
 
-def test_allowlist_mint_not_started(token, alice, deployer):
-    signed_message = signAllowlistMint(deployer, alice, 1)
+def test_allowlist_mint_batch(token, alice, bob, deployer, signer):
+    token.start_al_mint()
+    token.mint({"from": deployer})
+    signature = signer.sign("allowlist:", alice, 10)
+    tx = token.allowlistMint(10, 10, signature, {"from": alice, "value": web3.toWei(1, "ether")})
+    assert token.totalSupply() == 31
+    assert [(e["_from"], e["_to"], e["_tokenId"]) for e in tx.events["Transfer"]] == [
+        (ZERO_ADDRESS, alice, token_id) for token_id in range(21, 31)
+    ]
+    assert token.tokensForOwner(alice) == list(range(21, 31))
+    for token_id in range(21, 31):
+        assert token.ownerOf(token_id) == alice
+    assert token.ownerOf(20) == deployer
+    _ensureNotToken(token, 31)
+
+    # Tokens of the batch keep resolving around the ones that moved
+    token.transferFrom(alice, bob, 25, {"from": alice})
+    token.transferFrom(alice, bob, 21, {"from": alice})
+    assert token.tokensForOwner(alice) == [29, 22, 23, 24, 30, 26, 27, 28]
+    assert token.tokensForOwner(bob) == [25, 21]
+    for index, token_id in enumerate(token.tokensForOwner(alice)):
+        assert token.ownerOf(token_id) == alice
+        assert token.tokenOfOwnerByIndex(alice, index) == token_id
+
+    token.mint({"from": deployer})
+    assert token.ownerOf(31) == deployer
+
+
+def test_allowlist_mint_not_started(token, alice, signer):
+    signature = signer.sign("allowlist:", alice, 1)
     with brownie.reverts("AL Mint not active"):
-        token.allowlistMint(
-            1, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-        )
+        token.allowlistMint(1, 1, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
 
 
-def test_allowlist_mint_address_already_minted_max_amount(token, alice, deployer):
+def test_allowlist_mint_address_already_minted_max_amount(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 1)
-    token.allowlistMint(
-        1, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
+    signature = signer.sign("allowlist:", alice, 1)
+    token.allowlistMint(1, 1, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
     with brownie.reverts("Cannot mint over approved amount"):
-        token.allowlistMint(
-            1, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-        )
+        token.allowlistMint(1, 1, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
 
 
-def test_allowlist_mint_under_max_twice_then_max(token, alice, deployer):
+def test_allowlist_mint_under_max_twice_then_max(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 3)
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
+    signature = signer.sign("allowlist:", alice, 3)
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
     assert token.balanceOf(alice) == 2
     with brownie.reverts("Cannot mint over approved amount"):
-        token.allowlistMint(
-            2, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-        )
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
+        token.allowlistMint(2, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
     assert token.balanceOf(alice) == 3
 
 
-def test_allowlist_mint_up_to_max_then_over_max(token, alice, deployer):
+def test_allowlist_mint_up_to_max_then_over_max(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 3)
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
-    token.allowlistMint(
-        1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-    )
+    signature = signer.sign("allowlist:", alice, 3)
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
+    token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
     assert token.balanceOf(alice) == 3
     with brownie.reverts("Cannot mint over approved amount"):
-        token.allowlistMint(
-            1, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.1, "ether")}
-        )
+        token.allowlistMint(1, 3, signature, {"from": alice, "value": web3.toWei(0.1, "ether")})
 
 
-def test_allowlist_mint_too_many(token, alice, deployer):
+def test_allowlist_mint_too_many(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 3)
+    signature = signer.sign("allowlist:", alice, 11)
     with brownie.reverts("Transaction exceeds max mint amount"):
-        token.allowlistMint(
-            4, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.4, "ether")}
-        )
+        token.allowlistMint(11, 11, signature, {"from": alice, "value": web3.toWei(1.1, "ether")})
 
 
-def test_allowlist_mint_one_not_enough_value(token, alice, deployer):
+def test_allowlist_mint_one_not_enough_value(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 1)
+    signature = signer.sign("allowlist:", alice, 1)
     with brownie.reverts("Not enough ether provided"):
-        token.allowlistMint(
-            1, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0.09, "ether")}
-        )
+        token.allowlistMint(1, 1, signature, {"from": alice, "value": web3.toWei(0.09, "ether")})
 
 
-def test_allowlist_mint_two_not_enough_value(token, alice, deployer):
+def test_allowlist_mint_two_not_enough_value(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 2)
+    signature = signer.sign("allowlist:", alice, 2)
     with brownie.reverts("Not enough ether provided"):
+        token.allowlistMint(2, 2, signature, {"from": alice, "value": web3.toWei(0.19, "ether")})
+
+
+def test_allowlist_mint_not_approved_max_amount(token, alice, signer):
+    token.start_al_mint()
+    signature = signer.sign("allowlist:", alice, 1)
+    with brownie.reverts("Signature is not valid"):
+        token.allowlistMint(3, 3, signature, {"from": alice, "value": web3.toWei(0.3, "ether")})
+
+
+def test_allowlist_mint_tampered_signature(token, alice, signer):
+    token.start_al_mint()
+    with brownie.reverts("Signature is not valid"):
         token.allowlistMint(
-            2, 2, signed_message.signature, {"from": alice, "value": web3.toWei(0.19, "ether")}
+            1,
+            1,
+            signer.tampered("allowlist:", alice, 1),
+            {"from": alice, "value": web3.toWei(0.1, "ether")},
         )
 
 
-def test_allowlist_mint_not_approved_max_amount(token, alice, deployer):
+def test_allowlist_mint_wrong_domain_signature(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 1)
     with brownie.reverts("Signature is not valid"):
         token.allowlistMint(
-            3, 3, signed_message.signature, {"from": alice, "value": web3.toWei(0.3, "ether")}
+            1,
+            1,
+            signer.wrong_domain("allowlist:", alice, 1),
+            {"from": alice, "value": web3.toWei(0.1, "ether")},
         )
 
 
@@ -246,17 +260,61 @@ def test_allowlist_mint_invalid_signature(token, alice):
         token.allowlistMint(3, 3, signature, {"from": alice, "value": web3.toWei(0.3, "ether")})
 
 
-def test_allowlist_mint_zero_tokens_does_nothing(token, alice, deployer):
+def test_allowlist_mint_zero_tokens_does_nothing(token, alice, signer):
     token.start_al_mint()
-    signed_message = signAllowlistMint(deployer, alice, 1)
+    signature = signer.sign("allowlist:", alice, 1)
     assert token.al_mint_amount(alice) == 0
-    token.allowlistMint(
-        0, 1, signed_message.signature, {"from": alice, "value": web3.toWei(0, "ether")}
-    )
+    token.allowlistMint(0, 1, signature, {"from": alice, "value": web3.toWei(0, "ether")})
     assert token.al_mint_amount(alice) == 0
     assert token.balanceOf(alice) == 0
 
 
+def test_allowlist_mint_with_proof(token, alice, bob, deployer):
+    root, proofs = allowlistTree([(alice, 3), (bob, 1)])
+    token.set_al_merkle_root(root, {"from": deployer})
+    token.start_al_mint()
+    proof = proofs[merkle.leaf("allowlist:", alice.address, 3)]
+    token.allowlistMintWithProof(2, 3, proof, {"from": alice, "value": web3.toWei(0.2, "ether")})
+    assert token.balanceOf(alice) == 2
+    assert token.al_mint_amount(alice) == 2
+    with brownie.reverts("Cannot mint over approved amount"):
+        token.allowlistMintWithProof(
+            2, 3, proof, {"from": alice, "value": web3.toWei(0.2, "ether")}
+        )
+
+
+def test_allowlist_mint_with_proof_not_approved_amount(token, alice, bob, deployer):
+    root, proofs = allowlistTree([(alice, 1), (bob, 1)])
+    token.set_al_merkle_root(root, {"from": deployer})
+    token.start_al_mint()
+    proof = proofs[merkle.leaf("allowlist:", alice.address, 1)]
+    with brownie.reverts("Proof is not valid"):
+        token.allowlistMintWithProof(
+            3, 3, proof, {"from": alice, "value": web3.toWei(0.3, "ether")}
+        )
+
+
+def test_allowlist_mint_with_proof_of_another_address(token, alice, bob, charlie, deployer):
+    root, proofs = allowlistTree([(alice, 1), (bob, 1)])
+    token.set_al_merkle_root(root, {"from": deployer})
+    token.start_al_mint()
+    proof = proofs[merkle.leaf("allowlist:", alice.address, 1)]
+    with brownie.reverts("Proof is not valid"):
+        token.allowlistMintWithProof(
+            1, 1, proof, {"from": charlie, "value": web3.toWei(0.1, "ether")}
+        )
+
+
+def test_allowlist_mint_with_proof_root_not_set(token, alice, bob):
+    _, proofs = allowlistTree([(alice, 1), (bob, 1)])
+    token.start_al_mint()
+    proof = proofs[merkle.leaf("allowlist:", alice.address, 1)]
+    with brownie.reverts("Proof is not valid"):
+        token.allowlistMintWithProof(
+            1, 1, proof, {"from": alice, "value": web3.toWei(0.1, "ether")}
+        )
+
+
 def test_withdraw(token, deployer, al_minted):
     balanceBefore = deployer.balance()
     token.withdraw({"from": deployer})
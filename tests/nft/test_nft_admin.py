@@ -30,6 +30,16 @@ def test_rando_cannot_set_owner(token, alice):
         token.set_owner(alice, {"from": alice})
 
 
+def test_set_al_merkle_root(token, deployer):
+    token.set_al_merkle_root("0x" + "11" * 32, {"from": deployer})
+    assert token.al_merkle_root() == "0x" + "11" * 32
+
+
+def test_rando_cannot_set_al_merkle_root(token, alice):
+    with brownie.reverts("Caller is not the owner"):
+        token.set_al_merkle_root("0x" + "11" * 32, {"from": alice})
+
+
 def test_rando_cannot_set_base_uri(token, alice):
     with brownie.reverts("Caller is not the owner"):
         token.set_base_uri("malware", {"from": alice})
@@ -0,0 +1,64 @@
+import brownie
+from brownie import ZERO_ADDRESS, accounts
+
+from scripts.deploy_llama import PREMINT_ADDRESSES
+
+
+def test_premint_runs(Llama, deployer, alice, bob, charlie):
+    preminters = [alice] * 3 + [bob] + [alice] * 18 + [charlie] * 2
+    token = Llama.deploy(preminters, {"from": deployer})
+
+    assert token.totalSupply() == len(preminters)
+    for token_id, preminter in enumerate(preminters):
+        assert token.ownerOf(token_id) == preminter
+    assert token.tokensForOwner(alice) == list(range(3)) + list(range(4, 22))
+    assert token.tokensForOwner(bob) == [3]
+    assert token.balanceOf(charlie) == 2
+    assert token.tokenOfOwnerByIndex(charlie, 1) == 23
+
+    # One ConsecutiveTransfer per run instead of a Transfer per token
+    events = token.tx.events
+    assert "Transfer" not in events
+    assert [
+        (e["_fromTokenId"], e["_toTokenId"], e["_fromAddress"], e["_toAddress"])
+        for e in events["ConsecutiveTransfer"]
+    ] == [
+        (0, 2, ZERO_ADDRESS, alice),
+        (3, 3, ZERO_ADDRESS, bob),
+        (4, 21, ZERO_ADDRESS, alice),
+        (22, 23, ZERO_ADDRESS, charlie),
+    ]
+
+    with brownie.reverts():
+        token.ownerOf(len(preminters))
+
+
+def test_transfer_from_run(Llama, deployer, alice, bob, check_transfers):
+    # Transfers out of the middle and the ends of alice's run of 30 preminted tokens
+    token = Llama.deploy([bob] + [alice] * 30, {"from": deployer})
+    moves = [(alice, bob, 10), (alice, bob, 11), (alice, bob, 30), (bob, alice, 10)]
+    moves += [(alice, bob, token_id) for token_id in (1, 12, 29, 9)]
+    check_transfers(token, {alice: range(1, 31), bob: [0]}, moves)
+
+
+def test_empty_premint(Llama, deployer):
+    token = Llama.deploy([], {"from": deployer})
+    assert token.totalSupply() == 0
+    with brownie.reverts():
+        token.ownerOf(0)
+
+    token.mint({"from": deployer})
+    assert token.ownerOf(0) == deployer
+
+
+def test_deploy_script_premint(Llama, deployer):
+    # More than the original limit of 20 preminters, with long runs of the same address
+    preminters = [accounts.at(address, force=True) for address in PREMINT_ADDRESSES]
+    token = Llama.deploy(preminters, {"from": deployer})
+
+    assert token.totalSupply() == len(preminters)
+    for token_id in (0, 61, 118, len(preminters) - 1):
+        assert token.ownerOf(token_id) == preminters[token_id]
+    holder = preminters[-1]
+    assert token.balanceOf(holder) == preminters.count(holder)
+    assert token.tokensForOwner(holder) == [i for i, p in enumerate(preminters) if p == holder]
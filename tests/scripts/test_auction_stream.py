@@ -0,0 +1,127 @@
+import asyncio
+import json
+
+from brownie import chain
+
+from scripts.auction_stream import AuctionStream, _load_test
+
+
+def _poll(stream):
+    for event in stream.fetch():
+        stream.apply(event)
+
+
+async def _next_event(reader):
+    while True:
+        line = await asyncio.wait_for(reader.readline(), 5)
+        if line.startswith(b"data: "):
+            return json.loads(line[6:])
+
+
+def test_stream_model(auction_house_unpaused, deployer, alice, bob):
+    auction_house = auction_house_unpaused
+    auction_house.disable_wl()
+    stream = AuctionStream(auction_house, chain.time)
+    stream.load()
+    state = stream.snapshot()
+    assert (state["llama_id"], state["amount"], state["min_next_bid"]) == (20, "0", "100")
+    assert state["remaining"] == auction_house.auction()["end_time"] - chain.time()
+
+    auction_house.create_bid(20, 200, {"from": alice, "value": 200})
+    _poll(stream)
+    state = stream.snapshot()
+    assert (state["amount"], state["bidder"], state["min_next_bid"]) == ("200", alice, "210")
+
+    # A bid in the last 100 seconds extends the auction
+    chain.sleep(auction_house.auction()["end_time"] - chain.time() - 10)
+    auction_house.create_bid(20, 210, {"from": bob, "value": 210})
+    auction_house.set_min_bid_increment_percentage(10, {"from": deployer})
+    _poll(stream)
+    state = stream.snapshot()
+    assert state["end_time"] == auction_house.auction()["end_time"]
+    assert (state["min_bid_increment_percentage"], state["min_next_bid"]) == (10, "231")
+
+    chain.sleep(200)
+    auction_house.settle_current_and_create_new_auction()
+    auction_house.set_reserve_price(300, {"from": deployer})
+    _poll(stream)
+    state = stream.snapshot()
+    auction = auction_house.auction()
+    assert (state["llama_id"], state["amount"], state["settled"]) == (21, "0", False)
+    assert (state["start_time"], state["end_time"]) == (auction["start_time"], auction["end_time"])
+    assert state["min_next_bid"] == "300"
+
+
+def test_stream_fans_out(auction_house_unpaused, alice, executor, http_request):
+    auction_house = auction_house_unpaused
+    auction_house.disable_wl()
+
+    async def run():
+        stream = AuctionStream(auction_house, chain.time, 0.05, executor)
+        async with await stream.start(port=0) as http:
+            port = http.sockets[0].getsockname()[1]
+            subscribers = [await asyncio.open_connection("127.0.0.1", port) for _ in range(3)]
+            for reader, writer in subscribers:
+                writer.write(b"GET /auction/stream HTTP/1.1\r\n\r\n")
+                assert (await _next_event(reader))["amount"] == "0"
+            while len(stream.subscribers) < 3:
+                await asyncio.sleep(0.01)
+
+            await stream._io(auction_house.create_bid, 20, 150, {"from": alice, "value": 150})
+            for reader, _ in subscribers:
+                event = await _next_event(reader)
+                assert (event["amount"], event["bidder"], event["min_next_bid"]) == (
+                    "150",
+                    alice.address,
+                    "157",
+                )
+
+            status, state = await http_request(port, "/auction")
+            assert status == 200 and state["amount"] == "150"
+            status, health = await http_request(port, "/health")
+            assert health["subscribers"] == 3 and health["broadcasts"] == 1
+
+            # A disconnected subscriber is forgotten
+            subscribers[0][1].close()
+            while len(stream.subscribers) > 2:
+                await asyncio.sleep(0.01)
+            await stream.stop()
+            for _, writer in subscribers[1:]:
+                writer.close()
+
+    asyncio.run(run())
+
+
+def test_pending_returns_cache(auction_house_unpaused, alice, bob, executor, http_request):
+    auction_house = auction_house_unpaused
+    auction_house.disable_wl()
+    auction_house.create_bid(20, 100, {"from": alice, "value": 100})
+
+    async def run():
+        stream = AuctionStream(auction_house, chain.time, 0.05, executor)
+        async with await stream.start(port=0) as http:
+            port = http.sockets[0].getsockname()[1]
+            path = f"/pending_returns/{alice.address.lower()}"
+            assert await http_request(port, path) == (
+                200,
+                {"address": alice.address, "pending_returns": "0"},
+            )
+            await http_request(port, path)
+            assert stream.metrics["pending_returns_reads"] == 1
+
+            # Alice is outbid, which invalidates her cached pending returns
+            await stream._io(auction_house.create_bid, 20, 200, {"from": bob, "value": 200})
+            while stream.auction["amount"] != 200:
+                await asyncio.sleep(0.01)
+            assert (await http_request(port, path))[1]["pending_returns"] == "100"
+            assert stream.metrics["pending_returns_reads"] == 2
+            assert (await http_request(port, "/pending_returns/0x1234"))[0] == 400
+            await stream.stop()
+
+    asyncio.run(run())
+
+
+def test_load_test(auction_house_unpaused, executor):
+    auction_house_unpaused.disable_wl()
+    result = asyncio.run(_load_test(auction_house_unpaused, 50, 3, 0.05, 0.05, executor))
+    assert (result["deliveries"], result["missed"]) == (150, 0)
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+from brownie import web3
+
+from scripts.batch_reads import (
+    BatchClient,
+    Result,
+    function_call,
+    read_profile,
+    read_profile_sequential,
+)
+
+
+@pytest.fixture
+def http_node():
+    # BatchClient posts to the node, the in-process py-evm chain has no URL to post to
+    if not web3.provider.endpoint_uri.startswith("http"):
+        pytest.skip("batched reads need an HTTP node")
+
+
+def test_read_profile_matches_sequential_reads(
+    http_node, token, auction_house_unpaused, preminter, alice
+):
+    token.transferFrom(preminter, alice, 5, {"from": preminter})
+    client = BatchClient(web3.provider.endpoint_uri)
+    for owner in (preminter, alice):
+        profile = read_profile(client, token, auction_house_unpaused, owner.address)
+        assert profile == read_profile_sequential(token, auction_house_unpaused, owner.address)
+        assert profile.errors == {}
+    assert client.round_trips == 4
+
+
+def test_failed_calls_are_isolated(http_node, token, auction_house, preminter):
+    client = BatchClient(web3.provider.endpoint_uri)
+    results = client.call(
+        [
+            function_call(token, "ownerOf", 0),
+            function_call(token, "ownerOf", 1000),
+            function_call(auction_house, "auction"),
+            # Not a contract, so there is nothing to decode
+            function_call(token, "balanceOf", preminter.address)._replace(
+                address=preminter.address
+            ),
+        ]
+    )
+    assert [result.success for result in results] == [True, False, True, False]
+    assert results[0].value == preminter
+    assert results[1].error
+    assert results[2].value == tuple(auction_house.auction())
+
+
+def test_calls_are_split_into_batches(http_node, token, auction_house):
+    client = BatchClient(web3.provider.endpoint_uri, max_batch=8)
+    results = client.call([function_call(token, "tokenURI", i) for i in range(20)])
+    assert client.round_trips == 3
+    assert [result.value for result in results] == [token.tokenURI(i) for i in range(20)]
+
+
+class _RejectingSession:
+    # Answers every batch the way a node rejecting it whole does, with one error object
+    def __init__(self, reply):
+        self.reply = reply
+
+    def post(self, endpoint_uri, json):
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: self.reply)
+
+
+def test_rejected_batch_fails_every_call(token):
+    client = BatchClient("http://127.0.0.1:8545", max_batch=2)
+    calls = [function_call(token, "tokenURI", i) for i in range(3)]
+    client.session = _RejectingSession(
+        {"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "rate limited"}}
+    )
+    assert client.call(calls) == [Result(False, error="rate limited")] * 3
+    assert client.round_trips == 2
+
+    client.session = _RejectingSession({"jsonrpc": "2.0", "id": None})
+    assert not any(result.success for result in client.call(calls))
@@ -0,0 +1,176 @@
+from brownie import chain, web3
+
+from scripts.indexer import BADGE_EVENTS, Indexer, benchmark
+
+
+def _indexer(tmp_path, token, auction_house, batch_size=3):
+    return Indexer(
+        web3,
+        [(token.address, token.abi), (auction_house.address, auction_house.abi)],
+        tmp_path / "llamas.db",
+        start_block=token.tx.block_number,
+        batch_size=batch_size,
+    )
+
+
+def _assert_ownership_matches(indexer, token, owners):
+    for token_id in range(token.totalSupply()):
+        assert indexer.owner_of(token_id) == token.ownerOf(token_id)
+    for owner in owners:
+        assert indexer.tokens_for_owner(owner.address) == sorted(token.tokensForOwner(owner))
+
+
+def test_indexer_matches_chain(tmp_path, token, auction_house_unpaused, preminter, alice, bob):
+    auction_house = auction_house_unpaused
+    token.transferFrom(preminter, alice, 3, {"from": preminter})
+    token.approve(bob, 4, {"from": preminter})
+    token.setApprovalForAll(bob, True, {"from": alice})
+
+    auction_house.disable_wl()
+    auction_house.create_bid(20, 100, {"from": alice, "value": "100 wei"})
+    auction_house.create_bid(20, 1000, {"from": bob, "value": "1000 wei"})
+    auction_house.withdraw({"from": alice})
+    chain.sleep(1000)
+    auction_house.settle_current_and_create_new_auction()
+
+    indexer = _indexer(tmp_path, token, auction_house)
+    assert indexer.sync(confirmations=0) > 0
+    assert indexer.checkpoint()[0] == chain.height
+    _assert_ownership_matches(indexer, token, [preminter, alice, bob])
+
+    current = auction_house.auction()
+    assert indexer.auction() == {
+        "llama_id": current["llama_id"],
+        "start_time": current["start_time"],
+        "end_time": current["end_time"],
+        "amount": 0,
+        "bidder": None,
+        "settled": False,
+    }
+    settled = indexer.auction(20)
+    assert (settled["bidder"], settled["amount"], settled["settled"]) == (bob, 1000, True)
+    assert indexer.bids_by(alice.address) == [(20, 100)]
+    assert indexer.conn.execute("SELECT approved FROM tokens WHERE token_id = 4").fetchone() == (
+        bob,
+    )
+    assert indexer.conn.execute("SELECT * FROM operators").fetchall() == [(alice, bob)]
+    assert indexer.conn.execute("SELECT withdrawer, amount FROM withdrawals").fetchall() == [
+        (alice, "100")
+    ]
+
+    # Nothing new to index, and a later run picks up where the last one stopped
+    assert indexer.sync(confirmations=0) == 0
+    indexer.close()
+    token.transferFrom(alice, bob, 3, {"from": alice})
+    indexer = _indexer(tmp_path, token, auction_house)
+    assert indexer.sync(confirmations=0) == 1
+    assert indexer.owner_of(3) == bob
+
+
+def test_indexer_confirmations(tmp_path, token, auction_house, preminter, alice):
+    indexer = _indexer(tmp_path, token, auction_house)
+    token.transferFrom(preminter, alice, 0, {"from": preminter})
+    indexer.sync(confirmations=1)
+    assert indexer.owner_of(0) == preminter
+    indexer.sync(confirmations=0)
+    assert indexer.owner_of(0) == alice
+
+
+def test_indexer_rewinds_reorganized_blocks(tmp_path, token, auction_house, preminter, alice, bob):
+    indexer = _indexer(tmp_path, token, auction_house)
+    token.transferFrom(preminter, alice, 0, {"from": preminter})
+    token.transferFrom(preminter, alice, 1, {"from": preminter})
+    indexer.sync(confirmations=0)
+    assert indexer.tokens_for_owner(alice.address) == [0, 1]
+
+    # Replace the last block with a different one at the same height
+    chain.undo()
+    token.transferFrom(preminter, bob, 2, {"from": preminter})
+    indexer.sync(confirmations=0)
+    _assert_ownership_matches(indexer, token, [preminter, alice, bob])
+    assert indexer.tokens_for_owner(alice.address) == [0]
+
+    # Replace both transfers with a chain that is shorter than the checkpoint
+    chain.undo(2)
+    indexer.sync(confirmations=0)
+    _assert_ownership_matches(indexer, token, [preminter, alice, bob])
+    assert indexer.checkpoint()[0] == chain.height
+    assert indexer.tokens_for_owner(alice.address) == []
+
+
+def test_indexer_reorganized_while_fetching(
+    tmp_path, monkeypatch, token, auction_house, preminter, alice, bob
+):
+    for token_id in range(3):
+        token.transferFrom(preminter, alice, token_id, {"from": preminter})
+    indexer = _indexer(tmp_path, token, auction_house, batch_size=100)
+
+    # The first fetch of the range sees the chain drop below its last block
+    get_logs = web3.eth.get_logs
+    fetches = []
+
+    def get_logs_during_reorg(params):
+        fetches.append(params)
+        if len(fetches) == 1:
+            chain.undo(2)
+            token.transferFrom(preminter, bob, 5, {"from": preminter})
+        return get_logs(params)
+
+    monkeypatch.setattr(web3.eth, "get_logs", get_logs_during_reorg)
+    indexer.sync(confirmations=0)
+    assert len(fetches) == 2 and fetches[1]["toBlock"] == chain.height
+    assert indexer.checkpoint()[0] == chain.height
+    _assert_ownership_matches(indexer, token, [preminter, alice, bob])
+    assert indexer.tokens_for_owner(alice.address) == [0]
+
+
+def _attachments_indexer(tmp_path, badge, shadow_box):
+    return Indexer(
+        web3,
+        [(badge.address, badge.abi, BADGE_EVENTS), (shadow_box.address, shadow_box.abi)],
+        tmp_path / "attachments.db",
+        start_block=badge.tx.block_number,
+        batch_size=3,
+    )
+
+
+def test_indexer_attachments(tmp_path, badge, shadow_box, deployer, preminter, alice):
+    no_data = "0x" + "00" * 32
+    badge.mintBatch(preminter, [1, 2, 3], [2, 2, 2], no_data, {"from": deployer})
+    badge.mint(alice, 2, 1, no_data, {"from": deployer})
+    badge.setApprovalForAll(preminter, shadow_box, True, {"from": preminter})
+    # Not the Llama ApprovalForAll, so it is not indexed
+    badge.setApprovalForAll(preminter, alice, True, {"from": preminter})
+    shadow_box.attach_batch(0, [1, 2], [1, 2], {"from": preminter})
+    shadow_box.attach(5, 1, 1, {"from": preminter})
+
+    indexer = _attachments_indexer(tmp_path, badge, shadow_box)
+    indexer.sync(confirmations=0)
+    assert indexer.badges_of(0) == [(1, 1), (2, 2)]
+    assert indexer.llamas_with_badge(1) == [(0, 1), (5, 1)]
+    assert indexer.badge_balances(preminter.address) == {3: 2}
+    assert indexer.badge_balances(shadow_box.address) == {1: 2, 2: 2}
+    assert indexer.badge_balances(alice.address) == {2: 1}
+    assert indexer.conn.execute("SELECT COUNT(*) FROM operators").fetchone() == (0,)
+
+    # Incremental updates, then a reorganization of the last block
+    shadow_box.detach_batch(0, [1, 2], [1, 1], {"from": preminter})
+    indexer.sync(confirmations=0)
+    assert indexer.badges_of(0) == [(2, 1)]
+    assert indexer.llamas_with_badge(1) == [(5, 1)]
+    assert indexer.badge_balances(preminter.address) == {1: 1, 2: 1, 3: 2}
+
+    chain.undo()
+    shadow_box.attach(7, 3, 2, {"from": preminter})
+    indexer.sync(confirmations=0)
+    assert indexer.badges_of(0) == [(1, 1), (2, 2)]
+    assert indexer.llamas_with_badge(3) == [(7, 2)]
+    for llama_id in (0, 5, 7):
+        assert indexer.badges_of(llama_id) == sorted(
+            tuple(attachment) for attachment in shadow_box.badges_of(llama_id)
+        )
+
+
+def test_attachments_benchmark():
+    result = benchmark(llamas=20, badge_types=10, badges_per_llama=3)
+    assert result["ingest_s"] > 0
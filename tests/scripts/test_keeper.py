@@ -0,0 +1,86 @@
+import asyncio
+
+from brownie import accounts, chain
+
+from scripts import keeper as keeper_module
+from scripts.keeper import Keeper, drive
+
+
+def _keeper(auction_house, account, executor):
+    return Keeper(auction_house, account, chain.time, 0.2, executor)
+
+
+def test_keeper_follows_logs(auction_house_unpaused, alice, executor):
+    auction_house = auction_house_unpaused
+    auction_house.disable_wl()
+    keeper = _keeper(auction_house, accounts[2], executor)
+    keeper.load()
+    assert (keeper.llama_id, keeper.settled) == (20, False)
+
+    # A bid in the last 100 seconds extends the auction
+    chain.sleep(auction_house.auction()["end_time"] - chain.time() - 10)
+    auction_house.create_bid(20, 100, {"from": alice, "value": "100 wei"})
+    keeper.poll()
+    assert keeper.end_time == auction_house.auction()["end_time"]
+
+    chain.sleep(200)
+    auction_house.settle_current_and_create_new_auction()
+    keeper.poll()
+    assert (keeper.llama_id, keeper.settled) == (21, False)
+    assert keeper.end_time == auction_house.auction()["end_time"]
+
+
+def test_keeper_loses_race(auction_house_unpaused, executor):
+    auction_house = auction_house_unpaused
+    first, second = (_keeper(auction_house, accounts[i], executor) for i in (2, 3))
+    first.load()
+    second.load()
+    chain.sleep(200)
+
+    asyncio.run(first.settle())
+    assert asyncio.run(second.settle()) == second.poll_interval
+    assert len(first.metrics["latencies"]) == 1, first.metrics
+    assert second.metrics == {"latencies": [], "lost_races": 1, "failures": 0}
+    second.poll()
+    assert (second.llama_id, second.settled) == (21, False)
+
+
+def test_keeper_backs_off_while_paused(auction_house_unpaused, executor, monkeypatch):
+    auction_house = auction_house_unpaused
+    chain.sleep(auction_house.auction()["end_time"] - chain.time() + 10)
+    auction_house.pause()
+    monkeypatch.setattr(keeper_module, "PAUSED_INTERVAL", 1)
+    keeper = _keeper(auction_house, accounts[2], executor)
+    attempts = []
+    settle = keeper.settle
+
+    async def counted_settle():
+        attempts.append(chain.time())
+        return await settle()
+
+    keeper.settle = counted_settle
+
+    async def run():
+        task = asyncio.create_task(keeper.run())
+        # Four poll intervals, but a single attempt until PAUSED_INTERVAL has passed
+        await asyncio.sleep(0.8)
+        keeper.stop()
+        await task
+
+    asyncio.run(run())
+    assert len(attempts) == 1
+    assert keeper.metrics == {"latencies": [], "lost_races": 0, "failures": 0}
+
+
+def test_keepers_rotate_auctions(auction_house_unpaused, executor):
+    auction_house = auction_house_unpaused
+    auction_house.disable_wl()
+    keepers = [_keeper(auction_house, accounts[i], executor) for i in (2, 3)]
+    asyncio.run(drive(auction_house, keepers, 3, accounts[1], executor))
+
+    assert auction_house.auction()["llama_id"] == 23
+    latencies = sum((keeper.metrics["latencies"] for keeper in keepers), [])
+    # Settled in the first blocks after end_time
+    assert len(latencies) == 3
+    assert all(0 < latency <= 5 for latency in latencies)
+    assert all(keeper.metrics["failures"] == 0 for keeper in keepers)
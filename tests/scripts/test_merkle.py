@@ -0,0 +1,47 @@
+import json
+
+import pytest
+from brownie import web3
+
+from scripts import merkle
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 8, 9])
+def test_every_proof_verifies(size):
+    leaves = [merkle.keccak(i.to_bytes(32, "big")) for i in range(size)]
+    levels = merkle.build_tree(leaves)
+    proofs = merkle.proofs(levels)
+    for leaf in leaves:
+        assert merkle.verify(proofs[leaf], merkle.root(levels), leaf)
+    assert not merkle.verify(proofs[leaves[0]], merkle.root(levels), merkle.keccak(b"other"))
+
+
+def test_leaf_matches_contract_message(alice):
+    assert merkle.leaf("allowlist:", alice.address, 2) == web3.keccak(
+        merkle.encode_message("allowlist:", alice.address, 2)
+    )
+
+
+def test_proofs_are_accepted(tmp_path, token, auction_house_unpaused, accounts, deployer):
+    (tmp_path / "wl_data.csv").write_text("address\n" + "".join(f"{a}\n" for a in accounts[:7]))
+    (tmp_path / "al_data.csv").write_text(f"address,amount\n{accounts[1]},2\n{accounts[2]},3\n")
+    sources = {"whitelist:": tmp_path / "wl_data.csv", "allowlist:": tmp_path / "al_data.csv"}
+    roots = merkle.build_all(sources, tmp_path)
+
+    auction_house_unpaused.set_wl_merkle_root(roots["whitelist:"], {"from": deployer})
+    wl = json.loads(merkle.output_path("whitelist:", tmp_path).read_text())
+    for bidder, amount in [(accounts[3], 100), (accounts[6], 200)]:
+        proof = wl["proofs"][bidder.address]["proof"]
+        auction_house_unpaused.create_wl_bid_with_proof(
+            20, amount, proof, {"from": bidder, "value": amount}
+        )
+        assert auction_house_unpaused.auction()["bidder"] == bidder
+
+    token.set_al_merkle_root(roots["allowlist:"], {"from": deployer})
+    token.start_al_mint({"from": deployer})
+    al = json.loads(merkle.output_path("allowlist:", tmp_path).read_text())["proofs"]
+    entry = al[accounts[2].address]
+    token.allowlistMintWithProof(
+        3, entry["amount"], entry["proof"], {"from": accounts[2], "value": web3.toWei(0.3, "ether")}
+    )
+    assert token.balanceOf(accounts[2]) == 3
@@ -0,0 +1,98 @@
+import asyncio
+import functools
+
+import pytest
+from brownie import web3
+
+from scripts.batch_reads import BatchClient
+from scripts.metadata import (
+    MetadataCache,
+    build_export,
+    read_state,
+    read_state_sequential,
+    token_uris,
+)
+
+
+def test_token_uri_table(token, deployer):
+    state = read_state_sequential(token)
+    assert token_uris(state) == [token.tokenURI(i) for i in range(20)]
+
+    token.set_base_uri("ipfs://QmLlamas/", {"from": deployer})
+    token.set_revealed(True, {"from": deployer})
+    uris = token_uris(read_state_sequential(token))
+    assert uris == [token.tokenURI(i) for i in range(20)]
+    assert uris[7] == "ipfs://QmLlamas/7"
+
+
+def test_read_state_in_one_round_trip(token):
+    if not web3.provider.endpoint_uri.startswith("http"):
+        pytest.skip("batched reads need an HTTP node")
+    client = BatchClient(web3.provider.endpoint_uri)
+    assert read_state(client, token) == read_state_sequential(token)
+    assert client.round_trips == 1
+
+
+def test_cache_is_invalidated_by_the_setters(token, deployer, executor, http_request):
+    documents = {token.default_uri(): {"name": "Unrevealed llama"}}
+    documents.update({f"ipfs://QmLlamas/{i}": {"name": f"Llama #{i}"} for i in range(20)})
+    fetched = []
+
+    def fetch(uri):
+        fetched.append(uri)
+        return documents[uri]
+
+    async def run():
+        cache = MetadataCache(
+            functools.partial(read_state_sequential, token), fetch, 0.05, executor
+        )
+        async with await cache.start(port=0) as http:
+            port = http.sockets[0].getsockname()[1]
+            # Before the reveal every token shares the one default document
+            for token_id in (3, 3, 4):
+                assert await http_request(port, f"/metadata/{token_id}") == (
+                    200,
+                    {"name": "Unrevealed llama"},
+                )
+            assert fetched == [token.default_uri()]
+            assert (await http_request(port, "/metadata/20"))[0] == 404
+            assert (await http_request(port, "/token_uri/x"))[0] == 404
+
+            await cache._io(token.set_base_uri, "ipfs://QmLlamas/", {"from": deployer})
+            await cache._io(token.set_revealed, True, {"from": deployer})
+            while cache.state.revealed is not True:
+                await asyncio.sleep(0.01)
+            assert await http_request(port, "/token_uri/3") == (
+                200,
+                {"token_id": 3, "token_uri": "ipfs://QmLlamas/3"},
+            )
+            assert await http_request(port, "/metadata/3") == (200, {"name": "Llama #3"})
+            status, table = await http_request(port, "/token_uris")
+            assert table["token_uris"] == [token.tokenURI(i) for i in range(20)]
+            assert table["version"] == cache.version >= 1
+
+            status, health = await http_request(port, "/health")
+            assert health["state"]["revealed"] and health["fetches"] == 2
+            await cache.stop()
+
+    asyncio.run(run())
+
+
+def test_mint_extends_the_table(token, deployer):
+    token.set_base_uri("ipfs://QmLlamas/", {"from": deployer})
+    token.set_revealed(True, {"from": deployer})
+    cache = MetadataCache(functools.partial(read_state_sequential, token))
+    cache.refresh()
+    cache.documents.put("ipfs://QmLlamas/0", {"name": "Llama #0"})
+
+    token.mint({"from": deployer})
+    assert not cache.refresh()
+    assert cache.uris[-1] == "ipfs://QmLlamas/20" == token.tokenURI(20)
+    assert cache.version == 0 and len(cache.documents) == 1
+
+
+def test_build_export(token):
+    state = read_state_sequential(token)
+    export = build_export(state, {token.default_uri(): {"name": "Unrevealed llama"}})
+    assert export["total_supply"] == len(export["token_uris"]) == 20
+    assert export["metadata"][export["token_uris"][0]] == {"name": "Unrevealed llama"}
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from scripts import signature_server, signatures
+
+
+@pytest.fixture(scope="function")
+def artifact_dir(tmp_path, accounts, deployer):
+    (tmp_path / "wl_data.csv").write_text(
+        "address\n" + "".join(f"{a.address}\n" for a in accounts[:5])
+    )
+    (tmp_path / "al_data.csv").write_text(f"address,amount\n{accounts[0].address},2\n")
+    sources = {"whitelist:": tmp_path / "wl_data.csv", "allowlist:": tmp_path / "al_data.csv"}
+    signatures.sign_all(deployer.private_key, sources, tmp_path / "signatures")
+    return tmp_path / "signatures"
+
+
+def test_index_lookup(artifact_dir, accounts):
+    index = signature_server.SignatureIndex(signature_server.build_index(artifact_dir))
+    wl = json.loads((artifact_dir / "whitelist.json").read_text())["signatures"]
+    assert index.entries == 6
+    for address, entry in wl.items():
+        assert index.lookup("whitelist:", address.lower()) == entry
+    assert index.lookup("allowlist:", accounts[0].address)["amount"] == 2
+    assert index.lookup("friend:", accounts[0].address) is None
+    assert index.lookup("whitelist:", accounts[5].address) is None
+    assert index.lookup("whitelist:", "0x1234") is None
+
+
+def test_server_endpoints_and_reload(artifact_dir, accounts, http_request):
+    async def run():
+        server = signature_server.SignatureServer(artifact_dir, reload_interval=0.05)
+        async with await server.start(port=0) as http:
+            port = http.sockets[0].getsockname()[1]
+            status, entry = await http_request(port, f"/signature/whitelist/{accounts[1]}")
+            assert status == 200
+            assert entry == server.index.lookup("whitelist:", accounts[1].address)
+            status, _ = await http_request(port, f"/signature/whitelist/{accounts[6]}")
+            assert status == 404
+
+            batch = [accounts[0].address, accounts[6].address]
+            status, entries = await http_request(
+                port, "/signatures/whitelist", "POST", {"addresses": batch}
+            )
+            assert status == 200
+            assert entries[accounts[6].address] is None
+            assert entries[accounts[0].address]["signature"].startswith("0x")
+            # Only a list of strings is a batch, other elements cannot key the reply
+            for addresses in ("0x", [{"address": accounts[0].address}], [1], [None]):
+                status, _ = await http_request(
+                    port, "/signatures/whitelist", "POST", {"addresses": addresses}
+                )
+                assert status == 400
+
+            # Rewriting an artifact is picked up without restarting the server
+            artifact = json.loads((artifact_dir / "whitelist.json").read_text())
+            artifact["signatures"][accounts[6].address] = {"signature": "0x" + "11" * 65}
+            (artifact_dir / "whitelist.json").write_text(json.dumps(artifact))
+            await asyncio.sleep(0.5)
+            status, entry = await http_request(port, f"/signature/whitelist/{accounts[6]}")
+            assert status == 200
+            assert entry == {"signature": "0x" + "11" * 65}
+
+            result = await signature_server.load_test(
+                f"http://127.0.0.1:{port}", 500, 0.5, 8, directory=artifact_dir
+            )
+            assert result["requests"] == 250
+            assert result["errors"] == 0
+
+    asyncio.run(run())
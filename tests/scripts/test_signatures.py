@@ -0,0 +1,118 @@
+import json
+
+import brownie
+import pytest
+from brownie import web3
+from eth_abi import encode
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from scripts import signatures
+
+
+def test_encode_message_matches_abi_encode(alice):
+    assert signatures.encode_message("whitelist:", alice.address) == encode(
+        ["string", "address"], ["whitelist:", alice.address]
+    )
+    assert signatures.encode_message("allowlist:", alice.address, 3) == encode(
+        ["string", "address", "uint256"], ["allowlist:", alice.address, 3]
+    )
+
+
+@pytest.mark.parametrize("native", [True, False], ids=["coincurve", "eth_keys"])
+def test_sign_matches_eth_account(monkeypatch, alice, deployer, native):
+    if not native:
+        monkeypatch.setattr(signatures, "coincurve", None)
+    message = encode_defunct(web3.keccak(encode(["string", "address"], ["friend:", alice.address])))
+    expected = Account.sign_message(message, deployer.private_key).signature.hex()
+    assert signatures.sign(deployer.private_key, "friend:", alice.address) == expected
+
+
+def test_read_rows_dedups_and_checksums(tmp_path, alice, bob):
+    path = tmp_path / "al_data.csv"
+    path.write_text(
+        f"address,amount\n{alice.address.lower()},2\n{bob.address},1\n\n{alice.address},2\n"
+    )
+    assert list(signatures.read_rows(path, with_amount=True)) == [
+        (alice.address, 2),
+        (bob.address, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "rows", ["0x1234\n", "{address},1\n{address},2\n"], ids=["invalid", "conflicting"]
+)
+def test_read_rows_rejects_bad_rows(tmp_path, alice, rows):
+    path = tmp_path / "al_data.csv"
+    path.write_text("address,amount\n" + rows.format(address=alice.address))
+    with pytest.raises(ValueError):
+        list(signatures.read_rows(path, with_amount=True))
+
+
+def test_sign_rows_with_workers(monkeypatch, deployer, accounts):
+    monkeypatch.setattr(signatures, "CHUNK_SIZE", 2)
+    rows = [(a.address, None) for a in accounts[:5]]
+    expected = {a: signatures.sign(deployer.private_key, "whitelist:", a) for a, _ in rows}
+    assert signatures.sign_rows(deployer.private_key, "whitelist:", rows, workers=2) == expected
+
+
+def test_signed_artifacts_are_accepted(tmp_path, token, auction_house_unpaused, alice, deployer):
+    (tmp_path / "wl_data.csv").write_text(f"address\n{alice.address}\n")
+    (tmp_path / "al_data.csv").write_text(f"address,amount\n{alice.address.lower()},2\n")
+    stats = signatures.sign_all(
+        deployer.private_key,
+        {"whitelist:": tmp_path / "wl_data.csv", "allowlist:": tmp_path / "al_data.csv"},
+        tmp_path / "signatures",
+    )
+
+    wl = json.loads(stats["whitelist:"]["path"].read_text())
+    assert wl["domain"] == "whitelist:"
+    assert wl["signer"] == deployer.address
+    auction_house_unpaused.create_wl_bid(
+        20, 100, wl["signatures"][alice.address]["signature"], {"from": alice, "value": 100}
+    )
+    assert auction_house_unpaused.auction()["bidder"] == alice
+
+    al = json.loads(stats["allowlist:"]["path"].read_text())["signatures"][alice.address]
+    token.start_al_mint({"from": deployer})
+    token.allowlistMint(
+        2, al["amount"], al["signature"], {"from": alice, "value": web3.toWei(0.2, "ether")}
+    )
+    assert token.balanceOf(alice) == 2
+    with brownie.reverts("Signature is not valid"):
+        token.allowlistMint(
+            1, 3, al["signature"], {"from": alice, "value": web3.toWei(0.1, "ether")}
+        )
+
+
+def test_sign_all_only_signs_changed_rows(tmp_path, accounts, deployer):
+    source = tmp_path / "al_data.csv"
+    source.write_text("address,amount\n" + "".join(f"{a.address},1\n" for a in accounts[:5]))
+    sources = {"allowlist:": source}
+    output_dir = tmp_path / "signatures"
+
+    stats = signatures.sign_all(deployer.private_key, sources, output_dir)["allowlist:"]
+    assert (stats["hits"], stats["signed"], stats["removed"]) == (0, 5, 0)
+
+    stats = signatures.sign_all(deployer.private_key, sources, output_dir)["allowlist:"]
+    assert (stats["hits"], stats["signed"], stats["removed"]) == (5, 0, 0)
+
+    # Drop accounts[0], change the amount of accounts[1] and add a new address
+    source.write_text(
+        "address,amount\n"
+        + f"{accounts[1].address},3\n"
+        + "".join(f"{a.address},1\n" for a in accounts[2:6])
+    )
+    stats = signatures.sign_all(deployer.private_key, sources, output_dir)["allowlist:"]
+    assert (stats["hits"], stats["signed"], stats["removed"]) == (3, 2, 1)
+
+    entries = json.loads(stats["path"].read_text())["signatures"]
+    assert accounts[0].address not in entries
+    assert entries[accounts[1].address] == {
+        "amount": 3,
+        "signature": signatures.sign(deployer.private_key, "allowlist:", accounts[1].address, 3),
+    }
+
+    # A new signer never reuses signatures made with the previous key
+    stats = signatures.sign_all(accounts.add().private_key, sources, output_dir)["allowlist:"]
+    assert (stats["hits"], stats["signed"]) == (0, 5)
@@ -0,0 +1,127 @@
+import pytest
+from brownie import accounts, web3
+
+from scripts.indexer import Indexer
+from scripts.stale_returns import (
+    bidders_from_db,
+    bidders_from_logs,
+    collect_bidders,
+    outstanding,
+    pack,
+    simulate,
+)
+
+
+@pytest.fixture
+def bidders(auction_house_unpaused):
+    # Every bidder but the last one is outbid and left with pending returns
+    auction_house_unpaused.disable_wl()
+    bidders = accounts[1:6]
+    for i, bidder in enumerate(bidders):
+        amount = 100 * 2**i
+        auction_house_unpaused.create_bid(20, amount, {"from": bidder, "value": amount})
+    return bidders
+
+
+def _estimate(batch):
+    return 25000 + 8000 * len(batch)
+
+
+def test_bidders_from_logs(token, auction_house_unpaused, bidders):
+    auction_house_unpaused.create_bid(20, 10000, {"from": bidders[0], "value": 10000})
+    addresses = bidders_from_logs(auction_house_unpaused, token.tx.block_number, batch_size=2)
+    assert addresses == [bidder.address for bidder in bidders]
+
+
+def _index(tmp_path, token, auction_house, start_block):
+    indexer = Indexer(
+        web3,
+        [(token.address, token.abi), (auction_house.address, auction_house.abi)],
+        tmp_path / "llamas.db",
+        start_block=start_block,
+    )
+    indexer.sync(confirmations=0)
+    indexer.close()
+    return tmp_path / "llamas.db"
+
+
+def test_bidders_from_db(tmp_path, token, auction_house_unpaused, bidders):
+    db_path = _index(tmp_path, token, auction_house_unpaused, token.tx.block_number)
+    assert bidders_from_db(auction_house_unpaused, db_path) == (
+        [bidder.address for bidder in bidders],
+        token.tx.block_number,
+        web3.eth.block_number,
+    )
+
+
+def test_bidders_from_db_of_another_auction_house(
+    tmp_path, token, auction_house, auction_house_unpaused, bidders
+):
+    db_path = _index(tmp_path, token, auction_house, token.tx.block_number)
+    with pytest.raises(ValueError):
+        bidders_from_db(auction_house_unpaused, db_path)
+    with pytest.raises(ValueError):
+        collect_bidders(auction_house_unpaused, token.tx.block_number, db_path)
+
+
+def test_collect_bidders_outside_the_db(tmp_path, token, auction_house_unpaused, bidders):
+    # The database starts after the first two bids and stops before the last one
+    start_block = token.tx.block_number
+    first_bid = web3.eth.block_number - len(bidders) + 1
+    db_path = _index(tmp_path, token, auction_house_unpaused, first_bid + 2)
+    late = accounts[6]
+    auction_house_unpaused.create_bid(20, 10000, {"from": late, "value": 10000})
+
+    assert bidders_from_db(auction_house_unpaused, db_path)[0] == [
+        bidder.address for bidder in bidders[2:]
+    ]
+    assert collect_bidders(auction_house_unpaused, start_block, db_path) == [
+        bidder.address for bidder in bidders + [late]
+    ]
+
+
+def test_outstanding(auction_house_unpaused, bidders):
+    auction_house_unpaused.withdraw({"from": bidders[1]})
+    pending = outstanding(auction_house_unpaused, [bidder.address for bidder in bidders])
+    assert pending == {bidders[0].address: 100, bidders[2].address: 400, bidders[3].address: 800}
+
+
+def test_pack_fills_batches():
+    addresses = [f"0x{i:040x}" for i in range(250)]
+    batches = pack(addresses, _estimate)
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert sum(batches, []) == addresses
+
+
+def test_pack_gas_bound():
+    addresses = [f"0x{i:040x}" for i in range(100)]
+    batches = pack(addresses, _estimate, max_gas=_estimate(range(30)))
+    assert [len(batch) for batch in batches] == [30, 30, 30, 10]
+    assert sum(batches, []) == addresses
+
+
+def test_pack_address_over_gas_bound():
+    with pytest.raises(ValueError):
+        pack(["0x" + "00" * 20], _estimate, max_gas=_estimate([]))
+
+
+def test_pack_and_simulate(auction_house_unpaused, deployer, bidders):
+    pending = outstanding(auction_house_unpaused, [bidder.address for bidder in bidders])
+
+    def estimate(batch):
+        return auction_house_unpaused.withdraw_stale.estimate_gas(batch, {"from": deployer})
+
+    # Room for two addresses but not for three, whichever they are
+    max_gas = estimate(list(pending)[:2]) + 2000
+    assert estimate(list(pending)[1:]) > max_gas
+    batches = pack(list(pending), estimate, max_gas=max_gas)
+    assert [len(batch) for batch in batches] == [2, 2]
+
+    balances = [bidder.balance() for bidder in bidders]
+    gas_used = simulate(auction_house_unpaused, deployer, batches)
+    assert len(gas_used) == 2
+    assert all(gas <= max_gas for gas in gas_used)
+    assert outstanding(auction_house_unpaused, list(pending)) == {}
+    for i, bidder in enumerate(bidders[:4]):
+        amount = 100 * 2**i
+        assert bidder.balance() == balances[i] + amount - amount * 5 // 100